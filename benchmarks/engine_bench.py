@@ -0,0 +1,351 @@
+"""Engine throughput benchmarks
+
+Run from the repository root:
+    python -m benchmarks.engine_bench run --out bench.json
+    python -m benchmarks.engine_bench compare baseline.json bench.json --threshold 0.05
+
+compare exits with status 1 when any benchmark regressed by more than the threshold.
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Any, List, Tuple
+
+import numpy as np
+
+from game_engine.constants import *
+from game_engine.checkpoint import pack_envs, unpack_envs
+from game_engine.deck import Deck
+from game_engine.environment import GolfEnvironment
+from game_engine.replay import GameRecorder
+from game_engine.vec_environment import VecGolfEnvironment
+from rl_agents.random_agent import RandomAgent
+from rl_agents.greedy_agent import GreedyAgent
+from rl_agents.mlp_policy_agent import MLPPolicyAgent, init_weights
+
+SEEDS = list(range(20)) # Fixed deals for every benchmark
+
+
+# --- Harness --- #
+
+def time_per_op(fn: Callable[[], Any], min_time: float = 0.2, repeats: int = 5) -> Tuple[float, int]:
+    """Best-of-repeats nanoseconds per call of fn, and the number of calls per repeat"""
+    # Calibrate so one repeat runs for about min_time
+    number = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_time * 1e9 / 4 or number >= 1 << 24:
+            break
+        number *= 4
+    number = max(1, int(number * min_time * 1e9 / max(elapsed, 1)))
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter_ns() - start) / number)
+    return best, number
+
+
+def _env_in_phase(seed: int, phase: int) -> GolfEnvironment:
+    """Fresh environment played with random legal actions until it reaches phase"""
+    random.seed(seed)
+    env = GolfEnvironment(seed=seed)
+    env.reset()
+    while env.current_phase != phase:
+        env.step(random.choice(env.get_legal_actions(env.current_player)))
+    return env
+
+
+# --- Microbenchmarks --- #
+# Each returns the function to time, built on a fixed deal
+
+def bench_calculate_score() -> Callable[[], Any]:
+    player = _env_in_phase(SEEDS[0], PHASE_START_TURN).players[0]
+    return player.calculate_score
+
+def bench_get_legal_actions() -> Callable[[], Any]:
+    env = _env_in_phase(SEEDS[0], PHASE_MUST_FLIP_CARD)
+    return lambda: env.get_legal_actions(env.current_player)
+
+def bench_get_observation() -> Callable[[], Any]:
+    env = _env_in_phase(SEEDS[0], PHASE_DRAW_STOCK_DECISION)
+    return lambda: env.get_observation(env.current_player)
+
+def bench_encode_observation() -> Callable[[], Any]:
+    env = _env_in_phase(SEEDS[0], PHASE_DRAW_STOCK_DECISION)
+    buf = env._obs_buffers[0].copy()
+    return lambda: env.encode_observation(env.current_player, out=buf)
+
+def bench_reset() -> Callable[[], Any]:
+    env = GolfEnvironment(seed=SEEDS[0])
+    return env.reset
+
+def bench_deck_shuffle() -> Callable[[], Any]:
+    deck = Deck(rng=random.Random(SEEDS[0]))
+    return deck.shuffle
+
+def bench_deal_initial_hands() -> Callable[[], Any]:
+    # Includes refilling the deck, _deal_initial_hands consumes 18 cards per call
+    env = GolfEnvironment(seed=SEEDS[0])
+    env.reset()
+    def deal():
+        env.deck.reset()
+        env._deal_initial_hands()
+    return deal
+
+def _mid_round_batch(batch: int = 10_000, warmup_steps: int = 30) -> Tuple[Any, Any]:
+    """Encoded observations and legal masks of a batch of games in mixed phases"""
+    agent = GreedyAgent()
+    vec_env = VecGolfEnvironment(batch, seed=SEEDS[0])
+    obs, masks = vec_env.reset()
+    for _ in range(warmup_steps):
+        obs, _, _, masks, _ = vec_env.step(agent.act_batch(obs, masks))
+    return obs.copy(), masks.copy()
+
+def bench_greedy_batch() -> Callable[[], Any]:
+    # One call decides for every game of the batch
+    agent = GreedyAgent()
+    obs, masks = _mid_round_batch()
+    return lambda: agent.act_batch(obs, masks)
+
+def bench_mlp_batch() -> Callable[[], Any]:
+    agent = MLPPolicyAgent(init_weights(seed=SEEDS[0]), seed=SEEDS[0])
+    obs, masks = _mid_round_batch()
+    actions = np.empty(len(obs), dtype=np.int64)
+    return lambda: agent.act_batch(obs, masks, out=actions)
+
+def bench_random_agent() -> Callable[[], Any]:
+    # Same decisions one act(legal_actions) call at a time, the baseline for the batched agents
+    agent = RandomAgent()
+    _, masks = _mid_round_batch()
+    legal = [np.flatnonzero(mask).tolist() for mask in masks]
+    return lambda: [agent.act(actions) for actions in legal]
+
+def bench_vec_checkpoint() -> Callable[[], Any]:
+    # Whole pool to an in-memory .npz, generator state included
+    vec_env = VecGolfEnvironment(100_000, seed=SEEDS[0])
+    vec_env.reset()
+    return lambda: vec_env.save_checkpoint(io.BytesIO())
+
+def bench_pack_envs() -> Callable[[], Any]:
+    envs = [_env_in_phase(seed, PHASE_START_TURN) for seed in SEEDS] * 50
+    return lambda: pack_envs(envs, include_rng=False)
+
+def bench_unpack_envs() -> Callable[[], Any]:
+    # Back into the same 1k environments, random state included
+    envs = [_env_in_phase(seed, PHASE_START_TURN).clone() for seed in SEEDS for _ in range(50)]
+    columns = pack_envs(envs)
+    return lambda: unpack_envs(columns, envs)
+
+MICROBENCHMARKS: Dict[str, Callable[[], Callable[[], Any]]] = {
+    "player.calculate_score": bench_calculate_score,
+    "env.get_legal_actions": bench_get_legal_actions,
+    "env.get_observation": bench_get_observation,
+    "env.encode_observation": bench_encode_observation,
+    "env.reset": bench_reset,
+    "deck.shuffle": bench_deck_shuffle,
+    "env._deal_initial_hands": bench_deal_initial_hands,
+    "agent.random_10k": bench_random_agent,
+    "agent.greedy_batch_10k": bench_greedy_batch,
+    "agent.mlp_batch_10k": bench_mlp_batch,
+    "checkpoint.vec_save_100k": bench_vec_checkpoint,
+    "checkpoint.pack_envs_1k": bench_pack_envs,
+    "checkpoint.unpack_envs_1k": bench_unpack_envs,
+}
+
+
+# --- Allocations --- #
+
+def bench_reset_allocations(resets: int = 1000) -> Dict[str, Any]:
+    """Bytes still held after steady-state resets, reset must reuse its deck, players and lists"""
+    env = GolfEnvironment(seed=SEEDS[0])
+    env.reset()
+    env.reset()
+    reused = (env.deck, env.deck.cards, env.discard_pile, *env.players)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(resets):
+        env.reset()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    # Only count memory attributed to the engine, not tracemalloc's own bookkeeping
+    engine = [tracemalloc.Filter(True, os.path.join("*", "game_engine", "*"))]
+    retained = sum(stat.size_diff for stat in after.filter_traces(engine).compare_to(before.filter_traces(engine), "filename"))
+    if any(a is not b for a, b in zip(reused, (env.deck, env.deck.cards, env.discard_pile, *env.players))):
+        raise RuntimeError("env.reset replaced its deck, players or discard pile instead of reusing them")
+    # Whole bytes per reset: the live state itself (current masks, list capacity) is not growth
+    return {"value": round(retained / resets), "unit": "B/reset", "higher_is_better": False, "resets": resets}
+
+
+# --- End to end --- #
+
+def play_random_games(seeds: List[int], games_per_seed: int) -> Tuple[int, int]:
+    """Plays RandomAgent self-play rounds, returns (games, steps)"""
+    agent = RandomAgent()
+    env = GolfEnvironment()
+    games = steps = 0
+    for seed in seeds:
+        random.seed(seed)
+        env.seed(seed)
+        for _ in range(games_per_seed):
+            env.reset()
+            done = False
+            while not done:
+                _, _, _, done, _ = env.step(agent.act(env.get_legal_actions(env.current_player)))
+                steps += 1
+            games += 1
+    return games, steps
+
+def bench_random_games(games_per_seed: int = 5, repeats: int = 3) -> Dict[str, Any]:
+    best = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        games, steps = play_random_games(SEEDS, games_per_seed)
+        elapsed = time.perf_counter() - start
+        best = max(best, games / elapsed)
+    return {"value": best, "unit": "games/s", "higher_is_better": True,
+            "games": games, "steps_per_game": steps / games}
+
+def bench_replay_steps(games_per_seed: int = 20, repeats: int = 3) -> Dict[str, Any]:
+    """Steps/s re-simulating recorded random games, the step path without agent or legal action overhead"""
+    env = GolfEnvironment(obs_type="none")
+    recorder = GameRecorder(env)
+    for seed in SEEDS:
+        random.seed(seed)
+        env.seed(seed)
+        for _ in range(games_per_seed):
+            env.reset()
+            done = False
+            while not done:
+                _, _, _, done, _ = env.step(random.choice(env.get_legal_actions(env.current_player)))
+    recorder.close()
+
+    best = 0.0
+    steps = sum(len(record.actions) for record in recorder.records)
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for record in recorder.records:
+            env.reset(seed=record.seed)
+            for action_id in record.actions:
+                env.step(action_id)
+        best = max(best, steps / (time.perf_counter() - start))
+    return {"value": best, "unit": "steps/s", "higher_is_better": True, "steps": steps}
+
+
+# --- Results --- #
+
+def machine_metadata() -> Dict[str, Any]:
+    """Where and on what code the benchmarks ran"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def run_benchmarks(names: List[str] = None, min_time: float = 0.2, repeats: int = 5) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name, make in MICROBENCHMARKS.items():
+        if names and name not in names:
+            continue
+        ns, number = time_per_op(make(), min_time=min_time, repeats=repeats)
+        results[name] = {"value": ns, "unit": "ns/op", "higher_is_better": False, "calls": number}
+        print(f"{name:28s} {ns:12.1f} ns/op")
+    if not names or "env.reset.retained_bytes" in names:
+        results["env.reset.retained_bytes"] = bench_reset_allocations()
+        print(f"{'env.reset.retained_bytes':28s} {results['env.reset.retained_bytes']['value']:12.1f} B/reset")
+    if not names or "e2e.random_games" in names:
+        results["e2e.random_games"] = bench_random_games()
+        print(f"{'e2e.random_games':28s} {results['e2e.random_games']['value']:12.1f} games/s")
+    if not names or "e2e.replay_steps" in names:
+        results["e2e.replay_steps"] = bench_replay_steps()
+        print(f"{'e2e.replay_steps':28s} {results['e2e.replay_steps']['value']:12.1f} steps/s")
+    return {"metadata": machine_metadata(), "results": results}
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Prints a comparison table, returns names of benchmarks that regressed beyond threshold"""
+    regressions = []
+    for name, new in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name:28s} {'(new)':>12s}")
+            continue
+        # Positive change means slower
+        if old["value"] == new["value"]:
+            change = 0.0
+        elif old["value"] == 0 or new["value"] == 0:
+            change = float("inf") if (new["value"] == 0) == new["higher_is_better"] else float("-inf")
+        elif new["higher_is_better"]:
+            change = old["value"] / new["value"] - 1.0
+        else:
+            change = new["value"] / old["value"] - 1.0
+        flag = ""
+        if change > threshold:
+            flag = "REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "faster"
+        print(f"{name:28s} {old['value']:12.1f} -> {new['value']:12.1f} {new['unit']:8s} {change:+7.1%} {flag}")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="GolfEnvironment throughput benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="run benchmarks and write JSON results")
+    run_p.add_argument("--out", default=None, help="JSON output path")
+    run_p.add_argument("--only", nargs="*", default=None, help="benchmark names to run")
+    run_p.add_argument("--min-time", type=float, default=0.2, help="seconds per timing repeat")
+    run_p.add_argument("--repeats", type=int, default=5)
+
+    cmp_p = sub.add_parser("compare", help="compare two result files")
+    cmp_p.add_argument("baseline")
+    cmp_p.add_argument("current")
+    cmp_p.add_argument("--threshold", type=float, default=0.05, help="allowed slowdown fraction")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        report = run_benchmarks(args.only, args.min_time, args.repeats)
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(report, f, indent=2)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
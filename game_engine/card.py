@@ -1,23 +1,48 @@
 from .constants import *
+from typing import List, Tuple
+
+# --- Integer card encoding --- #
+# Rank code: index in ALL_RANKS (A=0 ... K=12, Joker=13)
+# Card code: suit index * 13 + rank code for the 52 standard cards, 52 for the Joker
+NUM_RANK_CODES = len(ALL_RANKS)
+NUM_CARD_CODES = len(SUITS) * len(RANKS) + 1
+JOKER_CODE = NUM_CARD_CODES - 1
+RANK_CODES = {rank: i for i, rank in enumerate(ALL_RANKS)}
+
+# Point value per rank code
+RANK_VALUES: List[int] = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 0, -2]
+
+# Lookup tables per card code
+CARD_RANK: List[str] = [rank for suit in SUITS for rank in RANKS] + [JOKER]
+CARD_SUIT: List[str] = [suit for suit in SUITS for rank in RANKS] + [JOKER_SUIT]
+CARD_RANK_CODE: List[int] = [RANK_CODES[rank] for rank in CARD_RANK]
+CARD_VALUE: List[int] = [RANK_VALUES[r] for r in CARD_RANK_CODE]
+
+
+def card_code(rank: str, suit: str) -> int:
+    """Returns the integer code of a (rank, suit) card"""
+    if rank == JOKER:
+        return JOKER_CODE
+    return SUITS.index(suit) * len(RANKS) + RANKS.index(rank)
+
+
 class Card: 
     """ Represents a single playing card """ 
+    __slots__ = ('rank', 'suit', 'code')
+
     def __init__(self, rank: str, suit: str): 
         self.rank = rank
         self.suit = suit
-        self.is_visible = False
+        self.code = card_code(rank, suit)
+
+    @staticmethod
+    def from_code(code: int) -> 'Card':
+        """ Shared Card view of a card code """
+        return CARDS[code]
 
     def get_value(self): 
         """ Calculates point value of card """ 
-        if self.rank == JOKER: 
-            return -2
-        if self.rank == KING: 
-            return 0
-        if self.rank == ACE: 
-            return 1 
-        if self.rank in [TEN, JACK, QUEEN]: 
-            return 10
-        if self.rank in [NINE,EIGHT,SEVEN,SIX,FIVE,FOUR,THREE,TWO]: 
-            return int(self.rank)
+        return CARD_VALUE[self.code]
 
     def __str__(self) -> str:
         if self.rank == JOKER:
@@ -25,3 +50,6 @@ class Card:
         rank_display = self.rank
         return f"{rank_display}{self.suit}"
 
+
+# Flyweights: one Card per code, shared by every deck and environment
+CARDS: Tuple[Card, ...] = tuple(Card(CARD_RANK[code], CARD_SUIT[code]) for code in range(NUM_CARD_CODES))
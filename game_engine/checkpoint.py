@@ -0,0 +1,277 @@
+import gc
+import struct
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+from .constants import *
+from .card import CARD_RANK_CODE, CARD_VALUE, NUM_RANK_CODES, RANK_VALUES
+from .encoding import HIDDEN_VALUE_SCALE
+from .player import LINES, SLOT_LINE_BITS
+from .snapshot import NO_CARD_BYTE, _HEADER
+from .zobrist import ZOBRIST_FACE_UP, ZOBRIST_FACE_DOWN_RANK, ZOBRIST_FACE_DOWN, ZOBRIST_UNSEEN
+from .environment import GolfEnvironment
+
+# Columnar checkpoints of many environments
+# ---------------------------
+# One uncompressed .npz of fixed-width arrays, row k for environment k: the EnvSnapshot header
+# fields, grids, face_up, the stock and discard stacks (bottom to top, padded with NO_CARD_BYTE
+# past stock_size / discard_size), the round seed and optionally the rest of the random state
+# (reshuffles this round, seed base and rounds dealt, see GolfEnvironment.seed).
+# Saving packs one fixed-width record per environment and reinterprets the joined bytes as a
+# structured array. Loading computes everything derived from the cards (unseen counts, scores,
+# Zobrist keys) for all rows at once and only assigns the results per environment.
+# Nothing is pickled. Fields with "format" and "version" identify the file.
+CHECKPOINT_VERSION = 2 # 2: random state as seeds and counters instead of Mersenne Twister states
+ENVS_FORMAT = "golf_envs"
+VEC_ENV_FORMAT = "golf_vec_env"
+
+_FACE_UP_MASK = (1 << GRID_SIZE) - 1
+_FACE_UP_WEIGHTS = 1 << np.arange(GRID_SIZE, dtype=np.uint16)
+_SEED = struct.Struct("<Q??")
+_RNG = struct.Struct("<IQQ")
+
+# Lookups by card byte, NO_CARD_BYTE padding maps to the spare rank bin NUM_RANK_CODES
+_NO_RANK = NUM_RANK_CODES
+_BYTE_RANK = np.full(256, _NO_RANK, dtype=np.intp)
+_BYTE_RANK[:len(CARD_RANK_CODE)] = CARD_RANK_CODE
+_BYTE_VALUE = np.zeros(256, dtype=np.int64)
+_BYTE_VALUE[:len(CARD_VALUE)] = CARD_VALUE
+_LINE_SLOTS = np.array(LINES)
+_LINE_WEIGHTS = 1 << np.arange(len(LINES))
+_SLOT_LINE_BITS = np.array(SLOT_LINE_BITS)
+_RANK_VALUES = np.array(RANK_VALUES, dtype=np.int64)
+_SEATS = np.arange(2)[:, None]
+_SLOTS = np.arange(GRID_SIZE)
+_Z_UP = np.array(ZOBRIST_FACE_UP, dtype=np.uint64)
+_Z_DOWN_RANK = np.array(ZOBRIST_FACE_DOWN_RANK, dtype=np.uint64)
+_Z_DOWN = np.array(ZOBRIST_FACE_DOWN, dtype=np.uint64)
+_Z_UNSEEN = np.array(ZOBRIST_UNSEEN, dtype=np.uint64)
+
+
+def _record_dtype(total_cards: int, include_rng: bool) -> np.dtype:
+    """Fixed-width record of one environment, laid out like _HEADER then the card stacks"""
+    fields = [
+        ("phase", "u1"), ("current_player", "u1"), ("final_turn_player_idx", "i1"), ("drawn_card", "u1"),
+        ("initial_flips_count", "u1", (2,)), ("turn_count", "<u2"), ("round_over", "?"), ("game_over", "?"),
+        ("scores", "<i2", (2,)), ("face_up_bits", "<u2", (2,)), ("stock_size", "<u2"), ("discard_size", "<u2"),
+        ("grids", "u1", (2, GRID_SIZE)), ("stock", "u1", (total_cards,)), ("discard", "u1", (total_cards,)),
+        ("round_seed", "<u8"), ("has_round_seed", "?"), ("dealt_from_seed", "?"),
+    ]
+    if include_rng:
+        fields += [("reshuffles", "<u4"), ("seed_base", "<u8"), ("rounds_dealt", "<u8")]
+    dtype = np.dtype(fields)
+    assert dtype.fields["grids"][1] == _HEADER.size
+    return dtype
+
+
+def _grid_columns(grids: np.ndarray, face_up: np.ndarray) -> Dict[str, np.ndarray]:
+    """Player state derived from (N, 2, 9) card codes and face up flags, as Player.load computes it"""
+    ranks = _BYTE_RANK[grids]
+    values = _BYTE_VALUE[grids]
+    line_ranks = ranks[..., _LINE_SLOTS]
+    matched = (line_ranks[..., 0] == line_ranks[..., 1]) & (line_ranks[..., 1] == line_ranks[..., 2])
+    visible_matched = matched & face_up[..., _LINE_SLOTS].all(axis=-1)
+    matched_lines = matched @ _LINE_WEIGHTS
+    visible_matched_lines = visible_matched @ _LINE_WEIGHTS
+    slot_score = np.where(matched_lines[..., None] & _SLOT_LINE_BITS, 0, values)
+    slot_visible_score = np.where(face_up & ((visible_matched_lines[..., None] & _SLOT_LINE_BITS) == 0), values, 0)
+    up_keys = _Z_UP[_SEATS, _SLOTS, ranks]
+    return {
+        "ranks": ranks, "matched_lines": matched_lines, "visible_matched_lines": visible_matched_lines,
+        "slot_score": slot_score, "slot_visible_score": slot_visible_score,
+        "score": slot_score.sum(axis=-1), "visible_score": slot_visible_score.sum(axis=-1),
+        "zobrist": np.bitwise_xor.reduce(np.where(face_up, up_keys, _Z_DOWN_RANK[_SEATS, _SLOTS, ranks]), axis=-1),
+        "public_zobrist": np.bitwise_xor.reduce(np.where(face_up, up_keys, _Z_DOWN[_SEATS, _SLOTS]), axis=-1),
+    }
+
+
+def _unseen_columns(columns: Dict[str, np.ndarray], env: GolfEnvironment) -> Dict[str, np.ndarray]:
+    """Unseen counts and their totals, key and features, as GolfEnvironment._recompute_unseen_counts computes them"""
+    n = len(columns["phase"])
+    bins = NUM_RANK_CODES + 1
+    # Seen by everyone: face up grid cards, the whole discard pile and a drawn card unless it came from the stock
+    grid_ranks = np.where(columns["face_up"], _BYTE_RANK[columns["grids"]], _NO_RANK).reshape(n, -1)
+    drawn = np.where(columns["phase"] == PHASE_DRAW_STOCK_DECISION, NO_CARD_BYTE, columns["drawn_card"])
+    seen = np.concatenate([grid_ranks, _BYTE_RANK[columns["discard"]], _BYTE_RANK[drawn][:, None]], axis=1)
+    seen += (np.arange(n) * bins)[:, None]
+    counts = np.asarray(env.rank_composition) - np.bincount(seen.ravel(), minlength=n * bins).reshape(n, bins)[:, :_NO_RANK]
+    total = counts.sum(axis=1)
+    value = counts @ _RANK_VALUES
+    features = np.empty((n, NUM_RANK_CODES + 1), dtype=env._unseen_features.dtype)
+    features[:, :NUM_RANK_CODES] = counts
+    features[:, :NUM_RANK_CODES] *= env._inv_rank_composition
+    features[:, NUM_RANK_CODES] = np.where(total > 0, value / np.maximum(total, 1) / HIDDEN_VALUE_SCALE, 0.0)
+    key = np.bitwise_xor.reduce(_Z_UNSEEN[np.arange(NUM_RANK_CODES), counts], axis=1)
+    return {"counts": counts, "total": total, "value": value, "key": key, "features": features}
+
+
+# --- Files --- #
+
+def write_checkpoint(path, kind: str, arrays: Dict[str, np.ndarray]):
+    """Writes arrays to an uncompressed .npz tagged with kind and CHECKPOINT_VERSION"""
+    np.savez(path, format = np.array(kind), version = np.array(CHECKPOINT_VERSION), **arrays)
+
+def read_checkpoint(path, kind: str, min_version: int = CHECKPOINT_VERSION) -> Dict[str, np.ndarray]:
+    """Arrays of a checkpoint written by write_checkpoint with the same kind (min_version up to CHECKPOINT_VERSION)"""
+    with np.load(path, allow_pickle = False) as data:
+        found = str(data["format"]) if "format" in data.files else None
+        if found != kind:
+            raise ValueError(f"{path} is not a {kind} checkpoint (format {found})")
+        version = int(data["version"])
+        if not min_version <= version <= CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {version}, expected {min_version} to {CHECKPOINT_VERSION}")
+        return {name: data[name] for name in data.files if name not in ("format", "version")}
+
+
+# --- GolfEnvironment lists --- #
+
+def pack_envs(envs: Sequence[GolfEnvironment], include_rng: bool = True) -> Dict[str, np.ndarray]:
+    """Columns (name -> (N, ...) array) holding the full state of two-player environments of one deck configuration
+
+    include_rng also saves each environment's random state, for an exact continuation.
+    """
+    if not envs:
+        raise ValueError("No environments to pack")
+    first = envs[0]
+    total = first.total_cards
+    for env in envs:
+        if env.num_players != 2 or (env.num_decks, env.num_jokers) != (first.num_decks, first.num_jokers):
+            raise ValueError("Checkpointed environments must all be two-player with the same decks and jokers")
+
+    pad = bytes([NO_CARD_BYTE]) * total
+    pack_header, pack_seed, pack_rng = _HEADER.pack, _SEED.pack, _RNG.pack
+    records = []
+    append = records.append
+    for env in envs:
+        p0, p1 = env.players
+        stock, discard = env.deck.cards, env.discard_pile
+        drawn, final_turn, seed = env.drawn_card, env.final_turn_player_idx, env.round_seed
+        flips, scores = env.initial_flips_count, env.scores
+        append(pack_header(
+            env.current_phase, env.current_player,
+            -1 if final_turn is None else final_turn,
+            NO_CARD_BYTE if drawn is None else drawn,
+            flips[0], flips[1], env.turn_count, env.round_over, env.game_over, scores[0], scores[1],
+            _FACE_UP_MASK & ~p0.face_down_mask, _FACE_UP_MASK & ~p1.face_down_mask,
+            len(stock), len(discard),
+        ))
+        append(bytes(p0.grid))
+        append(bytes(p1.grid))
+        append(bytes(stock) + pad[len(stock):])
+        append(bytes(discard) + pad[len(discard):])
+        append(pack_seed(seed or 0, seed is not None, env.dealt_from_seed))
+        if include_rng:
+            append(pack_rng(env._reshuffles, env._seed_base, env._rounds_dealt))
+
+    table = np.frombuffer(b"".join(records), dtype = _record_dtype(total, include_rng))
+    columns = {name: table[name] for name in table.dtype.names if name != "face_up_bits"}
+    columns["face_up"] = (table["face_up_bits"][..., None] & _FACE_UP_WEIGHTS) != 0
+    columns["num_decks"] = np.array(first.num_decks)
+    columns["num_jokers"] = np.array(first.num_jokers)
+    return columns
+
+def unpack_envs(columns: Dict[str, np.ndarray], envs: Sequence[GolfEnvironment]):
+    """Restores columns from pack_envs into existing environments (one row each, same deck configuration)"""
+    n = len(columns["phase"])
+    if len(envs) != n:
+        raise ValueError(f"Checkpoint holds {n} environments, got {len(envs)}")
+    total = columns["stock"].shape[1]
+    for env in envs:
+        if env.total_cards != total:
+            raise ValueError(f"Checkpoint decks have {total} cards, environment has {env.total_cards}")
+    if not n:
+        return
+    # The loop below allocates millions of small lists, cyclic collections during it only rescan the envs
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        _assign_columns(columns, envs)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+def _assign_columns(columns: Dict[str, np.ndarray], envs: Sequence[GolfEnvironment]):
+    include_rng = "reshuffles" in columns
+
+    # Everything derived from the cards, for all rows at once
+    face_up = columns["face_up"]
+    grid = _grid_columns(columns["grids"], face_up)
+    unseen = _unseen_columns(columns, envs[0])
+
+    # Python lists per environment (and per seat), then plain assignments
+    stocks = [row[:size] for row, size in zip(columns["stock"].tolist(), columns["stock_size"].tolist())]
+    discards = [row[:size] for row, size in zip(columns["discard"].tolist(), columns["discard_size"].tolist())]
+    final_turns = [None if seat < 0 else seat for seat in columns["final_turn_player_idx"].tolist()]
+    drawn_cards = [None if card == NO_CARD_BYTE else card for card in columns["drawn_card"].tolist()]
+    round_seeds = [seed if has else None for seed, has in zip(columns["round_seed"].tolist(), columns["has_round_seed"].tolist())]
+    env_rows = zip(
+        envs, columns["phase"].tolist(), columns["current_player"].tolist(), final_turns, drawn_cards,
+        columns["initial_flips_count"].tolist(), columns["turn_count"].tolist(), columns["round_over"].tolist(),
+        columns["game_over"].tolist(), columns["scores"].tolist(), stocks, discards, round_seeds,
+        columns["dealt_from_seed"].tolist(), unseen["counts"].tolist(), unseen["total"].tolist(),
+        unseen["value"].tolist(), unseen["key"].tolist(), unseen["features"],
+    )
+    player_rows = zip(
+        columns["grids"].tolist(), face_up.tolist(), grid["ranks"].tolist(),
+        (_FACE_UP_MASK & ~(face_up @ _FACE_UP_WEIGHTS)).tolist(), grid["zobrist"].tolist(), grid["public_zobrist"].tolist(),
+        grid["matched_lines"].tolist(), grid["visible_matched_lines"].tolist(), grid["slot_score"].tolist(),
+        grid["slot_visible_score"].tolist(), grid["score"].tolist(), grid["visible_score"].tolist(),
+    )
+
+    for (env, phase, current_player, final_turn, drawn, flips, turn_count, round_over, game_over, scores, stock,
+         discard, round_seed, dealt_from_seed, counts, unseen_total, unseen_value, unseen_key, features), player_row \
+            in zip(env_rows, player_rows):
+        env._obs_version += 1
+        env.current_phase = phase
+        env.current_player = current_player
+        env.final_turn_player_idx = final_turn
+        env.drawn_card = drawn
+        env.initial_flips_count[:] = flips
+        env.turn_count = turn_count
+        env.round_over = round_over
+        env.game_over = game_over
+        env.scores[:] = scores
+        env.deck.cards[:] = stock
+        env.discard_pile[:] = discard
+        env.round_seed = round_seed
+        env.dealt_from_seed = dealt_from_seed
+        env._unseen_counts[:] = counts
+        env._unseen_total = unseen_total
+        env._unseen_value = unseen_value
+        env._unseen_key = unseen_key
+        env._unseen_features[:] = features
+
+        # Same state as Player.load
+        for (player, grid_codes, up, ranks, face_down_mask, zobrist, public_zobrist, matched, visible_matched,
+             slot_score, slot_visible_score, score, visible_score) in zip(env.players, *player_row):
+            player.grid[:] = grid_codes
+            player.face_up[:] = up
+            player._ranks[:] = ranks
+            player.face_down_mask = face_down_mask
+            player.zobrist = zobrist
+            player.public_zobrist = public_zobrist
+            player.matched_lines = matched
+            player.visible_matched_lines = visible_matched
+            player._slot_score[:] = slot_score
+            player._slot_visible_score[:] = slot_visible_score
+            player.score = score
+            player.visible_score = visible_score
+
+    if include_rng:
+        for env, reshuffles, seed_base, rounds_dealt in zip(envs, columns["reshuffles"].tolist(),
+                                                           columns["seed_base"].tolist(), columns["rounds_dealt"].tolist()):
+            env._reshuffles = reshuffles
+            env._seed_base = seed_base
+            env._rounds_dealt = rounds_dealt
+
+def save_envs(path, envs: Sequence[GolfEnvironment], include_rng: bool = True):
+    """Checkpoints environments to one .npz (see pack_envs)"""
+    write_checkpoint(path, ENVS_FORMAT, pack_envs(envs, include_rng))
+
+def load_envs(path, envs: Optional[Sequence[GolfEnvironment]] = None, **env_kwargs) -> List[GolfEnvironment]:
+    """Restores a save_envs checkpoint into envs, or into new GolfEnvironments built with env_kwargs"""
+    columns = read_checkpoint(path, ENVS_FORMAT)
+    if envs is None:
+        decks = {"num_decks": int(columns["num_decks"]), "num_jokers": int(columns["num_jokers"])}
+        envs = [GolfEnvironment(**decks, **env_kwargs) for _ in range(len(columns["phase"]))]
+    unpack_envs(columns, envs)
+    return list(envs)
@@ -38,3 +38,12 @@ PHASE_DRAW_STOCK_DECISION = 2 # Player drew from stock, either REPLACE card in G
 PHASE_DRAW_DISCARD_DECISION = 3 # Player drew from discard pile, must REPLACE card in Grid 
 PHASE_MUST_FLIP_CARD = 4 # Player chose to discard drawn card, must now flip 
 PHASE_GAME_OVER = 5 # Round over 
+
+# Action ids (decoded by encoding.ACTION_DECODE, dispatched through encoding.STEP_HANDLERS)
+ACTION_INITIAL_FLIP = 0 # 0-8: Flip initial cards
+ACTION_DRAW_STOCK = 9 # Draw from stock pile
+ACTION_DRAW_DISCARD = 10 # Draw from discard pile
+ACTION_REPLACE = 11 # 11-19: Replace card in grid
+ACTION_DISCARD_DRAWN = 20 # Discard drawn card
+ACTION_FLIP = 21 # 21-29: Flip card in grid
+NUM_ACTIONS = ACTION_FLIP + GRID_SIZE
@@ -1,42 +1,67 @@
 from .constants import *
-from .card import Card
+from .card import Card, CARDS, JOKER_CODE, NUM_RANK_CODES, CARD_RANK_CODE, card_code
 import random 
-from typing import List
+from typing import List, Dict, Tuple, Optional
+
+# Card codes in build order, shared by every Deck with the same composition
+_DECK_TEMPLATES: Dict[Tuple[int, int], Tuple[int, ...]] = {}
+
+def deck_template(num_decks: int, num_jokers: int) -> Tuple[int, ...]:
+    """ Card codes of a fresh, unshuffled deck """
+    key = (num_decks, num_jokers)
+    if key not in _DECK_TEMPLATES:
+        codes = []
+        for _ in range(num_decks): 
+            for suit in SUITS:
+                for rank in RANKS:
+                    codes.append(card_code(rank, suit))
+        codes.extend([JOKER_CODE] * num_jokers)
+        _DECK_TEMPLATES[key] = tuple(codes)
+    return _DECK_TEMPLATES[key]
+
+def rank_composition(num_decks: int, num_jokers: int) -> Tuple[int, ...]:
+    """ Number of cards of each rank code in a fresh deck """
+    counts = [0] * NUM_RANK_CODES
+    for code in deck_template(num_decks, num_jokers):
+        counts[CARD_RANK_CODE[code]] += 1
+    return tuple(counts)
 
 class Deck: 
     """ Deck of cards used in the game """ 
 
-    def __init__(self,num_decks: int = 2, num_jokers: int = 4): 
-        self.cards: List[Card] = []
+    def __init__(self,num_decks: int = 2, num_jokers: int = 4, rng: Optional[random.Random] = None): 
+        self.cards: List[int] = [] # Card codes, top of the stock is the end of the list
         self.num_decks = num_decks 
         self.num_jokers = num_jokers
+        self.rng = rng if rng is not None else random.Random() # Own generator, never the global random state
         self._build()
 
     def _build(self):
         """ Build the deck """ 
-        for _ in range(self.num_decks): 
-            for suit in SUITS:
-                for rank in RANKS:
-                    self.cards.append(Card(rank,suit))
+        self.cards[:] = deck_template(self.num_decks, self.num_jokers)
 
-        for _ in range(self.num_jokers):
-            self.cards.append(Card(JOKER,JOKER_SUIT))
+    def reset(self): 
+        """ Restore the full, unshuffled deck in place """ 
+        self._build()
 
     def shuffle(self): 
         """ Shuffle the deck """ 
-        random.shuffle(self.cards)
+        self.rng.shuffle(self.cards)
 
     def is_empty(self): 
         """ Check if deck is empty """ 
         return len(self.cards) == 0
 
-    def deal(self): 
-        """ Deal a card """ 
+    def deal(self) -> Optional[int]: 
+        """ Deal a card code """ 
         if not self.is_empty(): 
             return self.cards.pop()
         return None
         
-    def add_cards(self, cards: List[Card]): 
-        """Adds a list of cards to the deck"""
+    def add_cards(self, cards: List[int]): 
+        """Adds a list of card codes to the deck"""
         self.cards.extend(cards)
-        
\ No newline at end of file
+
+    def view(self) -> List[Card]: 
+        """ Card views of the stock, bottom to top """ 
+        return [CARDS[code] for code in self.cards]
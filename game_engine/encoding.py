@@ -0,0 +1,147 @@
+import numpy as np
+from typing import Sequence, Optional, List, Tuple
+from .constants import *
+from .card import NUM_RANK_CODES
+
+NUM_PHASES = PHASE_GAME_OVER + 1
+
+# Observation layout (float32, observing seat's point of view)
+# ---------------------------
+# [0, 126):   Own grid, one-hot rank code per slot (zeros if face down)
+# [126, 135): Own grid face-up mask
+# [135, 261): Opponent grid, one-hot rank code per slot (zeros if face down)
+# [261, 270): Opponent grid face-up mask
+# [270, 284): Discard top, one-hot rank code (zeros if empty)
+# [284, 298): Drawn card, one-hot rank code (zeros if none)
+# [298, 304): Phase, one-hot
+# 304:        Deck size / total cards
+# 305:        Is final turn flag (this seat is taking the final turn)
+# [306, 320): Unseen cards per rank code / cards of that rank in the deck
+# 320:        Expected value of an unseen (face-down or stock) card / 10
+OBS_OWN_RANKS = 0
+OBS_OWN_UP = OBS_OWN_RANKS + GRID_SIZE * NUM_RANK_CODES
+OBS_OPP_RANKS = OBS_OWN_UP + GRID_SIZE
+OBS_OPP_UP = OBS_OPP_RANKS + GRID_SIZE * NUM_RANK_CODES
+OBS_DISCARD = OBS_OPP_UP + GRID_SIZE
+OBS_DRAWN = OBS_DISCARD + NUM_RANK_CODES
+OBS_PHASE = OBS_DRAWN + NUM_RANK_CODES
+OBS_DECK_SIZE = OBS_PHASE + NUM_PHASES
+OBS_FINAL_TURN = OBS_DECK_SIZE + 1
+OBS_UNSEEN = OBS_FINAL_TURN + 1
+OBS_HIDDEN_VALUE = OBS_UNSEEN + NUM_RANK_CODES
+OBS_DIM = OBS_HIDDEN_VALUE + 1
+OBS_DTYPE = np.float32
+HIDDEN_VALUE_SCALE = 10.0
+
+
+def inverse_counts(counts) -> np.ndarray:
+    """1 / count per rank code (0 for ranks not in the deck), scales unseen counts to fractions"""
+    counts = np.asarray(counts, dtype=np.float64)
+    return np.divide(1.0, counts, out=np.zeros_like(counts), where=counts > 0)
+
+
+def observation_buffer(num_obs: Optional[int] = None) -> np.ndarray:
+    """Allocates a zeroed observation buffer, (OBS_DIM,) or (num_obs, OBS_DIM)"""
+    shape = (OBS_DIM,) if num_obs is None else (num_obs, OBS_DIM)
+    return np.zeros(shape, dtype=OBS_DTYPE)
+
+
+def encode_observations(envs: Sequence, player_ids: Optional[Sequence[int]] = None,
+                        out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Encodes one observation per GolfEnvironment into an (N, OBS_DIM) buffer
+
+    player_ids defaults to each environment's current player.
+    """
+    if out is None:
+        out = observation_buffer(len(envs))
+    for i, env in enumerate(envs):
+        player_id = env.current_player if player_ids is None else player_ids[i]
+        env.encode_observation(player_id, out=out[i])
+    return out
+
+
+# --- Legal action masks --- #
+# Bit a of a mask is set when action id a is legal. Each phase has a constant mask,
+# the flip phases OR in the player's face down slots shifted to their action ids.
+def _bits(action_ids) -> int:
+    return sum(1 << a for a in action_ids)
+
+PHASE_ACTION_MASKS: List[int] = [0] * NUM_PHASES
+PHASE_ACTION_MASKS[PHASE_START_TURN] = _bits([ACTION_DRAW_STOCK, ACTION_DRAW_DISCARD])
+PHASE_ACTION_MASKS[PHASE_DRAW_STOCK_DECISION] = _bits(range(ACTION_REPLACE, ACTION_DISCARD_DRAWN + 1))
+PHASE_ACTION_MASKS[PHASE_DRAW_DISCARD_DECISION] = _bits(range(ACTION_REPLACE, ACTION_REPLACE + GRID_SIZE))
+
+# Action id of slot 0 for phases whose legal actions are the face down slots
+PHASE_FLIP_OFFSET: List[Optional[int]] = [None] * NUM_PHASES
+PHASE_FLIP_OFFSET[PHASE_INITIAL_FLIP] = ACTION_INITIAL_FLIP
+PHASE_FLIP_OFFSET[PHASE_MUST_FLIP_CARD] = ACTION_FLIP
+
+DRAW_STOCK_BIT = 1 << ACTION_DRAW_STOCK
+DRAW_DISCARD_BIT = 1 << ACTION_DRAW_DISCARD
+
+# Same per-phase masks as (NUM_PHASES, NUM_ACTIONS) bool rows
+PHASE_ACTION_MASK_TABLE = np.array(
+    [[(m >> a) & 1 for a in range(NUM_ACTIONS)] for m in PHASE_ACTION_MASKS], dtype=bool
+)
+_ACTION_SHIFTS = np.arange(NUM_ACTIONS, dtype=np.uint32)
+
+
+def mask_to_array(masks, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Expands int bitmask(s) into (..., NUM_ACTIONS) bool arrays"""
+    masks = np.asarray(masks, dtype=np.uint32)
+    bits = (masks[..., None] >> _ACTION_SHIFTS) & 1
+    if out is None:
+        return bits.astype(bool)
+    out[...] = bits
+    return out
+
+
+def legal_action_masks(envs: Sequence, player_ids: Optional[Sequence[int]] = None,
+                       out: Optional[np.ndarray] = None) -> np.ndarray:
+    """(N, NUM_ACTIONS) bool legal masks, one per GolfEnvironment
+
+    player_ids defaults to each environment's current player.
+    """
+    if player_ids is None:
+        masks = [env.legal_action_mask(env.current_player) for env in envs]
+    else:
+        masks = [env.legal_action_mask(p) for env, p in zip(envs, player_ids)]
+    return mask_to_array(masks, out=out)
+
+
+# --- Transition table --- #
+# STEP_HANDLERS[phase][action_id] is the GolfEnvironment step handler for the action in that
+# phase, HANDLER_ILLEGAL where the phase never allows it (built from the phase masks above).
+# ACTION_SLOTS[action_id] is the grid slot an action acts on (-1 for pile actions).
+(HANDLER_ILLEGAL, HANDLER_INITIAL_FLIP, HANDLER_DRAW_STOCK, HANDLER_DRAW_DISCARD, HANDLER_REPLACE_STOCK,
+ HANDLER_DISCARD_DRAWN, HANDLER_REPLACE_DISCARD, HANDLER_FLIP) = range(8)
+NUM_HANDLERS = HANDLER_FLIP + 1
+
+# Handlers legal only while a grid slot is face down, the rest depend only on the piles or nothing
+SLOT_HANDLERS = (HANDLER_INITIAL_FLIP, HANDLER_FLIP)
+
+# Decoded (type, slot) per action id, as in GolfEnvironment._get_action_from_id
+ACTION_DECODE: List[Tuple[str, Optional[int]]] = (
+    [("Initial_Flip", i) for i in range(GRID_SIZE)]
+    + [("DRAW_STOCK", None), ("DRAW_DISCARD", None)]
+    + [("REPLACE", i) for i in range(GRID_SIZE)]
+    + [("DISCARD_DRAWN", None)]
+    + [("FLIP", i) for i in range(GRID_SIZE)]
+)
+ACTION_SLOTS: List[int] = [-1 if slot is None else slot for _, slot in ACTION_DECODE]
+
+def _phase_handler(phase: int, action_id: int) -> int:
+    static = PHASE_ACTION_MASKS[phase]
+    if PHASE_FLIP_OFFSET[phase] is not None:
+        static |= ((1 << GRID_SIZE) - 1) << PHASE_FLIP_OFFSET[phase]
+    if not (static >> action_id) & 1:
+        return HANDLER_ILLEGAL
+    action_type = ACTION_DECODE[action_id][0]
+    if action_type == "Initial_Flip": return HANDLER_INITIAL_FLIP
+    if action_type == "DRAW_STOCK": return HANDLER_DRAW_STOCK
+    if action_type == "DRAW_DISCARD": return HANDLER_DRAW_DISCARD
+    if action_type == "DISCARD_DRAWN": return HANDLER_DISCARD_DRAWN
+    if action_type == "FLIP": return HANDLER_FLIP
+    return HANDLER_REPLACE_STOCK if phase == PHASE_DRAW_STOCK_DECISION else HANDLER_REPLACE_DISCARD
+
+STEP_HANDLERS: List[List[int]] = [[_phase_handler(phase, a) for a in range(NUM_ACTIONS)] for phase in range(NUM_PHASES)]
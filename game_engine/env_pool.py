@@ -0,0 +1,292 @@
+import traceback
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from typing import Tuple, Dict, Any, Optional, List
+from .constants import *
+from .encoding import *
+from .environment import GolfEnvironment
+from .stats import EnvStats
+from .checkpoint import ENVS_FORMAT, pack_envs, unpack_envs, write_checkpoint, read_checkpoint
+
+# Shared arrays exchanged with the workers: name -> (shape after num_envs, dtype)
+_SHARED_FIELDS: Dict[str, Tuple[Tuple[int, ...], Any]] = {
+    "actions": ((), np.int64),
+    "obs": ((OBS_DIM,), OBS_DTYPE),
+    "masks": ((NUM_ACTIONS,), bool),
+    "rewards": ((), np.float32),
+    "dones": ((), bool),
+    "players": ((), np.int8), # Seat each observation belongs to (the current player)
+    "final_scores": ((2,), np.int16), # Scores of the round that just ended (valid where dones)
+    "final_obs": ((OBS_DIM,), OBS_DTYPE), # Acting player's last observation of that round (valid where dones)
+}
+
+_CMD_RESET = "reset"
+_CMD_STEP = "step"
+_CMD_STATS = "stats"
+_CMD_PACK = "pack"
+_CMD_UNPACK = "unpack"
+_CMD_CLOSE = "close"
+
+
+def _shared_views(blocks: Dict[str, shared_memory.SharedMemory], num_envs: int) -> Dict[str, np.ndarray]:
+    """NumPy views over the shared memory blocks"""
+    return {
+        name: np.ndarray((num_envs,) + shape, dtype=dtype, buffer=blocks[name].buf)
+        for name, (shape, dtype) in _SHARED_FIELDS.items()
+    }
+
+
+def _write_slot(env: GolfEnvironment, i: int, arrays: Dict[str, np.ndarray]):
+    """Encodes the current player's observation and legal mask into slot i"""
+    player_id = env.current_player
+    env.encode_observation(player_id, out=arrays["obs"][i])
+    env.legal_action_mask_array(player_id, out=arrays["masks"][i])
+    arrays["players"][i] = player_id
+
+
+def env_seeds(seed: Optional[int], num_envs: int) -> List[Optional[int]]:
+    """Independent per-environment seeds derived from one seed (all None without a seed)"""
+    if seed is None:
+        return [None] * num_envs
+    return np.random.SeedSequence(seed).generate_state(num_envs, dtype=np.uint64).tolist()
+
+
+def _worker(conn, lo: int, hi: int, block_names: Dict[str, str], num_envs: int,
+            env_kwargs: Dict[str, Any], seeds: List[Optional[int]]):
+    """Worker loop: owns envs [lo, hi) and serves commands from the parent over conn"""
+    blocks = {name: shared_memory.SharedMemory(name=block_name) for name, block_name in block_names.items()}
+    arrays = _shared_views(blocks, num_envs)
+    envs = [GolfEnvironment(seed=seed, **env_kwargs) for seed in seeds]
+    actions, rewards, dones, final_scores = arrays["actions"], arrays["rewards"], arrays["dones"], arrays["final_scores"]
+
+    try:
+        while True:
+            cmd, arg = conn.recv()
+            try:
+                if cmd == _CMD_STEP:
+                    for i, env in zip(range(lo, hi), envs):
+                        acting = env.current_player
+                        _, _, reward, done, info = env.step(int(actions[i]))
+                        rewards[i] = reward
+                        dones[i] = done
+                        if done:
+                            # Autoreset: the slot now holds the first observation of the next round
+                            final_scores[i] = info['final_scores']
+                            env.encode_observation(acting, out=arrays["final_obs"][i])
+                            env.reset()
+                        _write_slot(env, i, arrays)
+                elif cmd == _CMD_RESET:
+                    for i, env in zip(range(lo, hi), envs):
+                        if arg is not None:
+                            env.seed(arg[i - lo])
+                        env.reset()
+                        rewards[i] = 0
+                        dones[i] = False
+                        _write_slot(env, i, arrays)
+                elif cmd == _CMD_STATS:
+                    conn.send(EnvStats.merged(env.stats() for env in envs))
+                    continue
+                elif cmd == _CMD_PACK:
+                    conn.send(pack_envs(envs, include_rng=arg))
+                    continue
+                elif cmd == _CMD_UNPACK:
+                    unpack_envs(arg, envs)
+                    for i, env in zip(range(lo, hi), envs):
+                        rewards[i] = 0
+                        dones[i] = False
+                        _write_slot(env, i, arrays)
+                elif cmd == _CMD_CLOSE:
+                    conn.send(None)
+                    break
+                conn.send(None)
+            except Exception:
+                conn.send(traceback.format_exc())
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del arrays, actions, rewards, dones, final_scores
+        for block in blocks.values():
+            block.close()
+        conn.close()
+
+
+class SubprocGolfEnvPool:
+    """GolfEnvironments split across worker processes, stepped through shared memory arrays
+
+    Observations, masks, rewards and dones are returned as views of the shared arrays
+    and are overwritten by the next step; copy them to keep them.
+    """
+
+    def __init__(self, num_envs: int, num_workers: Optional[int] = None, seed: Optional[int] = None,
+                 env_kwargs: Optional[Dict[str, Any]] = None, start_method: Optional[str] = None):
+
+        # Handle args
+        self.num_envs = num_envs
+        self.num_workers = min(num_workers or mp.cpu_count(), num_envs)
+        # Workers encode observations straight into shared memory, step does not need to build them
+        self.env_kwargs = {"obs_type": "none", **(env_kwargs or {})}
+        self.observation_size = OBS_DIM
+        self.action_space_size = NUM_ACTIONS
+        self.closed = False
+        self._waiting = False
+
+        # --- Shared memory --- #
+        self._blocks: Dict[str, shared_memory.SharedMemory] = {}
+        for name, (shape, dtype) in _SHARED_FIELDS.items():
+            size = max(1, num_envs * int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize)
+            self._blocks[name] = shared_memory.SharedMemory(create=True, size=size)
+        self._arrays = _shared_views(self._blocks, num_envs)
+        block_names = {name: block.name for name, block in self._blocks.items()}
+
+        # --- Workers --- #
+        # Contiguous slices of envs per worker
+        ctx = mp.get_context(start_method)
+        bounds = np.linspace(0, num_envs, self.num_workers + 1).astype(int)
+        self._bounds = bounds
+        self._conns = []
+        self._procs: List[mp.Process] = []
+        seeds = env_seeds(seed, num_envs)
+        for w in range(self.num_workers):
+            parent_conn, child_conn = ctx.Pipe()
+            proc = ctx.Process(
+                target=_worker,
+                args=(child_conn, bounds[w], bounds[w + 1], block_names, num_envs, self.env_kwargs,
+                      seeds[bounds[w]:bounds[w + 1]]),
+                daemon=True,
+            )
+            proc.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._procs.append(proc)
+
+    @property
+    def current_players(self) -> np.ndarray:
+        """Seat each current observation belongs to (shared array)"""
+        return self._arrays["players"]
+
+    @property
+    def masks(self) -> np.ndarray:
+        """Current legal masks (shared array)"""
+        return self._arrays["masks"]
+
+    # --- Commands --- #
+
+    def _send(self, cmd: str, args: Optional[List[Any]] = None):
+        for w, conn in enumerate(self._conns):
+            conn.send((cmd, None if args is None else args[w]))
+
+    def _wait(self):
+        errors = [err for err in (conn.recv() for conn in self._conns) if err is not None]
+        if errors:
+            raise RuntimeError("Worker failed:\n" + errors[0])
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Reset every environment (reseeding them from seed if given), returns observations and legal masks"""
+        args = None
+        if seed is not None:
+            seeds = env_seeds(seed, self.num_envs)
+            args = [seeds[self._bounds[w]:self._bounds[w + 1]] for w in range(self.num_workers)]
+        self._send(_CMD_RESET, args)
+        self._wait()
+        return self._arrays["obs"], self._arrays["masks"]
+
+    def step_async(self, actions: np.ndarray):
+        """Send one action per environment to the workers without waiting"""
+        if self._waiting:
+            raise RuntimeError("step_async called twice without step_wait")
+        self._arrays["actions"][:] = actions
+        self._send(_CMD_STEP)
+        self._waiting = True
+
+    def step_wait(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        """Wait for the step sent by step_async, returns obs, rewards, dones, masks, info
+
+        Finished environments are reset automatically: their obs/masks belong to the next round
+        and info['final_scores'] / info['final_obs'] hold the scores of the round that ended and
+        the acting player's last observation of it.
+        """
+        self._waiting = False
+        self._wait()
+        a = self._arrays
+        info = {"players": a["players"], "final_scores": a["final_scores"], "final_obs": a["final_obs"]}
+        return a["obs"], a["rewards"], a["dones"], a["masks"], info
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        """Step every environment with one action each"""
+        self.step_async(actions)
+        return self.step_wait()
+
+    def stats(self) -> EnvStats:
+        """Timing counters of every environment merged (needs env_kwargs={"profile": True})"""
+        if self._waiting:
+            raise RuntimeError("stats called between step_async and step_wait")
+        self._send(_CMD_STATS)
+        replies = [conn.recv() for conn in self._conns]
+        errors = [reply for reply in replies if isinstance(reply, str)]
+        if errors:
+            raise RuntimeError("Worker failed:\n" + errors[0])
+        return EnvStats.merged(replies)
+
+    # --- Checkpoints --- #
+
+    def save_checkpoint(self, path, include_rng: bool = True):
+        """Writes every environment to one columnar .npz (see checkpoint.py), each worker packs its slice"""
+        if self._waiting:
+            raise RuntimeError("save_checkpoint called between step_async and step_wait")
+        self._send(_CMD_PACK, [include_rng] * self.num_workers)
+        replies = [conn.recv() for conn in self._conns]
+        errors = [reply for reply in replies if isinstance(reply, str)]
+        if errors:
+            raise RuntimeError("Worker failed:\n" + errors[0])
+        columns = {name: np.concatenate([reply[name] for reply in replies]) if column.ndim else column
+                   for name, column in replies[0].items()}
+        write_checkpoint(path, ENVS_FORMAT, columns)
+
+    def load_checkpoint(self, path) -> Tuple[np.ndarray, np.ndarray]:
+        """Restores a checkpoint of as many environments (save_checkpoint or checkpoint.save_envs), returns observations and legal masks"""
+        if self._waiting:
+            raise RuntimeError("load_checkpoint called between step_async and step_wait")
+        columns = read_checkpoint(path, ENVS_FORMAT)
+        n = len(columns["phase"])
+        if n != self.num_envs:
+            raise ValueError(f"Checkpoint holds {n} environments, the pool has {self.num_envs}")
+        bounds = self._bounds
+        args = [{name: column[bounds[w]:bounds[w + 1]] if column.ndim else column for name, column in columns.items()}
+                for w in range(self.num_workers)]
+        self._send(_CMD_UNPACK, args)
+        self._wait()
+        return self._arrays["obs"], self._arrays["masks"]
+
+    def close(self):
+        """Stop the workers and release the shared memory"""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if self._waiting:
+                self._wait()
+            self._send(_CMD_CLOSE)
+            self._wait()
+        except (BrokenPipeError, EOFError, OSError):
+            pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        for conn in self._conns:
+            conn.close()
+        self._arrays = {}
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+
+    def __enter__(self) -> "SubprocGolfEnvPool":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close()
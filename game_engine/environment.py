@@ -1,36 +1,80 @@
 import random
-from typing import List, Tuple, Dict, Any, Optional
-from .card import Card
-from .deck import Deck
+import numpy as np
+from operator import mul
+from typing import List, Tuple, Dict, Any, Optional, Union, Sequence, Callable
+from .card import Card, CARDS, CARD_RANK, CARD_SUIT, CARD_RANK_CODE, CARD_VALUE, RANK_VALUES
+from .deck import Deck, rank_composition
 from .player import Player
 from .constants import *
+from .encoding import *
+from .events import *
+from .snapshot import EnvSnapshot, snapshot_env, restore_env
+from .obs_view import ObservationView
+from .zobrist import *
+from .stats import EnvStats, instrument, uninstrument, PROFILED_METHODS
 
 # To-do: Finish adding type hints 
 
+# Encoded array by default, nested dict with obs_type="dict", lazily built dict-like view with
+# obs_type="lazy" (only the seats and fields that are read), None with obs_type="none" (search/rollouts)
+Observation = Union[np.ndarray, Dict[str, Any], ObservationView, None]
+OBS_TYPES = ("array", "dict", "lazy", "none")
+_MASK64 = (1 << 64) - 1
+
 class GolfEnvironment: 
     """Handle Golf Environment"""
     
-    def __init__(self, num_players: int = 2, num_decks: int = 2, num_jokers: int = 4):
+    def __init__(self, num_players: int = 2, num_decks: int = 2, num_jokers: int = 4, obs_type: str = "array",
+                 validate_actions: bool = False, seed: Optional[int] = None, obs_fields: Optional[Sequence[str]] = None,
+                 profile: bool = False):
         
         # Handle args 
         self.num_players = num_players 
         self.num_decks = num_decks
         self.num_jokers = num_jokers
+        if obs_type not in OBS_TYPES: 
+            raise ValueError(f"Unknown obs_type {obs_type}, expected one of {OBS_TYPES}")
+        self.obs_type = obs_type
+        self.validate_actions = validate_actions # Raise on illegal actions in step
+        
+        # --- Random state --- #
+        # Round k's seed is a hash of the environment seed and k, the deal shuffles rng seeded with it and
+        # reshuffle j of the round reseeds rng from (round seed, j). A round can be replayed from its seed
+        # and actions alone (replay.py) and the random state is four integers (snapshot.py, checkpoint.py)
+        self.rng = random.Random()
+        self.round_seed: Optional[int] = None
+        self.dealt_from_seed = False
+        self._reshuffles = 0 # Reshuffles in the current round
+        self.seed(seed)
         
         # --- Game setup --- #
         # Deck
-        self.deck = Deck(self.num_decks, self.num_jokers)
-        self.discard_pile: List[Card] = []
-        self.drawn_card: Optional[Card] = None
+        self.deck = Deck(self.num_decks, self.num_jokers, rng = self.rng)
+        self.total_cards = len(self.deck.cards)
+        self.discard_pile: List[int] = [] # Card codes
+        self.drawn_card: Optional[int] = None # Card code
+        
+        # Card counting: cards of each rank code whose location is unknown to everyone (face down or in
+        # the stock, seen discards stay seen). A player's own view also excludes a card they drew from the stock
+        self.rank_composition = rank_composition(self.num_decks, self.num_jokers)
+        self._inv_rank_composition = inverse_counts(self.rank_composition).astype(OBS_DTYPE)
+        self._composition_value = sum(c * v for c, v in zip(self.rank_composition, RANK_VALUES))
+        self._unseen_counts: List[int] = list(self.rank_composition)
+        self._unseen_total = 0 # Running number and point value of the unseen cards
+        self._unseen_value = 0
+        # Encoded features: fraction unseen per rank, expected value / HIDDEN_VALUE_SCALE
+        self._unseen_features = np.zeros(NUM_RANK_CODES + 1, dtype=OBS_DTYPE)
+        self._unseen_key = 0 # Zobrist keys of the unseen counts
+        self._reset_unseen_counts()
         
         # Players
-        self.players: List[Player] = [Player() for _ in range(self.num_players)]
+        self.players: List[Player] = [Player(p) for p in range(self.num_players)]
         self.current_player: int = 0
         self.turn_count: int = 0
         self.final_turn_player_idx: Optional[int] = None
         
         # Round keeping 
-        self.initial_flips_count: List[int] = [0,0]
+        self.initial_flips_count: List[int] = [0] * self.num_players
         self.round_over: bool = False
         self.game_over: bool = False 
         self.scores: List[int] = [0] * self.num_players 
@@ -39,11 +83,221 @@ class GolfEnvironment:
         # Action map 
         self._action_map: Dict[int, Tuple[str, Optional[int]]] = self._create_action_map()
         self.action_space_size = len(self._action_map)
+        
+        # Observation buffers returned by step/reset when obs_type="array" (overwritten every call)
+        self.observation_size = OBS_DIM
+        self._obs_buffers = observation_buffer(self.num_players)
+        
+        # Dict observations: obs_fields limits the keys of "dict" and "lazy" observations, the views
+        # returned by step/reset with obs_type="lazy" are reused and drop their cache when _obs_version changes
+        self.obs_fields: Optional[Tuple[str, ...]] = None if obs_fields is None else tuple(obs_fields)
+        self._obs_version = 0
+        self._obs_views = tuple(ObservationView(self, p, self.obs_fields) for p in range(self.num_players))
+        
+        # Event listeners, nothing is built or emitted while empty 
+        self._listeners: List[Listener] = []
+        
+        # Timing counters, off unless profile (see stats.py) 
+        self._stats: Optional[EnvStats] = None
+        if profile: 
+            self.enable_stats()
+    
+    def subscribe(self, listener: Listener) -> Listener: 
+        """Registers a callable that receives every event (see events.py)"""
+        self._listeners.append(listener)
+        return listener
+    
+    def unsubscribe(self, listener: Listener): 
+        """Removes a registered listener"""
+        self._listeners.remove(listener)
+    
+    def _emit(self, event: Event): 
+        for listener in self._listeners: 
+            listener(event)
+    
+    # --- Stats --- #
+    
+    def enable_stats(self) -> EnvStats: 
+        """Starts timing the hot methods into a new EnvStats
+
+        Pickled environments keep timing into their (copied) stats, clone() starts without stats.
+        """
+        self.disable_stats()
+        self._stats = EnvStats()
+        instrument(self, self._stats)
+        return self._stats
+    
+    def disable_stats(self): 
+        """Stops timing, the methods run unwrapped again"""
+        if self._stats is not None: 
+            uninstrument(self)
+            self._stats = None
+    
+    def stats(self) -> EnvStats: 
+        """Counters collected since enable_stats (merge across envs with EnvStats.merged or sum)"""
+        if self._stats is None: 
+            raise RuntimeError("Stats are off, create the environment with profile=True or call enable_stats()")
+        return self._stats
+    
+    def __getstate__(self) -> Dict[str, Any]: 
+        # Timing wrappers are closures, __setstate__ rebuilds them around the unpickled stats
+        state = self.__dict__.copy()
+        for name in PROFILED_METHODS: 
+            state.pop(name, None)
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]): 
+        self.__dict__.update(state)
+        if self._stats is not None: 
+            instrument(self, self._stats)
+    
+    def seed(self, seed: Optional[int] = None): 
+        """Reseeds the environment, the round seeds of following resets are drawn from it"""
+        self._seed_base = random.Random(seed).getrandbits(64)
+        self._rounds_dealt = 0 # Round seeds drawn since seeding
+    
+    def _next_round_seed(self) -> int: 
+        """Next 63-bit round seed of the environment seed (SplitMix64 of the round number)"""
+        self._rounds_dealt += 1
+        x = (self._seed_base + self._rounds_dealt * 0x9E3779B97F4A7C15) & _MASK64
+        x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+        return (x ^ (x >> 31)) >> 1
+    
+    def snapshot(self, include_rng: bool = False) -> EnvSnapshot: 
+        """Compact immutable copy of the game state (include_rng also saves the environment's random state)"""
+        return snapshot_env(self, include_rng)
+    
+    def restore(self, state: EnvSnapshot): 
+        """Loads a snapshot into this environment"""
+        self._obs_version += 1
+        restore_env(self, state)
+    
+    def clone(self) -> 'GolfEnvironment': 
+        """Independent copy of this environment (without listeners)"""
+        env = GolfEnvironment(self.num_players, self.num_decks, self.num_jokers, self.obs_type, self.validate_actions,
+                              obs_fields = self.obs_fields)
+        env.restore(self.snapshot(include_rng = True))
+        return env
+    
+    # --- Card counting --- #
+    
+    def _count_unseen(self, card: int, delta: int): 
+        """Adds delta cards like card to the unseen counts"""
+        rank = CARD_RANK_CODE[card]
+        old = self._unseen_counts[rank]
+        count = old + delta
+        self._unseen_counts[rank] = count
+        self._unseen_key ^= ZOBRIST_UNSEEN[rank][old] ^ ZOBRIST_UNSEEN[rank][count]
+        self._unseen_total += delta
+        self._unseen_value += delta * CARD_VALUE[card]
+        features = self._unseen_features
+        features[rank] = count * self._inv_rank_composition[rank]
+        features[NUM_RANK_CODES] = self._expected_value(self._unseen_value, self._unseen_total)
+    
+    def _reveal(self, card: int): 
+        """Card became visible to every player"""
+        self._count_unseen(card, -1)
+    
+    def _hide(self, card: int): 
+        """Seen card went back to an unknown position (reshuffled into the stock)"""
+        self._count_unseen(card, 1)
+    
+    def _reset_unseen_counts(self): 
+        """Nothing seen yet"""
+        self._unseen_counts[:] = self.rank_composition
+        self._sync_unseen_totals()
+    
+    def _recompute_unseen_counts(self): 
+        """Rebuilds the unseen counts from the current state (after restore)"""
+        # Cards visible to everyone: face up grid cards, the whole discard pile and a card drawn from it
+        counts = self._unseen_counts
+        counts[:] = self.rank_composition
+        for player in self.players: 
+            grid = player.grid
+            for i in range(GRID_SIZE): 
+                if player.face_up[i]: 
+                    counts[CARD_RANK_CODE[grid[i]]] -= 1
+        for card in self.discard_pile: 
+            counts[CARD_RANK_CODE[card]] -= 1
+        if self.drawn_card is not None and self._private_drawn_card() is None: 
+            counts[CARD_RANK_CODE[self.drawn_card]] -= 1
+        self._sync_unseen_totals()
+    
+    def _sync_unseen_totals(self): 
+        counts = self._unseen_counts
+        self._unseen_total = sum(counts)
+        self._unseen_value = sum(map(mul, counts, RANK_VALUES))
+        self._unseen_key = unseen_key(counts)
+        self._unseen_features[:NUM_RANK_CODES] = counts
+        self._unseen_features[:NUM_RANK_CODES] *= self._inv_rank_composition
+        self._unseen_features[NUM_RANK_CODES] = self._expected_value(self._unseen_value, self._unseen_total)
+    
+    def _private_drawn_card(self) -> Optional[int]: 
+        """Card drawn from the stock, known only to the current player until placed or discarded"""
+        if self.current_phase == PHASE_DRAW_STOCK_DECISION: 
+            return self.drawn_card
+        return None
+    
+    @staticmethod
+    def _expected_value(value: int, total: int) -> float: 
+        """Scaled mean value feature"""
+        return value / total / HIDDEN_VALUE_SCALE if total else 0.0
+    
+    def unseen_counts(self, player_id: int) -> List[int]: 
+        """Cards of each rank code (ALL_RANKS order) whose location player_id does not know"""
+        counts = self._unseen_counts.copy()
+        drawn = self._private_drawn_card()
+        if drawn is not None and player_id == self.current_player: 
+            counts[CARD_RANK_CODE[drawn]] -= 1
+        return counts
+    
+    def expected_hidden_value(self, player_id: int) -> float: 
+        """Expected point value of a card player_id has not seen (a face down slot or the next stock card)"""
+        total = self._unseen_total
+        value = self._unseen_value
+        drawn = self._private_drawn_card()
+        if drawn is not None and player_id == self.current_player: 
+            total -= 1
+            value -= CARD_VALUE[drawn]
+        return value / total if total else 0.0
     
-    def _deal_initial_hands(self): 
+    # --- Hashing --- #
+    
+    def zobrist_hash(self, player_id: Optional[int] = None) -> int: 
+        """64-bit Zobrist hash of the state (layout in zobrist.py), O(1)
+        
+        With player_id, hashes what that player can see: face down cards are hidden, a card
+        drawn from the stock only counts for the drawer, who also excludes it from the unseen counts.
+        """
+        h = self._unseen_key ^ ZOBRIST_PHASE[self.current_phase] ^ ZOBRIST_SEAT[self.current_player]
+        if self.final_turn_player_idx is not None: 
+            h ^= ZOBRIST_FINAL_TURN[self.final_turn_player_idx]
+        if self.discard_pile: 
+            h ^= ZOBRIST_DISCARD_TOP[CARD_RANK_CODE[self.discard_pile[-1]]]
+        if player_id is None: 
+            for player in self.players: 
+                h ^= player.zobrist
+            if self.drawn_card is not None: 
+                h ^= ZOBRIST_DRAWN[CARD_RANK_CODE[self.drawn_card]]
+            return h
+        
+        for player in self.players: 
+            h ^= player.public_zobrist
+        if self.drawn_card is not None: 
+            rank = CARD_RANK_CODE[self.drawn_card]
+            if self._private_drawn_card() is None: 
+                h ^= ZOBRIST_DRAWN[rank]
+            elif player_id == self.current_player: 
+                count = self._unseen_counts[rank]
+                h ^= ZOBRIST_DRAWN[rank] ^ ZOBRIST_UNSEEN[rank][count] ^ ZOBRIST_UNSEEN[rank][count - 1]
+        return h
+    
+    def _deal_initial_hands(self, shuffle: bool = True): 
         """Deal 9 cards to each player""" 
         # Shuffle deck 
-        self.deck.shuffle()
+        if shuffle: 
+            self.deck.shuffle()
         for i in range(GRID_SIZE): 
             for p_idx in range(self.num_players): 
                 card = self.deck.deal()
@@ -53,19 +307,33 @@ class GolfEnvironment:
         """Start the discard pile"""
         top_card = self.deck.deal()
         self.discard_pile.append(top_card) 
+        self._reveal(top_card)
+    
+    def _dealt_deck_order(self) -> Tuple[int, ...]: 
+        """Deck order (bottom to top) the current round was dealt from, rebuilt from the dealt cards"""
+        dealt = [self.players[p_idx].grid[i] for i in range(GRID_SIZE) for p_idx in range(self.num_players)]
+        return tuple(self.deck.cards) + (self.discard_pile[0],) + tuple(reversed(dealt))
     
-    def _reshuffle_discard_pile(self): 
-        """ Reshuffle the discard pile if stockpile runs out (unlikely I think)"""
+    def _reshuffle_discard_pile(self, deck_order: Optional[List[int]] = None): 
+        """ Reshuffle the discard pile if stockpile runs out (unlikely I think), deck_order replays a logged reshuffle"""
         if len(self.discard_pile) > 1: 
             # Keep the top card in discard pile 
             top_card = self.discard_pile.pop() 
-            cards_to_reshuffle = self.discard_pile
-            self.discard_pile = [top_card] 
             
-            # Add cards to stock pile and reshuffle 
-            self.deck.add_cards(cards_to_reshuffle)
-            self.deck.shuffle() 
-            print("--- Reshuffled discard pile into deck ---")
+            # Add cards to stock pile and reshuffle, their positions are unknown again 
+            for card in self.discard_pile: 
+                self._hide(card)
+            self.deck.add_cards(self.discard_pile)
+            self._reshuffles += 1
+            if deck_order is None: 
+                self.rng.seed((self.round_seed or 0) + (self._reshuffles << 64)) # No round seed after restoring a bare snapshot
+                self.deck.shuffle() 
+            else: 
+                self.deck.cards[:] = deck_order
+            self.discard_pile.clear()
+            self.discard_pile.append(top_card) 
+            if self._listeners: 
+                self._emit(ReshuffleEvent(tuple(self.deck.cards)))
             
     def _reveal_all_cards(self, player_id): 
         """Turns all face-down cards up at the end of the round"""
@@ -75,6 +343,7 @@ class GolfEnvironment:
             card = player.get_card(i)
             if not player.is_face_up(i): 
                 player.flip_card_up(i)
+                self._reveal(card)
                 
     
     def _check_round_end_and_advance_player(self): 
@@ -87,14 +356,14 @@ class GolfEnvironment:
         if player_all_face_up:
             if self.final_turn_player_idx is None: 
                 # Player triggered final turn for opponent 
-                print(f"--- Player {current_player_id} has all cards face up! Player {opponent_id} gets final turn. ---")
+                if self._listeners: 
+                    self._emit(FinalTurnEvent(current_player_id, opponent_id))
                 self.final_turn_player_idx =  opponent_id 
                 self.current_player = opponent_id
                 self.turn_count = self.turn_count + 1 
                 self.current_phase = PHASE_START_TURN
             else: 
                 # Current player was opponent taking final turn 
-                print(f"--- Player {current_player_id}'s (Opponent) final turn complete. Round over. ---")
                 self.round_over = True
                 
                 # Reveal all remaining cards 
@@ -103,7 +372,6 @@ class GolfEnvironment:
 
         elif self.final_turn_player_idx == current_player_id: 
             # Current player is playing their final turn 
-            print(f"--- Player {current_player_id}'s final turn complete. Round over. ---")
             self.round_over = True
             self._reveal_all_cards(current_player_id)
             self._reveal_all_cards(opponent_id)
@@ -125,57 +393,38 @@ class GolfEnvironment:
         # 11-19: Replace card in grid
         # 20: Discard drawn card
         # 21-29: Flip card in grid 
+        return dict(enumerate(ACTION_DECODE))
+    
+    def _get_action_from_id(self, action_id: int) -> Tuple[str, Optional[int]]: 
+        """Retrieves action (type, index) from action id"""
+        if not 0 <= action_id < NUM_ACTIONS: 
+            raise ValueError(f"Action ID {action_id} out of defined range.")
+        return ACTION_DECODE[action_id]
+
         
-        # Setup 
-        mapping: Dict[int, Tuple[str, Optional[int]]] = {}
-        action_id = 0
-        
-        # --- Action Mapping --- #
-        
-        for i in range(GRID_SIZE): 
-            mapping[action_id] = ("Initial_Flip",i)
-            action_id = action_id + 1
-        
-        # Draw from piles 
-        mapping[action_id] = ("DRAW_STOCK", None)
-        action_id = action_id + 1 
-        mapping[action_id] = ("DRAW_DISCARD",None)
-        action_id = action_id + 1
+    def legal_action_mask(self, player_id: int) -> int: 
+        """Returns the legal actions for the player as an int bitmask (bit i set if action id i is legal)"""
+        phase = self.current_phase
+        mask = PHASE_ACTION_MASKS[phase]
         
-        # Replace card in grid 
-        for i in range(GRID_SIZE): 
-            mapping[action_id] = ("REPLACE",i)
-            action_id = action_id + 1
-            
-        # Discard drawn card 
-        mapping[action_id] = ("DISCARD_DRAWN", None) 
-        action_id = action_id + 1
+        # Flip phases: face down slots shifted to their action ids 
+        flip_offset = PHASE_FLIP_OFFSET[phase]
+        if flip_offset is not None: 
+            if phase == PHASE_INITIAL_FLIP and self.initial_flips_count[player_id] >= 3: 
+                return 0
+            return mask | (self.players[player_id].face_down_mask << flip_offset)
         
-        # Flip card in grid
-        for i in range(GRID_SIZE): 
-            mapping[action_id] = ("FLIP", i)
-            action_id = action_id + 1
-            
-        return mapping 
+        # Start of turn: drawing needs cards in the piles 
+        if phase == PHASE_START_TURN: 
+            if self.deck.is_empty() and len(self.discard_pile) <= 1: 
+                mask &= ~DRAW_STOCK_BIT
+            if not self.discard_pile: 
+                mask &= ~DRAW_DISCARD_BIT
+        return mask
     
-    def _get_action_from_id(self, action_id: int) -> Tuple[str, Optional[int]]: 
-        """Retrieves action from action id"""
-        # Action Mapping 
-        # ---------------------------
-        # 0-8: Flip initial cards
-        # 9: Draw from stock pile
-        # 10: Draw from discard pile
-        # 11-19: Replace card in grid
-        # 20: Discard drawn card
-        # 21-29: Flip card in grid   
-        if 0 <= action_id <= GRID_SIZE - 1: return("Initial_Flip",action_id)
-        if action_id == 9: return ("DRAW_STOCK", None)
-        if action_id == 10: return ("DRAW_DISCARD", None)
-        if 11 <= action_id <= GRID_SIZE + 10: return("REPLACE",action_id-(GRID_SIZE + 2))
-        if action_id == 20: return("DISCARD_DRAWN", None)
-        if 21 <= action_id <= 29: return("FLIP",action_id - (2*GRID_SIZE+3))
-        raise ValueError(f"Action ID {action_id} out of defined range.")
-
+    def legal_action_mask_array(self, player_id: int, out: Optional[np.ndarray] = None) -> np.ndarray: 
+        """Returns the legal actions for the player as a (30,) bool array"""
+        return mask_to_array(self.legal_action_mask(player_id), out=out)
         
     def get_legal_actions(self, player_id: int) -> List[int]: 
         """Returns a list of legal actions for the player""" 
@@ -187,245 +436,325 @@ class GolfEnvironment:
         # 11-19: Replace card in grid
         # 20: Discard drawn card
         # 21-29: Flip card in grid   
-      
-        legal_action_ids = []
-        player = self.players[player_id]
-        
-        # Initial flip phase 
-        if self.current_phase == PHASE_INITIAL_FLIP: 
-            if self.initial_flips_count[player_id] < 3: 
-                for i in range(GRID_SIZE):
-                    if player.is_face_up(i) == False: 
-                        legal_action_ids.append(i)
-                        
-        # Player draws from stockpile or discard pile
-        elif self.current_phase == PHASE_START_TURN: 
-            if not self.deck.is_empty() or len(self.discard_pile) > 1: 
-                legal_action_ids.append(9)
-            if len(self.discard_pile) >= 1: 
-                legal_action_ids.append(10)
-        
-        # Player drew from stock pile 
-        elif self.current_phase == PHASE_DRAW_STOCK_DECISION:
-            # Player can discard drawn card
-            legal_action_ids.append(20) 
-            # Player can replace card in grid
-            for i in range(GRID_SIZE): 
-                legal_action_ids.append(11 + i)
-        
-        # Player drew from discard pile, must replace card in grid 
-        elif self.current_phase == PHASE_DRAW_DISCARD_DECISION: 
-            for i in range(GRID_SIZE): 
-                legal_action_ids.append(11 + i)
-                
-        # Player discarded drawn card from stock pile, must flip phase down card in grid 
-        elif self.current_phase == PHASE_MUST_FLIP_CARD: 
-            face_down_idx = player.get_face_down_cards()
-            for i in face_down_idx: 
-                legal_action_ids.append(21 + i)
-
-        return legal_action_ids
+        mask = self.legal_action_mask(player_id)
+        return [a for a in range(NUM_ACTIONS) if (mask >> a) & 1]
         
         
-    def get_observation(self, player_id: int) -> Dict[str, Any]: 
-        """Generates observation for player"""
-        # Get players 
+    # --- Dict observations --- #
+    # One getter per top-level key of get_observation, so views and field subsets only build what is read 
+    
+    def _obs_own_hand(self, player_id: int) -> Dict[str, List]: 
         player = self.players[player_id]
-        opponent_id = 1 - player_id 
-        opponent = self.players[opponent_id] 
-        
-        # Own grid 
         own_grid_vis = [] # List index, rank, and suit 
         own_grid_invis = [] # List index
         for i in range(GRID_SIZE): 
-            card = player.get_card(i)
-            if player.is_face_up(i): 
-                own_grid_vis.append({'index': i, 'rank': card.rank, 'suit': card.suit})
+            card = player.grid[i]
+            if player.face_up[i]: 
+                own_grid_vis.append({'index': i, 'rank': CARD_RANK[card], 'suit': CARD_SUIT[card]})
             else: 
                 own_grid_invis.append(i)
-        
-        # Opponent grid 
+        return {"visible_cards": own_grid_vis, "hidden_indices": own_grid_invis}
+    
+    def _obs_opponent_hand(self, player_id: int) -> Dict[str, List]: 
+        opponent = self.players[1 - player_id]
         opponent_grid_vis = [] 
         opponent_grid_invis = [] 
         for i in range(GRID_SIZE): 
-            card = opponent.get_card(i)
-            if opponent.is_face_up(i): 
-                opponent_grid_vis.append({'index': i, 'rank': card.rank, 'suit': card.suit}) 
+            card = opponent.grid[i]
+            if opponent.face_up[i]: 
+                opponent_grid_vis.append({'index': i, 'rank': CARD_RANK[card], 'suit': CARD_SUIT[card]}) 
             else: 
                 opponent_grid_vis.append(i)
+        return {"visible_cards": opponent_grid_vis, "hideen_indices": opponent_grid_invis}
+    
+    def _obs_discard_top(self, player_id: int) -> Optional[Dict[str, str]]: 
+        if not self.discard_pile: 
+            return None
+        top_discard = self.discard_pile[-1]
+        return {'rank': CARD_RANK[top_discard], 'suit': CARD_SUIT[top_discard]}
+    
+    def _obs_drawn_card(self, player_id: int) -> Optional[Dict[str, str]]: 
+        if self.drawn_card is None: 
+            return None
+        return {'rank': CARD_RANK[self.drawn_card], 'suit': CARD_SUIT[self.drawn_card]}
+    
+    # Observation key -> getter(env, player_id), in get_observation order 
+    OBS_FIELDS: Dict[str, Callable[['GolfEnvironment', int], Any]] = {
+        "player_id": lambda env, player_id: player_id,
+        "current_player": lambda env, player_id: env.current_player,
+        "turn_phase": lambda env, player_id: env.current_phase,
+        "initial_flips_done": lambda env, player_id: env.initial_flips_count[player_id],
+        "own_hand": _obs_own_hand,
+        "opponent_hand": _obs_opponent_hand,
+        "discard_top": _obs_discard_top,
+        "deck_size": lambda env, player_id: len(env.deck.cards),
+        "drawn_card": _obs_drawn_card,
+        "scores": lambda env, player_id: env.scores.copy(),
+        "turn_count": lambda env, player_id: env.turn_count,
+        "is_final_turn": lambda env, player_id: env.final_turn_player_idx == player_id, # Is this player taking final turn?
+        "unseen_counts": lambda env, player_id: env.unseen_counts(player_id), # Per rank code (ALL_RANKS order)
+        "expected_hidden_value": lambda env, player_id: env.expected_hidden_value(player_id),
+    }
+    
+    def get_observation(self, player_id: int, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]: 
+        """Generates observation for player, only the given top-level fields (OBS_FIELDS keys) if fields is set"""
+        if fields is None: 
+            # Same as every OBS_FIELDS getter, inlined 
+            return {
+                "player_id": player_id,
+                "current_player": self.current_player,
+                "turn_phase": self.current_phase,
+                "initial_flips_done": self.initial_flips_count[player_id],
+                "own_hand": self._obs_own_hand(player_id),
+                "opponent_hand": self._obs_opponent_hand(player_id),
+                "discard_top": self._obs_discard_top(player_id),
+                "deck_size": len(self.deck.cards),
+                "drawn_card": self._obs_drawn_card(player_id),
+                "scores": self.scores.copy(), 
+                "turn_count": self.turn_count,
+                "is_final_turn": self.final_turn_player_idx == player_id,
+                "unseen_counts": self.unseen_counts(player_id),
+                "expected_hidden_value": self.expected_hidden_value(player_id),
+            }
+        unknown = set(fields).difference(self.OBS_FIELDS)
+        if unknown: 
+            raise ValueError(f"Unknown observation fields {sorted(unknown)}")
+        return {key: self.OBS_FIELDS[key](self, player_id) for key in fields}
+    
+    def observation_view(self, player_id: int, fields: Optional[Sequence[str]] = None) -> ObservationView: 
+        """Lazy get_observation for player: fields are computed when read, cached until the next step/reset/restore"""
+        return ObservationView(self, player_id, fields)
+
+    def encode_observation(self, player_id: int, out: Optional[np.ndarray] = None) -> np.ndarray: 
+        """Writes the fixed-size observation for player into out (layout in encoding.py)"""
+        if out is None: 
+            out = observation_buffer()
+        else: 
+            out.fill(0)
+        player = self.players[player_id]
+        opponent = self.players[1 - player_id]
         
-        # Top card in dispile deck           
+        # Grids: one-hot rank codes for face up cards, plus face up masks
+        for grid_offset, up_offset, p in ((OBS_OWN_RANKS, OBS_OWN_UP, player), (OBS_OPP_RANKS, OBS_OPP_UP, opponent)): 
+            for i in range(GRID_SIZE): 
+                if p.face_up[i]: 
+                    out[grid_offset + i * NUM_RANK_CODES + CARD_RANK_CODE[p.grid[i]]] = 1.0
+                    out[up_offset + i] = 1.0
         
-        if self.discard_pile:  
-            top_discard = self.discard_pile[-1]
-            top_discard_info = {'rank': top_discard.rank, 'suit': top_discard.suit}
-        else:
-            top_discard_info = None
-            top_discard = None
+        # Discard top and drawn card
+        if self.discard_pile: 
+            out[OBS_DISCARD + CARD_RANK_CODE[self.discard_pile[-1]]] = 1.0
+        if self.drawn_card is not None: 
+            out[OBS_DRAWN + CARD_RANK_CODE[self.drawn_card]] = 1.0
         
-        # Drawn card 
-        if self.drawn_card:
-           drawn_card_info = {'rank': self.drawn_card.rank, 'suit': self.drawn_card.suit}
-        else:
-            drawn_card_info = None
-        
-        # Gather observation information 
-        observation = {
-            "player_id": player_id,
-            "current_player": self.current_player,
-            "turn_phase": self.current_phase,
-            "initial_flips_done": self.initial_flips_count[player_id],
-            "own_hand": {
-                "visible_cards": own_grid_vis,
-                "hidden_indices": own_grid_invis,
-            },
-            "opponent_hand": {
-                 "visible_cards": opponent_grid_vis,
-                 "hideen_indices": opponent_grid_invis
-            },
-            "discard_top": top_discard_info,
-            "deck_size": len(self.deck.cards),
-            "drawn_card": drawn_card_info,
-            "scores": self.scores, 
-            "turn_count": self.turn_count,
-            "is_final_turn": self.final_turn_player_idx == player_id # Is this player taking final turn?
-        }
-
-        return observation 
-
+        # Phase, deck size and final turn flag
+        out[OBS_PHASE + self.current_phase] = 1.0
+        out[OBS_DECK_SIZE] = len(self.deck.cards) / self.total_cards
+        out[OBS_FINAL_TURN] = self.final_turn_player_idx == player_id
+        
+        # Unseen cards per rank and the expected value of one of them
+        out[OBS_UNSEEN:OBS_HIDDEN_VALUE + 1] = self._unseen_features
+        drawn = self._private_drawn_card()
+        if drawn is not None and player_id == self.current_player: 
+            # The drawer also knows the card in their hand
+            rank = CARD_RANK_CODE[drawn]
+            out[OBS_UNSEEN + rank] = (self._unseen_counts[rank] - 1) * self._inv_rank_composition[rank]
+            out[OBS_HIDDEN_VALUE] = self._expected_value(self._unseen_value - CARD_VALUE[drawn], self._unseen_total - 1)
+        
+        return out
+    
+    def _get_observations(self) -> Tuple[Observation, Observation]: 
+        """Observations for both players in the configured obs_type"""
+        if self.obs_type == "none": 
+            return None, None
+        if self.obs_type == "lazy": 
+            return self._obs_views
+        if self.obs_type == "dict": 
+            return self.get_observation(0, self.obs_fields), self.get_observation(1, self.obs_fields)
+        obs0 = self.encode_observation(0, out=self._obs_buffers[0])
+        obs1 = self.encode_observation(1, out=self._obs_buffers[1])
+        return obs0, obs1
 
-    def reset(self) -> Tuple[Dict[str, Any], Dict[str, Any]]: 
-        """ Reset the environment for a new round """ 
-        print("--- Resetting Environment ---")
 
+    def reset(self, deck_order: Optional[List[int]] = None, seed: Optional[int] = None) -> Tuple[Observation, Observation]: 
+        """ Reset the environment for a new round, deal from deck_order (card codes, bottom to top) if given 
+        
+        seed fixes the round seed (shuffle and later reshuffles), by default it is drawn from the environment seed
+        
+        With obs_type="array" the observations are this environment's two buffers, overwritten by the
+        next step or reset: .copy() them to keep them (or use obs_type="dict"). 
+        """ 
+        # Reuses the deck, players and lists of the previous round: every card of the last
+        # round (grids, discard pile, drawn card) goes back into the deck, which is refilled
+        # in build order so the deal matches a fresh Deck for the same random state 
+        
+        self._obs_version += 1
+        
+        # Round seed 
+        self.round_seed = seed if seed is not None else self._next_round_seed()
+        self.rng.seed(self.round_seed)
+        self._reshuffles = 0
+        self.dealt_from_seed = deck_order is None # The round seed alone reproduces this round
+        
         # Deck 
-        self.deck = Deck(self.num_decks, self.num_jokers) 
-        self.discard_pile = [] 
+        if deck_order is None: 
+            self.deck.reset()
+        else: 
+            self.deck.cards[:] = deck_order
+        self.discard_pile.clear()
         self.drawn_card = None
     
         # Players
-        self.players = [Player() for _ in range(self.num_players)]
+        for player in self.players: 
+            player.clear()
         self.current_player = 0 
         self.turn_count = 0
         self.final_turn_player_idx = None 
     
         # Round keeping 
-        self.initial_flips_count = [0]*self.num_players
+        for p_idx in range(self.num_players): 
+            self.initial_flips_count[p_idx] = 0
+            self.scores[p_idx] = 0
+        self._reset_unseen_counts()
         self.round_over = False
         self.game_over = False 
-        self.scores = [0]*self.num_players
     
         # Deal and start the discard pile
-        self._deal_initial_hands()
+        self._deal_initial_hands(shuffle = deck_order is None)
         self._start_discard_pile()
+        if self._listeners: 
+            self._emit(ResetEvent(self._dealt_deck_order()))
     
         # Start phase
-        self.current_phasse = PHASE_INITIAL_FLIP
+        self.current_phase = PHASE_INITIAL_FLIP
     
         # Return initial obss
-        obs0 = self.get_observation(0)
-        obs1 = self.get_observation(1)
+        obs0, obs1 = self._get_observations()
     
         return obs0,obs1
 
 
-    def _get_action_from_id(self, action_id: int) -> Tuple[str, Optional[int]]: 
-        """Retrieves action from action id"""
-        # Action Mapping 
-        # ---------------------------
-        # 0-8: Flip initial cards
-        # 9: Draw from stock pile
-        # 10: Draw from discard pile
-        # 11-19: Replace card in grid
-        # 20: Discard drawn card
-        # 21-29: Flip card in grid   
-        if 0 <= action_id <= GRID_SIZE - 1: return("Initial_Flip",action_id)
-        if action_id == 9: return ("DRAW_STOCK", None)
-        if action_id == 10: return ("DRAW_DISCARD", None)
-        if 11 <= action_id <= GRID_SIZE + 10: return("REPLACE",action_id-(GRID_SIZE + 2))
-        if action_id == 20: return("DISCARD_DRAWN", None)
-        if 21 <= action_id <= 29: return("FLIP",action_id - (2*GRID_SIZE+3))
-        raise ValueError(f"Action ID {action_id} out of defined range.")
-
-    def step(self, action_id: int) -> Tuple[Dict[str, Any], Dict[str, Any], int, bool, Dict[str, Any]]:
-        """ Execute action for current player""" 
-
-        # Get player
+    def is_legal(self, action_id: int) -> bool: 
+        """Whether action_id is legal for the current player, O(1) from the transition table"""
+        if not 0 <= action_id < NUM_ACTIONS: 
+            return False
+        handler = STEP_HANDLERS[self.current_phase][action_id]
+        if handler == HANDLER_ILLEGAL: 
+            return False
+        return self._handler_ready(handler, ACTION_SLOTS[action_id])
+    
+    def _handler_ready(self, handler: int, slot: int) -> bool: 
+        """Dynamic part of legality: face down slot for flips, cards in the piles for draws"""
+        if handler in SLOT_HANDLERS: 
+            return not self.players[self.current_player].face_up[slot]
+        if handler == HANDLER_DRAW_STOCK: 
+            return not self.deck.is_empty() or len(self.discard_pile) > 1
+        if handler == HANDLER_DRAW_DISCARD: 
+            return bool(self.discard_pile)
+        return True
+    
+    def step(self, action_id: int) -> Tuple[Observation, Observation, int, bool, Dict[str, Any]]:
+        """ Execute action for current player
+        
+        Actions the current phase never allows raise ValueError, validate_actions also checks
+        face down slots and pile sizes (is_legal). 
+        
+        With obs_type="array" the observations are this environment's two buffers, overwritten by the
+        next step or reset: keeping them across steps (prev_obs = obs) reads the new state, .copy()
+        them instead (or use obs_type="dict"). 
+        """ 
+        if not 0 <= action_id < NUM_ACTIONS: 
+            raise ValueError(f"Action ID {action_id} out of defined range.")
+        phase = self.current_phase
+        handler = STEP_HANDLERS[phase][action_id]
+        if handler == HANDLER_ILLEGAL or (self.validate_actions and not self._handler_ready(handler, ACTION_SLOTS[action_id])): 
+            raise ValueError(f"Illegal action {action_id} for player {self.current_player} in phase {phase}")
         player_id = self.current_player
-        player = self.players[player_id] 
-        opponent_id = 1 - player_id
+        self._handlers[handler](self, player_id, ACTION_SLOTS[action_id])
+        return self._finish_step(player_id, phase, action_id)
     
-        # Get legal actions for player
-        legal_acts = self.get_legal_actions(player_id)
-        action_type, action_index = self._get_action_from_id(action_id)
-        print(f"Step: P{player_id}, Phase:{self.current_phase}, Action:{action_type}, Idx:{action_index}") # Debug
+    def step_unchecked(self, action_id: int) -> Tuple[Observation, Observation, int, bool, Dict[str, Any]]: 
+        """ step without any legality check, for callers that only pick from the legal mask (illegal actions corrupt the state)
+        
+        Observations are reused buffers as in step. 
+        """
+        phase = self.current_phase
+        player_id = self.current_player
+        self._handlers[STEP_HANDLERS[phase][action_id]](self, player_id, ACTION_SLOTS[action_id])
+        return self._finish_step(player_id, phase, action_id)
     
-        # Setup
-        reward = 0
-        info = {} 
+    # --- Step handlers (STEP_HANDLERS ids index _handlers) --- #
     
-        # --- Process action based on phase --- #
-    
-        # Player initially flips each card 
-        if self.current_phase == PHASE_INITIAL_FLIP:
-            # Flip card
-            player.flip_card_up(action_index)
-            self.initial_flips_count[player_id]  = self.initial_flips_count[player_id] + 1 
-    
-            # Player needs to flip 3 cards, so loop back if less than 3 cards flipped
-            if self.initial_flips_count[player_id] == 3: 
-                if player_id == 0: 
-                    self.current_player = 1
-                else: # Current player still needs to flip more 
-                    self.current_player = 0
-                    self.current_phase = PHASE_START_TURN 
-    
-        # Player chooses to draw from discard pile or stock 
-        elif self.current_phase == PHASE_START_TURN:
-            if action_type == "DRAW_STOCK": 
-                self.drawn_card = self.deck.deal()
-                self.current_phase = PHASE_DRAW_STOCK_DECISION
-            elif action_type == "DRAW_DISCARD": 
-                self.drawn_card = self.discard_pile.pop()
-                self.current_phase = PHASE_DRAW_DISCARD_DECISION
-    
-        # If player draws from stock, they choose to replace card in grid or discard drawn card
-        elif self.current_phase == PHASE_DRAW_STOCK_DECISION: 
-            if action_type == "REPLACE": 
-                # Player chooses to replace card in grid, take replaced card to discard pile
-                replaced_card = player.get_card(action_index) 
-                player.set_card(action_index, self.drawn_card, face_up = True)
-                self.discard_pile.append(replaced_card)
-                self.drawn_card = None
-                # Advance round
-                self._check_round_end_and_advance_player() 
-            elif action_type == "DISCARD_DRAWN": 
-                self.discard_pile.append(self.drawn_card)
-                self.drawn_card = None
-                self.current_phase = PHASE_MUST_FLIP_CARD       
-    
-        # If player draws from discard pile, they choose to replace card in grid or they must flip a card in the grid
-        elif self.current_phase == PHASE_DRAW_DISCARD_DECISION: 
-            if action_type == "REPLACE": 
-                replaced_card = player.get_card(action_index)
-                player.set_card(action_index, self.drawn_card, face_up = True)
-                self.discard_pile.append(replaced_card)
-                self.drawn_card = None
-                
-                # Advance round
-                self._check_round_end_and_advance_player()
-            else: 
-                raise ValueError(f"Invalid action type {action_type} during PHASE_DRAW_DISCARD_DECISION")
-    
-        # Player must flip card in the grid 
-        elif self.current_phase == PHASE_MUST_FLIP_CARD: 
-            if action_type == "FLIP": 
-                player.flip_card_up(action_index) 
-                # Advance round
-                self._check_round_end_and_advance_player()
-            else: 
-                raise ValueError(f"Invalid action type {action_type} during PHASE_MUST_FLIP_CARD")
+    def _initial_flip(self, player_id: int, slot: int): 
+        # Flip card
+        player = self.players[player_id]
+        player.flip_card_up(slot)
+        self._reveal(player.grid[slot])
+        self.initial_flips_count[player_id]  = self.initial_flips_count[player_id] + 1 
     
+        # Player needs to flip 3 cards, so loop back if less than 3 cards flipped
+        if self.initial_flips_count[player_id] == 3: 
+            if player_id == 0: 
+                self.current_player = 1
+            else: # Current player still needs to flip more 
+                self.current_player = 0
+                self.current_phase = PHASE_START_TURN 
+    
+    def _draw_stock(self, player_id: int, slot: int): 
+        if self.deck.is_empty(): 
+            self._reshuffle_discard_pile()
+        self.drawn_card = self.deck.deal()
+        self.current_phase = PHASE_DRAW_STOCK_DECISION
+    
+    def _draw_discard(self, player_id: int, slot: int): 
+        self.drawn_card = self.discard_pile.pop()
+        self.current_phase = PHASE_DRAW_DISCARD_DECISION
+    
+    def _replace_stock(self, player_id: int, slot: int): 
+        # Player chooses to replace card in grid, take replaced card to discard pile
+        player = self.players[player_id]
+        replaced_card = player.get_card(slot) 
+        if not player.is_face_up(slot): 
+            self._reveal(replaced_card)
+        self._reveal(self.drawn_card) # Only the drawing player had seen it
+        player.set_card(slot, self.drawn_card, face_up = True)
+        self.discard_pile.append(replaced_card)
+        self.drawn_card = None
+        # Advance round
+        self._check_round_end_and_advance_player() 
+    
+    def _discard_drawn(self, player_id: int, slot: int): 
+        self._reveal(self.drawn_card)
+        self.discard_pile.append(self.drawn_card)
+        self.drawn_card = None
+        self.current_phase = PHASE_MUST_FLIP_CARD 
+    
+    def _replace_discard(self, player_id: int, slot: int): 
+        player = self.players[player_id]
+        replaced_card = player.get_card(slot)
+        if not player.is_face_up(slot): 
+            self._reveal(replaced_card)
+        player.set_card(slot, self.drawn_card, face_up = True)
+        self.discard_pile.append(replaced_card)
+        self.drawn_card = None
+        # Advance round
+        self._check_round_end_and_advance_player()
+    
+    def _flip(self, player_id: int, slot: int): 
+        player = self.players[player_id]
+        player.flip_card_up(slot) 
+        self._reveal(player.grid[slot])
+        # Advance round
+        self._check_round_end_and_advance_player()
+    
+    # Handler functions in STEP_HANDLERS id order 
+    _handlers = (None, _initial_flip, _draw_stock, _draw_discard, _replace_stock, _discard_drawn, _replace_discard, _flip)
+    
+    def _finish_step(self, player_id: int, phase: int, action_id: int) -> Tuple[Observation, Observation, int, bool, Dict[str, Any]]: 
+        """Round end scoring, events and observations after a step handler ran"""
+        self._obs_version += 1
+        reward = 0
+        info = {} 
     
         # --- After action processing and scoring --- #
     
@@ -435,8 +764,8 @@ class GolfEnvironment:
             self._reveal_all_cards(0)
             self._reveal_all_cards(1)
     
-            self.scores[0] = self.players[0].calculate_score()
-            self.scores[1] = self.players[1].calculate_score() 
+            self.scores[0] = self.players[0].score
+            self.scores[1] = self.players[1].score 
         
             # Determine winner 
             winner = -1 # Tie? 
@@ -448,16 +777,22 @@ class GolfEnvironment:
         
             # Calculate award
             current_player_score = self.scores[player_id]
-            opponent_score = self.scores[opponent_id]
+            opponent_score = self.scores[1 - player_id]
             reward = opponent_score - current_player_score
         
             # Final state
             self.game_over = True
             self.current_phase = PHASE_GAME_OVER
     
+        if self._listeners: 
+            self._emit(StepEvent(player_id, phase, action_id, reward, done))
+            if done: 
+                self._emit(RoundEndEvent((self.scores[0], self.scores[1]), info['round_winner']))
+    
         # Updated observations
-        obs0 = self.get_observation(0) 
-        obs1 = self.get_observation(1) 
+        if self.obs_type == "none": 
+            return None, None, reward, done, info
+        obs0, obs1 = self._get_observations()
     
         return obs0, obs1, reward, done, info 
     
@@ -478,9 +813,9 @@ class GolfEnvironment:
 
             print(f"Turn: {self.turn_count} | Player: {self.current_player} | Phase: {phase_name}")
             print(f"Deck Size: {len(self.deck.cards)}")
-            top_discard = self.discard_pile[-1] if self.discard_pile else "Empty"
+            top_discard = CARDS[self.discard_pile[-1]] if self.discard_pile else "Empty"
             print(f"Discard Top: {top_discard}")
-            if self.drawn_card: print(f"Player {self.current_player} holding drawn card: {self.drawn_card}")
+            if self.drawn_card is not None: print(f"Player {self.current_player} holding drawn card: {CARDS[self.drawn_card]}")
 
             # Print player grids 
             for p_idx, player_obj in enumerate(self.players):
@@ -491,7 +826,7 @@ class GolfEnvironment:
                 # Show scores only at the end
                 if self.game_over or self.round_over:
                      # Ensure scores are calculated if rendering end state
-                     if not self.scores[p_idx]: self.scores[p_idx] = player_obj.calculate_score()
+                     if not self.scores[p_idx]: self.scores[p_idx] = player_obj.score
                      print(f"Score: {self.scores[p_idx]}")
 
 
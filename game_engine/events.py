@@ -0,0 +1,191 @@
+import logging
+import struct
+from typing import NamedTuple, Tuple, Union, Callable, Iterator, Optional, BinaryIO
+from .constants import *
+
+# --- Event types --- #
+
+class ResetEvent(NamedTuple):
+    """New round dealt, deck_order is the shuffled deck (card codes, bottom to top) before dealing"""
+    deck_order: Tuple[int, ...]
+
+class StepEvent(NamedTuple):
+    """Action applied by player during phase (emitted after the action is processed)"""
+    player_id: int
+    phase: int
+    action_id: int
+    reward: int
+    done: bool
+
+class FinalTurnEvent(NamedTuple):
+    """Player turned their last card face up, final_player gets the final turn"""
+    player_id: int
+    final_player: int
+
+class RoundEndEvent(NamedTuple):
+    """Round over with final scores, winner is -1 on a tie"""
+    scores: Tuple[int, int]
+    winner: int
+
+class ReshuffleEvent(NamedTuple):
+    """Discard pile reshuffled into the stock, deck_order is the new stock (bottom to top)"""
+    deck_order: Tuple[int, ...]
+
+Event = Union[ResetEvent, StepEvent, FinalTurnEvent, RoundEndEvent, ReshuffleEvent]
+Listener = Callable[[Event], None]
+
+
+def action_name(action_id: int) -> str:
+    """Readable action, e.g. REPLACE[4]"""
+    if action_id < ACTION_DRAW_STOCK: return f"Initial_Flip[{action_id - ACTION_INITIAL_FLIP}]"
+    if action_id == ACTION_DRAW_STOCK: return "DRAW_STOCK"
+    if action_id == ACTION_DRAW_DISCARD: return "DRAW_DISCARD"
+    if action_id < ACTION_DISCARD_DRAWN: return f"REPLACE[{action_id - ACTION_REPLACE}]"
+    if action_id == ACTION_DISCARD_DRAWN: return "DISCARD_DRAWN"
+    return f"FLIP[{action_id - ACTION_FLIP}]"
+
+
+def format_event(event: Event) -> str:
+    """Human readable one-line description of an event"""
+    if isinstance(event, ResetEvent):
+        return "--- Resetting Environment ---"
+    if isinstance(event, StepEvent):
+        return f"Step: P{event.player_id}, Phase:{event.phase}, Action:{action_name(event.action_id)}"
+    if isinstance(event, FinalTurnEvent):
+        return f"--- Player {event.player_id} has all cards face up! Player {event.final_player} gets final turn. ---"
+    if isinstance(event, RoundEndEvent):
+        return f"--- Round over. Scores: Player 0 = {event.scores[0]}, Player 1 = {event.scores[1]} ---"
+    if isinstance(event, ReshuffleEvent):
+        return "--- Reshuffled discard pile into deck ---"
+    raise TypeError(f"Unknown event {event!r}")
+
+
+# --- Sinks --- #
+
+class NullSink:
+    """Discards every event"""
+
+    def __call__(self, event: Event):
+        pass
+
+
+class LoggingSink:
+    """Writes events as readable lines to a logging.Logger"""
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO):
+        self.logger = logger if logger is not None else logging.getLogger("game_engine")
+        self.level = level
+
+    def __call__(self, event: Event):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, format_event(event))
+
+
+# Binary game log format
+# ---------------------------
+# File starts with LOG_MAGIC, followed by records of a tag byte and a fixed payload:
+# RESET / RESHUFFLE:  uint16 n, n uint8 card codes (uint8 n in GOLFLOG1 files, still readable)
+# STEP:               uint8 player, uint8 phase, uint8 action, int16 reward, uint8 done
+# FINAL_TURN:         uint8 player, uint8 final player
+# ROUND_END:          int16 score0, int16 score1, int8 winner
+LOG_MAGIC = b"GOLFLOG2"
+_LOG_MAGIC_V1 = b"GOLFLOG1"
+TAG_RESET = 1
+TAG_STEP = 2
+TAG_FINAL_TURN = 3
+TAG_ROUND_END = 4
+TAG_RESHUFFLE = 5
+
+_COUNT = struct.Struct("<H")
+_COUNT_V1 = struct.Struct("<B")
+_STEP = struct.Struct("<BBBhB")
+_FINAL_TURN = struct.Struct("<BB")
+_ROUND_END = struct.Struct("<hhb")
+
+
+def encode_event(event: Event) -> bytes:
+    """Binary record for an event"""
+    if isinstance(event, StepEvent):
+        return bytes((TAG_STEP,)) + _STEP.pack(event.player_id, event.phase, event.action_id, event.reward, event.done)
+    if isinstance(event, (ResetEvent, ReshuffleEvent)):
+        tag = TAG_RESET if isinstance(event, ResetEvent) else TAG_RESHUFFLE
+        return bytes((tag,)) + _COUNT.pack(len(event.deck_order)) + bytes(event.deck_order)
+    if isinstance(event, FinalTurnEvent):
+        return bytes((TAG_FINAL_TURN,)) + _FINAL_TURN.pack(event.player_id, event.final_player)
+    if isinstance(event, RoundEndEvent):
+        return bytes((TAG_ROUND_END,)) + _ROUND_END.pack(event.scores[0], event.scores[1], event.winner)
+    raise TypeError(f"Unknown event {event!r}")
+
+
+class BinaryGameLog:
+    """Append-only binary log of events, read back with read_game_log"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: BinaryIO = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(LOG_MAGIC)
+
+    def __call__(self, event: Event):
+        self._file.write(encode_event(event))
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self) -> "BinaryGameLog":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_game_log(path: str) -> Iterator[Event]:
+    """Yields the events stored in a binary game log"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data.startswith(LOG_MAGIC):
+        count = _COUNT
+    elif data.startswith(_LOG_MAGIC_V1):
+        count = _COUNT_V1
+    else:
+        raise ValueError(f"{path} is not a game log")
+
+    pos = len(LOG_MAGIC)
+    while pos < len(data):
+        tag = data[pos]
+        pos += 1
+        if tag in (TAG_RESET, TAG_RESHUFFLE):
+            n, = count.unpack_from(data, pos)
+            pos += count.size
+            deck_order = tuple(data[pos:pos + n])
+            pos += n
+            yield ResetEvent(deck_order) if tag == TAG_RESET else ReshuffleEvent(deck_order)
+        elif tag == TAG_STEP:
+            player_id, phase, action_id, reward, done = _STEP.unpack_from(data, pos)
+            pos += _STEP.size
+            yield StepEvent(player_id, phase, action_id, reward, bool(done))
+        elif tag == TAG_FINAL_TURN:
+            yield FinalTurnEvent(*_FINAL_TURN.unpack_from(data, pos))
+            pos += _FINAL_TURN.size
+        elif tag == TAG_ROUND_END:
+            score0, score1, winner = _ROUND_END.unpack_from(data, pos)
+            pos += _ROUND_END.size
+            yield RoundEndEvent((score0, score1), winner)
+        else:
+            raise ValueError(f"Corrupt game log {path}: unknown tag {tag} at byte {pos - 1}")
+
+
+def replay_events(events, env) -> Iterator[Tuple[Event, "GolfEnvironment"]]:
+    """Re-simulates logged events on a GolfEnvironment, yielding each event with the env after it"""
+    for event in events:
+        if isinstance(event, ResetEvent):
+            env.reset(deck_order=event.deck_order)
+        elif isinstance(event, ReshuffleEvent):
+            env._reshuffle_discard_pile(event.deck_order)
+        elif isinstance(event, StepEvent):
+            env.step(event.action_id)
+        yield event, env
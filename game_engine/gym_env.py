@@ -0,0 +1,362 @@
+import numpy as np
+from typing import Tuple, Dict, Any, Optional, List
+from .constants import *
+from .card import RANK_VALUES
+from .encoding import *
+from .environment import GolfEnvironment
+from .vec_environment import VecGolfEnvironment
+from .env_pool import SubprocGolfEnvPool
+
+# Gymnasium and PettingZoo are optional: without them the wrappers work the same,
+# only the space objects are None and the classes do not derive from their base classes
+try:
+    import gymnasium
+    from gymnasium import spaces
+except ImportError:
+    gymnasium = None
+try:
+    import pettingzoo
+except ImportError:
+    pettingzoo = None
+
+_EnvBase = gymnasium.Env if gymnasium is not None else object
+_VectorEnvBase = gymnasium.vector.VectorEnv if gymnasium is not None else object
+_AECEnvBase = pettingzoo.AECEnv if pettingzoo is not None else object
+
+# Observation bounds per feature (everything is in [0, 1] except the expected hidden value)
+OBS_LOW = np.zeros(OBS_DIM, dtype=OBS_DTYPE)
+OBS_LOW[OBS_HIDDEN_VALUE] = min(RANK_VALUES) / HIDDEN_VALUE_SCALE
+OBS_HIGH = np.ones(OBS_DIM, dtype=OBS_DTYPE)
+
+AGENTS = ["player_0", "player_1"]
+
+
+def observation_space():
+    """Box space of one encoded observation (None without gymnasium)"""
+    if gymnasium is None:
+        return None
+    return spaces.Box(OBS_LOW, OBS_HIGH, dtype=OBS_DTYPE)
+
+def action_space():
+    """Discrete space over the action ids (None without gymnasium)"""
+    if gymnasium is None:
+        return None
+    return spaces.Discrete(NUM_ACTIONS)
+
+def action_mask_space():
+    """MultiBinary space of the legal action mask in info['action_mask'] (None without gymnasium)"""
+    if gymnasium is None:
+        return None
+    return spaces.MultiBinary(NUM_ACTIONS)
+
+def _same_step_metadata() -> Dict[str, Any]:
+    if gymnasium is not None and hasattr(gymnasium.vector, "AutoresetMode"):
+        return {"autoreset_mode": gymnasium.vector.AutoresetMode.SAME_STEP}
+    return {"autoreset_mode": "same-step"}
+
+
+# --- Single environment --- #
+
+class GolfGymEnv(_EnvBase):
+    """Gymnasium-style GolfEnvironment returning encoded observations and info['action_mask']
+
+    Without an opponent every step is taken by the current player (self-play): observations
+    belong to info['current_player'] and the reward to info['acting_player']. With an opponent
+    (any object with act(legal_actions)) its turns, including the initial flip hand-offs, are
+    played inside reset/step and observations and rewards are always for agent_seat.
+
+    Returned observations and masks are preallocated arrays overwritten by the next call.
+    """
+    metadata = {"render_modes": ["human"]}
+
+    def __init__(self, opponent: Optional[Any] = None, agent_seat: int = 0, num_decks: int = 2, num_jokers: int = 4,
+                 render_mode: Optional[str] = None):
+        if agent_seat not in (0, 1):
+            raise ValueError(f"agent_seat must be 0 or 1, got {agent_seat}")
+        self.env = GolfEnvironment(num_decks=num_decks, num_jokers=num_jokers, obs_type="none")
+        self.opponent = opponent
+        self.agent_seat = agent_seat
+        self.render_mode = render_mode
+        self.observation_space = observation_space()
+        self.action_space = action_space()
+        self._obs = observation_buffer()
+        self._mask = np.zeros(NUM_ACTIONS, dtype=bool)
+
+    def _observe(self, info: Dict[str, Any]) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Encodes the observing seat into the preallocated buffers"""
+        env = self.env
+        seat = env.current_player if self.opponent is None else self.agent_seat
+        env.encode_observation(seat, out=self._obs)
+        env.legal_action_mask_array(seat, out=self._mask)
+        info["action_mask"] = self._mask
+        info["current_player"] = env.current_player
+        return self._obs, info
+
+    def _play_opponent(self) -> Tuple[float, bool, Dict[str, Any]]:
+        """Plays opponent turns until agent_seat must act, returns the agent's reward, done and step info"""
+        env = self.env
+        while not env.game_over and env.current_player != self.agent_seat:
+            legal = env.get_legal_actions(env.current_player)
+            _, _, reward, done, info = env.step(self.opponent.act(legal))
+            if done:
+                return -reward, True, info
+        return 0.0, env.game_over, {}
+
+    def reset(self, seed: Optional[int] = None, options: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
+        if seed is not None:
+            self.env.seed(seed)
+        self.env.reset()
+        if self.opponent is not None:
+            self._play_opponent()
+        return self._observe({})
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, bool, Dict[str, Any]]:
+        env = self.env
+        if env.game_over:
+            raise RuntimeError("step called on a finished round, call reset")
+        acting = env.current_player
+        if not (env.legal_action_mask(acting) >> int(action)) & 1:
+            raise ValueError(f"Illegal action {action} for player {acting} in phase {env.current_phase}")
+        _, _, reward, done, info = env.step(int(action))
+        info["acting_player"] = acting
+        if self.opponent is not None and not done:
+            reward, done, opp_info = self._play_opponent()
+            info.update(opp_info)
+        obs, info = self._observe(info)
+        return obs, float(reward), done, False, info
+
+    def action_masks(self) -> np.ndarray:
+        """Legal mask of the observing seat (for maskable policy libraries)"""
+        return self._mask
+
+    def render(self):
+        if self.render_mode == "human":
+            self.env.render()
+
+    def close(self):
+        pass
+
+
+# --- Two-seat AEC environment --- #
+
+class GolfAECEnv(_AECEnvBase):
+    """PettingZoo AEC-style environment, one agent per seat
+
+    agent_selection follows current_player (a seat keeps the turn through its draw and
+    decision phases and the three initial flips). observe(agent) returns that seat's
+    encoded observation and infos[agent]['action_mask'] its legal mask, both preallocated.
+    When the round ends both agents are terminated with zero-sum rewards and must be
+    stepped with None.
+    """
+    metadata = {"render_modes": ["human"], "name": "golf_v0", "is_parallelizable": False}
+
+    def __init__(self, num_decks: int = 2, num_jokers: int = 4, render_mode: Optional[str] = None):
+        self.env = GolfEnvironment(num_decks=num_decks, num_jokers=num_jokers, obs_type="none")
+        self.render_mode = render_mode
+        self.possible_agents = list(AGENTS)
+        self.agents: List[str] = []
+        self.agent_selection: Optional[str] = None
+        self._obs = observation_buffer(2)
+        self._masks = np.zeros((2, NUM_ACTIONS), dtype=bool)
+        self._observation_space = observation_space()
+        self._action_space = action_space()
+        self.rewards: Dict[str, float] = {}
+        self._cumulative_rewards: Dict[str, float] = {}
+        self.terminations: Dict[str, bool] = {}
+        self.truncations: Dict[str, bool] = {}
+        self.infos: Dict[str, Dict[str, Any]] = {}
+
+    def observation_space(self, agent: str):
+        return self._observation_space
+
+    def action_space(self, agent: str):
+        return self._action_space
+
+    def observe(self, agent: str) -> np.ndarray:
+        seat = AGENTS.index(agent)
+        return self.env.encode_observation(seat, out=self._obs[seat])
+
+    def _update_masks(self):
+        env = self.env
+        for seat, agent in enumerate(AGENTS):
+            if env.game_over:
+                self._masks[seat] = False
+            else:
+                env.legal_action_mask_array(seat, out=self._masks[seat])
+            self.infos[agent]["action_mask"] = self._masks[seat]
+
+    def reset(self, seed: Optional[int] = None, options: Optional[Dict[str, Any]] = None):
+        if seed is not None:
+            self.env.seed(seed)
+        self.env.reset()
+        self.agents = list(AGENTS)
+        self.rewards = {agent: 0.0 for agent in AGENTS}
+        self._cumulative_rewards = {agent: 0.0 for agent in AGENTS}
+        self.terminations = {agent: False for agent in AGENTS}
+        self.truncations = {agent: False for agent in AGENTS}
+        self.infos = {agent: {} for agent in AGENTS}
+        self.agent_selection = AGENTS[self.env.current_player]
+        self._update_masks()
+
+    def step(self, action: Optional[int]):
+        agent = self.agent_selection
+        if self.terminations[agent] or self.truncations[agent]:
+            # Dead step: remove the finished agent
+            if action is not None:
+                raise ValueError("Terminated agents must be stepped with None")
+            self.agents.remove(agent)
+            self._cumulative_rewards[agent] = 0.0
+            if self.agents:
+                self.agent_selection = self.agents[0]
+            return
+
+        env = self.env
+        seat = env.current_player
+        if not (env.legal_action_mask(seat) >> int(action)) & 1:
+            raise ValueError(f"Illegal action {action} for {agent} in phase {env.current_phase}")
+        self._cumulative_rewards[agent] = 0.0
+        _, _, reward, done, info = env.step(int(action))
+
+        for a in AGENTS:
+            self.rewards[a] = 0.0
+        if done:
+            # Zero-sum: reward is the acting seat's opponent score minus own score
+            self.rewards[agent] = float(reward)
+            self.rewards[AGENTS[1 - seat]] = -float(reward)
+            for a in AGENTS:
+                self.terminations[a] = True
+                self.infos[a]["final_scores"] = info["final_scores"]
+                self.infos[a]["round_winner"] = info["round_winner"]
+            # The opponent sees the result first
+            self.agent_selection = AGENTS[1 - seat]
+        else:
+            self.agent_selection = AGENTS[env.current_player]
+        for a in AGENTS:
+            self._cumulative_rewards[a] += self.rewards[a]
+        self._update_masks()
+
+    def last(self, observe: bool = True) -> Tuple[Optional[np.ndarray], float, bool, bool, Dict[str, Any]]:
+        agent = self.agent_selection
+        obs = self.observe(agent) if observe else None
+        return (obs, self._cumulative_rewards[agent], self.terminations[agent], self.truncations[agent],
+                self.infos[agent])
+
+    def action_mask(self, agent: str) -> np.ndarray:
+        return self._masks[AGENTS.index(agent)]
+
+    def render(self):
+        if self.render_mode == "human":
+            self.env.render()
+
+    def close(self):
+        pass
+
+
+# --- Vector environments --- #
+# Self-play: each observation belongs to the env's current player, rewards to the seat that acted.
+# Finished rounds reset within the same step (gymnasium's SAME_STEP autoreset): in the rows where
+# info['_final_obs'] / info['_final_info'] are set, info['final_obs'] holds the acting seat's terminal
+# observation and info['final_info'] the round's final_scores and round_winner. info['final_scores']
+# (valid where info['_final_scores']) is kept as a shortcut.
+
+def _add_final(info: Dict[str, Any], dones: np.ndarray, final_obs: np.ndarray, final_scores: np.ndarray):
+    """Adds the SAME_STEP final_obs / final_info entries, copies of the finished rows (zeros elsewhere)"""
+    dones = dones.copy()
+    final_obs = np.where(dones[:, None], final_obs, 0).astype(OBS_DTYPE)
+    final_scores = np.where(dones[:, None], final_scores, 0).astype(final_scores.dtype)
+    round_winner = np.where(final_scores[:, 0] < final_scores[:, 1], 0,
+                            np.where(final_scores[:, 1] < final_scores[:, 0], 1, -1))
+    info["final_obs"] = final_obs
+    info["_final_obs"] = dones
+    info["final_info"] = {"final_scores": final_scores, "_final_scores": dones,
+                          "round_winner": round_winner, "_round_winner": dones}
+    info["_final_info"] = dones
+    info["final_scores"] = final_scores
+    info["_final_scores"] = dones
+
+
+class SyncGolfVectorEnv(_VectorEnvBase):
+    """Gymnasium-style vector env over VecGolfEnvironment, stepped in this process"""
+    metadata = _same_step_metadata()
+
+    def __init__(self, num_envs: int, num_decks: int = 2, num_jokers: int = 4, seed: Optional[int] = None):
+        self.num_envs = num_envs
+        self.vec = VecGolfEnvironment(num_envs, num_decks=num_decks, num_jokers=num_jokers, seed=seed, autoreset=True)
+        self.single_observation_space = observation_space()
+        self.single_action_space = action_space()
+        if gymnasium is not None:
+            self.observation_space = gymnasium.vector.utils.batch_space(self.single_observation_space, num_envs)
+            self.action_space = gymnasium.vector.utils.batch_space(self.single_action_space, num_envs)
+        else:
+            self.observation_space = self.action_space = None
+        self._obs = observation_buffer(num_envs)
+        self._truncations = np.zeros(num_envs, dtype=bool)
+        self._masks = np.zeros((num_envs, NUM_ACTIONS), dtype=bool)
+        self._no_final = np.zeros(num_envs, dtype=bool)
+
+    def reset(self, seed: Optional[int] = None, options: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
+        if seed is not None:
+            self.vec.rng = np.random.default_rng(seed)
+        _, masks = self.vec.reset(obs_out=self._obs)
+        self._masks[:] = masks
+        return self._obs, {"action_mask": self._masks, "current_player": self.vec.current_player}
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        acting = self.vec.current_player.copy()
+        _, rewards, dones, masks, step_info = self.vec.step(actions, obs_out=self._obs)
+        self._masks[:] = masks
+        info = {"action_mask": self._masks, "current_player": self.vec.current_player, "acting_player": acting}
+        if "final_scores" in step_info:
+            _add_final(info, dones, step_info["final_obs"], step_info["final_scores"])
+        return self._obs, rewards, dones, self._truncations, info
+
+    def action_masks(self) -> np.ndarray:
+        return self._masks
+
+    def close(self, **kwargs):
+        pass
+
+
+class AsyncGolfVectorEnv(_VectorEnvBase):
+    """Gymnasium-style vector env over SubprocGolfEnvPool (worker processes, shared memory arrays)"""
+    metadata = _same_step_metadata()
+
+    def __init__(self, num_envs: int, num_workers: Optional[int] = None, seed: Optional[int] = None,
+                 num_decks: int = 2, num_jokers: int = 4, start_method: Optional[str] = None):
+        self.num_envs = num_envs
+        self.pool = SubprocGolfEnvPool(num_envs, num_workers=num_workers, seed=seed, start_method=start_method,
+                                       env_kwargs={"num_decks": num_decks, "num_jokers": num_jokers, "obs_type": "none"})
+        self.single_observation_space = observation_space()
+        self.single_action_space = action_space()
+        if gymnasium is not None:
+            self.observation_space = gymnasium.vector.utils.batch_space(self.single_observation_space, num_envs)
+            self.action_space = gymnasium.vector.utils.batch_space(self.single_action_space, num_envs)
+        else:
+            self.observation_space = self.action_space = None
+        self._truncations = np.zeros(num_envs, dtype=bool)
+        self._acting = np.zeros(num_envs, dtype=np.int8)
+
+    def reset(self, seed: Optional[int] = None, options: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
+        obs, masks = self.pool.reset(seed)
+        return obs, {"action_mask": masks, "current_player": self.pool.current_players}
+
+    def step_async(self, actions: np.ndarray):
+        self._acting[:] = self.pool.current_players
+        self.pool.step_async(actions)
+
+    def step_wait(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        obs, rewards, dones, masks, pool_info = self.pool.step_wait()
+        info = {"action_mask": masks, "current_player": pool_info["players"], "acting_player": self._acting}
+        if dones.any():
+            _add_final(info, dones, pool_info["final_obs"], pool_info["final_scores"])
+        return obs, rewards, dones, self._truncations, info
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        self.step_async(actions)
+        return self.step_wait()
+
+    def action_masks(self) -> np.ndarray:
+        return self.pool.masks
+
+    def close(self, **kwargs):
+        self.pool.close()
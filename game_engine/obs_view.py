@@ -0,0 +1,55 @@
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+
+class ObservationView(Mapping):
+    """Read-only dict-like get_observation of one seat, built field by field on first read
+
+    Like the array buffers of obs_type="array", a view follows its environment: values are
+    cached until the next step, reset or restore and then read again from the new state.
+    Use to_dict() to keep a copy.
+    """
+    __slots__ = ("env", "player_id", "fields", "_cache", "_version")
+
+    def __init__(self, env, player_id: int, fields: Optional[Sequence[str]] = None):
+        if fields is None:
+            fields = tuple(env.OBS_FIELDS)
+        else:
+            fields = tuple(fields)
+            unknown = set(fields).difference(env.OBS_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown observation fields {sorted(unknown)}")
+        self.env = env
+        self.player_id = player_id
+        self.fields: Tuple[str, ...] = fields
+        self._cache: Dict[str, Any] = {}
+        self._version = env._obs_version
+
+    def __getitem__(self, key: str) -> Any:
+        env = self.env
+        if self._version != env._obs_version:
+            self._cache.clear()
+            self._version = env._obs_version
+        cache = self._cache
+        if key in cache:
+            return cache[key]
+        if key not in self.fields:
+            raise KeyError(key)
+        value = cache[key] = env.OBS_FIELDS[key](env, self.player_id)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.fields)
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def __contains__(self, key) -> bool:
+        return key in self.fields
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict of every field at the current state"""
+        return {key: self[key] for key in self.fields}
+
+    def __repr__(self) -> str:
+        return f"ObservationView(player_id={self.player_id}, fields={len(self.fields)}, cached={len(self._cache)})"
@@ -1,32 +1,338 @@
-from .card import Card
+from .card import Card, CARDS, CARD_RANK_CODE, CARD_VALUE, NUM_RANK_CODES, RANK_VALUES
 from .constants import *
+from .zobrist import ZOBRIST_FACE_UP, ZOBRIST_FACE_DOWN_RANK, ZOBRIST_FACE_DOWN
+from .stats import PROFILED_PLAYER_METHODS
+from typing import List, Optional, Sequence, Dict, Any
+
+# Lines of the grid: rows 0-2 then columns 3-5 (bit l of Player.matched_lines is line l)
+LINES = tuple(tuple(range(r * GRID_DIM, (r + 1) * GRID_DIM)) for r in range(GRID_DIM)) \
+    + tuple(tuple(range(c, GRID_SIZE, GRID_DIM)) for c in range(GRID_DIM))
+# (row line, column line) of each slot
+SLOT_LINES = tuple((i // GRID_DIM, GRID_DIM + i % GRID_DIM) for i in range(GRID_SIZE))
+# Bits of the two lines through each slot
+SLOT_LINE_BITS = tuple((1 << r) | (1 << c) for r, c in SLOT_LINES)
+# Slots sharing a row or column with each slot (itself included)
+SLOT_NEIGHBOURS = tuple(tuple(sorted(set(LINES[r]) | set(LINES[c]))) for r, c in SLOT_LINES)
+# (line, other two slots) for the row and the column through each slot
+SLOT_LINE_OTHERS = tuple(tuple((line, tuple(j for j in LINES[line] if j != i)) for line in SLOT_LINES[i]) for i in range(GRID_SIZE))
+
+
+# --- Expected scores --- #
+# A slot scores unless its row or column matches, so with R/C the row/column match indicators
+#   E[score] = sum_i E[v_i] - 3 * sum_lines M(line) + sum_i M(row_i | col_i)
+# where M(S) = sum over ranks r of P(every slot of S has rank r) * value of r. Face down slots
+# (rank None) are drawn without replacement from unseen counts, which makes M a falling factorial ratio.
+
+def all_rank_probability(count: int, total: int, hidden: int) -> float:
+    """Probability that hidden cards drawn without replacement from total cards all come from the count of one rank"""
+    p = 1.0
+    for k in range(hidden):
+        if count <= k:
+            return 0.0
+        p *= (count - k) / (total - k)
+    return p
+
+def match_value(ranks: Sequence[Optional[int]], slots: Sequence[int], counts: Sequence[int], total: int) -> float:
+    """M(slots): expected value of the slots' common rank when they all match, 0 otherwise"""
+    known = None
+    hidden = 0
+    for i in slots:
+        rank = ranks[i]
+        if rank is None:
+            hidden += 1
+        elif known is None:
+            known = rank
+        elif rank != known:
+            return 0.0
+    if known is not None:
+        return all_rank_probability(counts[known], total, hidden) * RANK_VALUES[known]
+    return sum(all_rank_probability(counts[r], total, hidden) * RANK_VALUES[r] for r in range(NUM_RANK_CODES) if counts[r])
+
+def expected_grid_score(ranks: Sequence[Optional[int]], counts: Sequence[int]) -> float:
+    """Exact expected score of a grid of rank codes whose None slots are drawn from counts (cards per rank code)"""
+    total = sum(counts)
+    mean = sum(c * v for c, v in zip(counts, RANK_VALUES)) / total if total else 0.0
+    score = sum(mean if rank is None else RANK_VALUES[rank] for rank in ranks)
+    for line in LINES:
+        score -= 3 * match_value(ranks, line, counts, total)
+    for cross in SLOT_NEIGHBOURS:
+        score += match_value(ranks, cross, counts, total)
+    return score
+
 
 class Player: 
     """Players 3x3 grid of cards and their visibility"""
     
-    def __init__(self): 
+    # Cross-check incremental scores against full recomputation after every change
+    debug_scoring: bool = False
+    
+    def __init__(self, seat: int = 0): 
         # 3x3 Grid as flat list
         # Top Row:    0 1 2
         # Middle Row: 3 4 5
         # Bottom Row: 6 7 8
-        self.grid: List[Optional[Card]] = [None] * GRID_SIZE 
+        self.grid: List[Optional[int]] = [None] * GRID_SIZE # Card codes
         self.face_up: List[bool] = [False] * GRID_SIZE
+        self.face_down_mask: int = 0 # Bit i set when slot i holds a face down card
+        
+        # Incremental scoring, kept up to date by set_card and flip_card_up 
+        self.score: int = 0 # Full grid score (same as calculate_score once all slots hold a card)
+        self.visible_score: int = 0 # Score of face up cards, lines only match when all 3 are face up
+        self.matched_lines: int = 0 # Bit per line in LINES with three equal ranks 
+        self.visible_matched_lines: int = 0 # Matched lines whose cards are all face up
+        self._ranks: List[Optional[int]] = [None] * GRID_SIZE
+        self._slot_score: List[int] = [0] * GRID_SIZE
+        self._slot_visible_score: List[int] = [0] * GRID_SIZE
+        
+        # Zobrist hashes of the grid (see zobrist.py), kept up to date by set_card and flip_card_up 
+        self.seat = seat
+        self.zobrist: int = 0 # Face down cards keyed by rank
+        self.public_zobrist: int = 0 # Face down slots keyed as hidden
+        self._z_up = ZOBRIST_FACE_UP[seat]
+        self._z_down_rank = ZOBRIST_FACE_DOWN_RANK[seat]
+        self._z_down = ZOBRIST_FACE_DOWN[seat]
+    
+    def __getstate__(self) -> Dict[str, Any]: 
+        # Without the timing wrappers of an instrumented environment, which re-instruments on unpickling
+        state = self.__dict__.copy()
+        for name in PROFILED_PLAYER_METHODS: 
+            state.pop(name, None)
+        return state
+    
+    def clear(self): 
+        """Empties the grid in place for a new round"""
+        for i in range(GRID_SIZE): 
+            self.grid[i] = None
+            self.face_up[i] = False
+            self._ranks[i] = None
+            self._slot_score[i] = 0
+            self._slot_visible_score[i] = 0
+        self.face_down_mask = 0
+        self.score = 0
+        self.visible_score = 0
+        self.matched_lines = 0
+        self.visible_matched_lines = 0
+        self.zobrist = 0
+        self.public_zobrist = 0
+    
+    def load(self, cards, face_up_bits: int): 
+        """Replaces the whole grid in place (9 card codes, bit i of face_up_bits set if slot i is face up)"""
+        grid, face_up, ranks = self.grid, self.face_up, self._ranks
+        for i in range(GRID_SIZE): 
+            code = cards[i]
+            grid[i] = code
+            face_up[i] = bool(face_up_bits >> i & 1)
+            ranks[i] = CARD_RANK_CODE[code]
+        self.face_down_mask = ~face_up_bits & ((1 << GRID_SIZE) - 1)
+        self.zobrist = self.public_zobrist = 0
+        for i in range(GRID_SIZE): 
+            self._toggle_slot_keys(i)
+        self._recompute_scores()
+    
+    def _recompute_scores(self): 
+        """Rebuilds all incremental scoring state from a full grid"""
+        ranks, face_up, grid = self._ranks, self.face_up, self.grid
+        matched = visible_matched = 0
+        for line, (a, b, c) in enumerate(LINES): 
+            if ranks[a] == ranks[b] == ranks[c]: 
+                matched |= 1 << line
+                if face_up[a] and face_up[b] and face_up[c]: 
+                    visible_matched |= 1 << line
+        self.matched_lines = matched
+        self.visible_matched_lines = visible_matched
+        
+        score = visible_score = 0
+        for i in range(GRID_SIZE): 
+            value = CARD_VALUE[grid[i]]
+            line_bits = SLOT_LINE_BITS[i]
+            slot_score = 0 if matched & line_bits else value
+            slot_visible = value if face_up[i] and not visible_matched & line_bits else 0
+            self._slot_score[i] = slot_score
+            self._slot_visible_score[i] = slot_visible
+            score += slot_score
+            visible_score += slot_visible
+        self.score = score
+        self.visible_score = visible_score
+        
+        if self.debug_scoring: 
+            self.check_scores()
+    
+    def _toggle_slot_keys(self, index: int): 
+        """XORs the Zobrist keys of a slot's current contents into the hashes (in, or back out)"""
+        rank = self._ranks[index]
+        if rank is None: 
+            return
+        if self.face_up[index]: 
+            key = self._z_up[index][rank]
+            self.zobrist ^= key
+            self.public_zobrist ^= key
+        else: 
+            self.zobrist ^= self._z_down_rank[index][rank]
+            self.public_zobrist ^= self._z_down[index]
     
-    def set_card(self, index: int, card: Card, face_up: bool): 
-        """Places a card on grid"""
+    def set_card(self, index: int, card: int, face_up: bool): 
+        """Places a card code on grid"""
+        # Swap the slot's Zobrist keys (inlined _toggle_slot_keys out and in, this runs every step)
+        old = self._ranks[index]
+        rank = None if card is None else CARD_RANK_CODE[card]
+        z = self.zobrist
+        pz = self.public_zobrist
+        if old is not None: 
+            if self.face_up[index]: 
+                key = self._z_up[index][old]
+                z ^= key
+                pz ^= key
+            else: 
+                z ^= self._z_down_rank[index][old]
+                pz ^= self._z_down[index]
+        if rank is not None: 
+            if face_up: 
+                key = self._z_up[index][rank]
+                z ^= key
+                pz ^= key
+            else: 
+                z ^= self._z_down_rank[index][rank]
+                pz ^= self._z_down[index]
+        self.zobrist = z
+        self.public_zobrist = pz
+        
         self.grid[index] = card
         self.face_up[index] = face_up 
+        if face_up or card is None: 
+            self.face_down_mask &= ~(1 << index)
+        else: 
+            self.face_down_mask |= 1 << index
+        self._ranks[index] = rank
+        self._update_scores(index)
     
     def get_card(self, index):
-        """Retrieve card from grid"""
+        """Retrieve card code from grid"""
         return self.grid[index] 
+
+    def get_card_view(self, index) -> Optional[Card]:
+        """Retrieve Card view from grid"""
+        code = self.grid[index]
+        return None if code is None else CARDS[code]
     
     def is_face_up(self, index):
         return self.face_up[index]
     
     def flip_card_up(self, index): 
         """Turns a card face-up"""
+        rank = self._ranks[index]
+        if rank is not None and not self.face_up[index]: 
+            key = self._z_up[index][rank]
+            self.zobrist ^= self._z_down_rank[index][rank] ^ key
+            self.public_zobrist ^= self._z_down[index] ^ key
         self.face_up[index] = True
+        self.face_down_mask &= ~(1 << index)
+        self._update_scores(index)
+    
+    def _update_scores(self, index: int): 
+        """Refresh line matches and slot scores around a changed slot"""
+        ranks = self._ranks
+        face_up = self.face_up
+        
+        # Row and column through the slot 
+        for line in SLOT_LINES[index]: 
+            a, b, c = LINES[line]
+            bit = 1 << line
+            if ranks[a] is not None and ranks[a] == ranks[b] == ranks[c]: 
+                self.matched_lines |= bit
+                if face_up[a] and face_up[b] and face_up[c]: 
+                    self.visible_matched_lines |= bit
+                else: 
+                    self.visible_matched_lines &= ~bit
+            else: 
+                self.matched_lines &= ~bit
+                self.visible_matched_lines &= ~bit
+        
+        # Only slots on those lines can change contribution 
+        for i in SLOT_NEIGHBOURS[index]: 
+            code = self.grid[i]
+            value = 0 if code is None else CARD_VALUE[code]
+            line_bits = SLOT_LINE_BITS[i]
+            
+            new_score = 0 if self.matched_lines & line_bits else value
+            self.score += new_score - self._slot_score[i]
+            self._slot_score[i] = new_score
+            
+            new_visible = 0 if (not face_up[i] or self.visible_matched_lines & line_bits) else value
+            self.visible_score += new_visible - self._slot_visible_score[i]
+            self._slot_visible_score[i] = new_visible
+        
+        if self.debug_scoring: 
+            self.check_scores()
+    
+    # --- Replacement deltas --- #
+    
+    def replacement_deltas(self, card: int, unseen_counts: Optional[Sequence[int]] = None) -> List[float]: 
+        """Score change of placing card face up in each of the 9 slots, matches made or broken included
+        
+        Without unseen_counts the change of the exact score (face down cards as they are, the
+        engine's view). With unseen_counts (cards per rank code that may be face down, e.g.
+        GolfEnvironment.unseen_counts(seat)) the change of the expected score from the owner's
+        view, with the face down cards unknown. 
+        """
+        if unseen_counts is not None: 
+            return self._expected_replacement_deltas(CARD_RANK_CODE[card], unseen_counts)
+        
+        ranks = self._ranks
+        grid = self.grid
+        slot_score = self._slot_score
+        rank = CARD_RANK_CODE[card]
+        value = CARD_VALUE[card]
+        deltas = []
+        for i in range(GRID_SIZE): 
+            # Lines through the slot after the placement
+            matched = self.matched_lines & ~SLOT_LINE_BITS[i]
+            for line, (a, b) in SLOT_LINE_OTHERS[i]: 
+                if ranks[a] == rank and ranks[b] == rank: 
+                    matched |= 1 << line
+            # Only the row and column through the slot change
+            delta = 0
+            for j in SLOT_NEIGHBOURS[i]: 
+                if matched & SLOT_LINE_BITS[j]: 
+                    new_score = 0
+                elif j == i: 
+                    new_score = value
+                else: 
+                    new_score = CARD_VALUE[grid[j]]
+                delta += new_score - slot_score[j]
+            deltas.append(delta)
+        return deltas
+    
+    def _expected_replacement_deltas(self, rank: int, counts: Sequence[int]) -> List[float]: 
+        # Terms of expected_grid_score that involve a slot: its value, its row and column and
+        # the row-column crosses of the slots sharing a line with it
+        ranks = [self._ranks[i] if self.face_up[i] else None for i in range(GRID_SIZE)]
+        total = sum(counts)
+        mean = sum(c * v for c, v in zip(counts, RANK_VALUES)) / total if total else 0.0
+        line_before = [match_value(ranks, line, counts, total) for line in LINES]
+        cross_before = [match_value(ranks, cross, counts, total) for cross in SLOT_NEIGHBOURS]
+        value = RANK_VALUES[rank]
+        deltas = []
+        for i in range(GRID_SIZE): 
+            old = ranks[i]
+            delta = value - (mean if old is None else RANK_VALUES[old])
+            ranks[i] = rank
+            for line in SLOT_LINES[i]: 
+                delta -= 3 * (match_value(ranks, LINES[line], counts, total) - line_before[line])
+            for j in SLOT_NEIGHBOURS[i]: 
+                delta += match_value(ranks, SLOT_NEIGHBOURS[j], counts, total) - cross_before[j]
+            ranks[i] = old
+            deltas.append(delta)
+        return deltas
+    
+    def check_scores(self): 
+        """Raises AssertionError if incremental scores disagree with full recomputation"""
+        visible = self.calculate_visible_score()
+        if visible != self.visible_score: 
+            raise AssertionError(f"Incremental visible score {self.visible_score} != recomputed {visible}")
+        if None not in self.grid: 
+            full = self.calculate_score()
+            if full != self.score: 
+                raise AssertionError(f"Incremental score {self.score} != recomputed {full}")
     
     def get_face_up_cards(self):
         """ Returns list of all face-up cards"""
@@ -47,34 +353,51 @@ class Player:
         """Calculates score for grid"""
         total_score = 0 
         matched_idx = set()
+        ranks = [CARD_RANK_CODE[code] for code in self.grid]
 
         # Check columns (0,3,6), (1,4,7), (2,5,8)
         for col_start in range(GRID_DIM): 
-            # Get cards at each column set
+            # Get ranks at each column set
             idx = [col_start, col_start + GRID_DIM, col_start + 2 * GRID_DIM]
-            cards = [self.grid[i] for i in idx]
             # Check match
-            if cards[0].rank == cards[1].rank == cards[2].rank: 
+            if ranks[idx[0]] == ranks[idx[1]] == ranks[idx[2]]: 
                 matched_idx.update(idx)
 
         # Check rows (0,1,2), (3,4,5), (6,7,8)
-        for row_start in range(GRID_DIM):
-            # Get  cards at each row sset
+        for row_start in range(0, GRID_SIZE, GRID_DIM):
+            # Get ranks at each row set
             idx = [row_start, row_start + 1, row_start + 2]
-            cards = [self.grid[i] for i in idx]
 
             # Check match
-            if cards[0].rank == cards[1].rank == cards[2].rank: 
+            if ranks[idx[0]] == ranks[idx[1]] == ranks[idx[2]]: 
                 matched_idx.update(idx)
 
 
         # Sum rank values of non-matched cards 
         for i in range(GRID_SIZE): 
             if i not in matched_idx: 
-                card = self.grid[i]
-                total_score = total_score + card.get_value()
+                total_score = total_score + CARD_VALUE[self.grid[i]]
 
         return total_score 
+    
+    def calculate_visible_score(self): 
+        """Calculates score of face up cards, a line only matches if all its cards are face up"""
+        total_score = 0 
+        matched_idx = set()
+        
+        # Check rows and columns 
+        for idx in LINES: 
+            cards = [self.grid[i] for i in idx]
+            if all(self.face_up[i] for i in idx) and None not in cards: 
+                if CARD_RANK_CODE[cards[0]] == CARD_RANK_CODE[cards[1]] == CARD_RANK_CODE[cards[2]]: 
+                    matched_idx.update(idx)
+        
+        # Sum rank values of face up, non-matched cards 
+        for i in range(GRID_SIZE): 
+            if self.face_up[i] and self.grid[i] is not None and i not in matched_idx: 
+                total_score = total_score + CARD_VALUE[self.grid[i]]
+        
+        return total_score 
    
     def __str__(self):
         """Text representation of the grid."""
@@ -83,7 +406,7 @@ class Player:
             line = []
             for c in range(GRID_DIM):
                 idx = r * GRID_DIM + c
-                card = self.grid[idx]
+                card = self.get_card_view(idx)
                 if card is None:
                     line.append("[ ]")
                 elif self.face_up[idx]:
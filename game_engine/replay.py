@@ -0,0 +1,157 @@
+import struct
+from typing import NamedTuple, Tuple, List, Iterator, Optional, Callable, BinaryIO, Sequence
+from .constants import *
+from .events import *
+from .environment import GolfEnvironment
+
+# Compact game record format
+# ---------------------------
+# A round is fully determined by its round seed (GolfEnvironment.round_seed), the deck
+# configuration and the action ids, so that is all a record stores (about 50 bytes a game).
+# File starts with REPLAY_MAGIC, followed by one record per game:
+# Header (_RECORD): uint64 round seed, uint8 num decks, uint8 num jokers, uint16 number of actions
+# Then:             action ids, ACTION_BITS each, packed little-endian and padded to a whole byte
+REPLAY_MAGIC = b"GOLFRPL1"
+ACTION_BITS = 5
+_ACTION_MASK = (1 << ACTION_BITS) - 1
+_RECORD = struct.Struct("<QBBH")
+
+
+class GameRecord(NamedTuple):
+    """One round: round seed, deck configuration and the action ids in order"""
+    seed: int
+    num_decks: int
+    num_jokers: int
+    actions: Tuple[int, ...]
+
+
+def pack_actions(actions: Sequence[int]) -> bytes:
+    """ACTION_BITS per action id, little-endian"""
+    value = 0
+    for i, action_id in enumerate(actions):
+        value |= action_id << (i * ACTION_BITS)
+    return value.to_bytes((len(actions) * ACTION_BITS + 7) // 8, "little")
+
+def unpack_actions(data: bytes, num_actions: int) -> Tuple[int, ...]:
+    value = int.from_bytes(data, "little")
+    return tuple((value >> (i * ACTION_BITS)) & _ACTION_MASK for i in range(num_actions))
+
+
+def encode_record(record: GameRecord) -> bytes:
+    """Binary form of a record"""
+    if not 0 <= record.seed < 1 << 64:
+        raise ValueError(f"Round seed {record.seed} does not fit the record format (0 <= seed < 2**64)")
+    return _RECORD.pack(record.seed, record.num_decks, record.num_jokers, len(record.actions)) + pack_actions(record.actions)
+
+def decode_records(data: bytes, pos: int = 0) -> Iterator[GameRecord]:
+    """Yields the records stored back to back in data from pos"""
+    while pos < len(data):
+        seed, num_decks, num_jokers, num_actions = _RECORD.unpack_from(data, pos)
+        pos += _RECORD.size
+        size = (num_actions * ACTION_BITS + 7) // 8
+        if pos + size > len(data):
+            raise ValueError(f"Truncated game record at byte {pos - _RECORD.size}")
+        yield GameRecord(seed, num_decks, num_jokers, unpack_actions(data[pos:pos + size], num_actions))
+        pos += size
+
+
+# --- Recording --- #
+
+class GameRecorder:
+    """Listener building a GameRecord per round of env, passed to sink (or kept in records)
+
+    Rounds must be dealt from the round seed (env.reset() or env.reset(seed=...)), not a deck_order.
+    """
+
+    def __init__(self, env, sink: Optional[Callable[[GameRecord], None]] = None):
+        self.env = env
+        self.sink = sink
+        self.records: List[GameRecord] = []
+        self._seed: Optional[int] = None
+        self._actions: List[int] = []
+        env.subscribe(self)
+
+    def __call__(self, event: Event):
+        if isinstance(event, StepEvent):
+            self._actions.append(event.action_id)
+        elif isinstance(event, ResetEvent):
+            if not self.env.dealt_from_seed:
+                raise ValueError("Rounds dealt from a deck_order cannot be recorded by seed")
+            self._seed = self.env.round_seed
+            self._actions.clear()
+        elif isinstance(event, RoundEndEvent) and self._seed is not None:
+            record = GameRecord(self._seed, self.env.num_decks, self.env.num_jokers, tuple(self._actions))
+            self._seed = None
+            if self.sink is not None:
+                self.sink(record)
+            else:
+                self.records.append(record)
+
+    def close(self):
+        """Stops recording"""
+        self.env.unsubscribe(self)
+
+
+class ReplayWriter:
+    """Append-only file of game records, read back with read_replays"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: BinaryIO = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(REPLAY_MAGIC)
+
+    def __call__(self, record: GameRecord):
+        self._file.write(encode_record(record))
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self) -> "ReplayWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_replays(path: str) -> Iterator[GameRecord]:
+    """Yields the records stored in a replay file"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(REPLAY_MAGIC):
+        raise ValueError(f"{path} is not a replay file")
+    yield from decode_records(data, len(REPLAY_MAGIC))
+
+
+# --- Re-simulation --- #
+
+def iter_replay(record: GameRecord, env: Optional[GolfEnvironment] = None) -> Iterator[Tuple[int, GolfEnvironment]]:
+    """Re-simulates a record, yielding each action id with the env before the action is applied
+
+    Pass an env (matching the record's deck configuration) to reuse it, e.g. obs_type="none"
+    for speed when deriving training data with encode_observation.
+    """
+    if env is None:
+        env = GolfEnvironment(num_decks=record.num_decks, num_jokers=record.num_jokers, obs_type="none")
+    elif (env.num_decks, env.num_jokers) != (record.num_decks, record.num_jokers):
+        raise ValueError("Environment deck configuration does not match the record")
+    env.reset(seed=record.seed)
+    for action_id in record.actions:
+        if env.game_over:
+            raise ValueError("Record has actions after the end of the round")
+        yield action_id, env
+        env.step(action_id)
+    if not env.game_over:
+        raise ValueError("Record ends before the end of the round")
+
+def replay(record: GameRecord, env: Optional[GolfEnvironment] = None) -> GolfEnvironment:
+    """Re-simulates a record to the end of the round, returns the environment"""
+    if env is None:
+        env = GolfEnvironment(num_decks=record.num_decks, num_jokers=record.num_jokers, obs_type="none")
+    for _ in iter_replay(record, env):
+        pass
+    return env
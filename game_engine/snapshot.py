@@ -0,0 +1,105 @@
+import struct
+from typing import Any, Optional
+from .constants import *
+
+NO_CARD_BYTE = 0xFF
+
+# Packed state layout
+# ---------------------------
+# Header (_HEADER): phase, current player, final turn player (-1 none), drawn card (0xFF none),
+#                   initial flips p0/p1, turn count, round over, game over, scores p0/p1,
+#                   face up bitmask p0/p1, stock size, discard size
+# Then:             p0 grid codes (9), p1 grid codes (9), stock codes (bottom to top),
+#                   discard codes (bottom to top)
+_HEADER = struct.Struct("<BBbBBBH??hhHHHH")
+
+
+class EnvSnapshot:
+    """Immutable packed GolfEnvironment state
+
+    Equality and hashing use the game state only, so equal positions reached with
+    different random states compare equal (usable as cache / transposition keys).
+    """
+    __slots__ = ("data", "rng_state")
+
+    def __init__(self, data: bytes, rng_state: Optional[Any] = None):
+        object.__setattr__(self, "data", data)
+        object.__setattr__(self, "rng_state", rng_state)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("EnvSnapshot is immutable")
+
+    def __reduce__(self):
+        return (EnvSnapshot, (self.data, self.rng_state))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, EnvSnapshot) and self.data == other.data
+
+    def __hash__(self) -> int:
+        return hash(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __repr__(self) -> str:
+        return f"EnvSnapshot({len(self.data)} bytes)"
+
+
+def _face_up_bits(player) -> int:
+    bits = 0
+    for i in range(GRID_SIZE):
+        if player.face_up[i]:
+            bits |= 1 << i
+    return bits
+
+
+def snapshot_env(env, include_rng: bool = False) -> EnvSnapshot:
+    """Packs the full state of a two-player GolfEnvironment"""
+    p0, p1 = env.players
+    header = _HEADER.pack(
+        env.current_phase,
+        env.current_player,
+        -1 if env.final_turn_player_idx is None else env.final_turn_player_idx,
+        NO_CARD_BYTE if env.drawn_card is None else env.drawn_card,
+        env.initial_flips_count[0], env.initial_flips_count[1],
+        env.turn_count,
+        env.round_over, env.game_over,
+        env.scores[0], env.scores[1],
+        _face_up_bits(p0), _face_up_bits(p1),
+        len(env.deck.cards), len(env.discard_pile),
+    )
+    data = header + bytes(p0.grid) + bytes(p1.grid) + bytes(env.deck.cards) + bytes(env.discard_pile)
+    rng_state = (env.round_seed, env._reshuffles, env._seed_base, env._rounds_dealt) if include_rng else None
+    return EnvSnapshot(data, rng_state)
+
+
+def restore_env(env, state: EnvSnapshot):
+    """Loads a snapshot into an existing two-player GolfEnvironment, reusing its objects"""
+    data = state.data
+    (phase, current_player, final_turn, drawn, flips0, flips1, turn_count, round_over, game_over,
+     score0, score1, up0, up1, stock_size, discard_size) = _HEADER.unpack_from(data)
+
+    pos = _HEADER.size
+    for player, up in zip(env.players, (up0, up1)):
+        player.load(data[pos:pos + GRID_SIZE], up)
+        pos += GRID_SIZE
+    env.deck.cards[:] = data[pos:pos + stock_size]
+    pos += stock_size
+    env.discard_pile[:] = data[pos:pos + discard_size]
+
+    env.current_phase = phase
+    env.current_player = current_player
+    env.final_turn_player_idx = None if final_turn < 0 else final_turn
+    env.drawn_card = None if drawn == NO_CARD_BYTE else drawn
+    env.initial_flips_count[0] = flips0
+    env.initial_flips_count[1] = flips1
+    env.turn_count = turn_count
+    env.round_over = round_over
+    env.game_over = game_over
+    env.scores[0] = score0
+    env.scores[1] = score1
+    env._recompute_unseen_counts()
+
+    if state.rng_state is not None:
+        # rng is reseeded before every shuffle, the seeds and counters are the whole random state
+        env.round_seed, env._reshuffles, env._seed_base, env._rounds_dealt = state.rng_state
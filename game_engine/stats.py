@@ -0,0 +1,285 @@
+from time import perf_counter_ns
+from typing import List, Dict, Any, Optional, Iterable, Callable
+from .constants import *
+from .encoding import NUM_PHASES
+
+# Opt-in timing counters (GolfEnvironment.enable_stats / profile=True)
+# ---------------------------
+# Enabling stats shadows the methods below with timing wrappers on the instance (and its
+# players), so an environment without stats runs the plain methods with no overhead at all.
+# Times are inclusive: step also contains the get_observation calls it makes.
+PROFILED_METHODS = (
+    "step", "step_unchecked", "reset", "get_observation", "encode_observation",
+    "get_legal_actions", "legal_action_mask", "legal_action_mask_array", "is_legal",
+    "snapshot", "restore", "clone",
+)
+PROFILED_PLAYER_METHODS = ("calculate_score", "calculate_visible_score")
+STEP_METHODS = ("step", "step_unchecked")
+
+# Time between the end of a step (or reset) and the next step: agent and driver code
+BETWEEN_STEPS = "between_steps"
+
+PHASE_LABELS = ("initial_flip", "start_turn", "draw_stock_decision", "draw_discard_decision", "must_flip", "game_over")
+
+# Step latency histogram: bucket b counts steps of [2^(b-1), 2^b) ns, the last bucket everything slower
+LATENCY_BUCKETS = 32
+
+
+def _latency_bucket(ns: int) -> int:
+    return min(ns.bit_length(), LATENCY_BUCKETS - 1)
+
+def bucket_upper_ns(bucket: int) -> Optional[int]:
+    """Exclusive upper bound of a latency bucket in ns (None for the overflow bucket)"""
+    return None if bucket == LATENCY_BUCKETS - 1 else 1 << bucket
+
+
+class EnvStats:
+    """Call counts, cumulative perf_counter_ns times and per-phase step latencies
+
+    Plain ints and lists, so stats pickle to other processes and merge with merge()/sum().
+    """
+
+    def __init__(self):
+        self.calls: Dict[str, int] = {}
+        self.time_ns: Dict[str, int] = {}
+        self.phase_steps: List[int] = [0] * NUM_PHASES # Steps started in each phase
+        self.phase_ns: List[int] = [0] * NUM_PHASES
+        self.phase_hist: List[List[int]] = [[0] * LATENCY_BUCKETS for _ in range(NUM_PHASES)]
+        self.first_ns: Optional[int] = None # Wall window from the first to the last recorded step
+        self.last_ns: Optional[int] = None
+        self._exit_ns: Optional[int] = None # End of the last step or reset, start of agent time
+
+    @property
+    def steps(self) -> int:
+        return sum(self.phase_steps)
+
+    def clear(self):
+        self.__init__()
+
+    # --- Recording --- #
+
+    def add(self, name: str, ns: int, calls: int = 1):
+        self.calls[name] = self.calls.get(name, 0) + calls
+        self.time_ns[name] = self.time_ns.get(name, 0) + ns
+
+    def record_step(self, phase: int, start_ns: int, end_ns: int):
+        ns = end_ns - start_ns
+        self.phase_steps[phase] += 1
+        self.phase_ns[phase] += ns
+        self.phase_hist[phase][_latency_bucket(ns)] += 1
+        if self._exit_ns is not None:
+            self.add(BETWEEN_STEPS, start_ns - self._exit_ns)
+        if self.first_ns is None:
+            self.first_ns = start_ns
+        self.last_ns = self._exit_ns = end_ns
+
+    # --- Merging --- #
+
+    def merge(self, other: "EnvStats") -> "EnvStats":
+        """Adds other's counters into self (in place), returns self
+
+        The wall window becomes the span of both, which assumes the same machine clock
+        (perf_counter_ns is monotonic system-wide on Linux, so worker processes qualify).
+        """
+        for name, calls in other.calls.items():
+            self.add(name, other.time_ns[name], calls)
+        for phase in range(NUM_PHASES):
+            self.phase_steps[phase] += other.phase_steps[phase]
+            self.phase_ns[phase] += other.phase_ns[phase]
+            hist = self.phase_hist[phase]
+            for b, count in enumerate(other.phase_hist[phase]):
+                hist[b] += count
+        if other.first_ns is not None:
+            self.first_ns = other.first_ns if self.first_ns is None else min(self.first_ns, other.first_ns)
+            self.last_ns = other.last_ns if self.last_ns is None else max(self.last_ns, other.last_ns)
+        return self
+
+    @classmethod
+    def merged(cls, stats: Iterable["EnvStats"]) -> "EnvStats":
+        """New EnvStats holding the sum of stats"""
+        total = cls()
+        for s in stats:
+            total.merge(s)
+        return total
+
+    def __add__(self, other: "EnvStats") -> "EnvStats":
+        return EnvStats.merged((self, other))
+
+    def __radd__(self, other) -> "EnvStats":
+        # sum() starts from 0
+        if other == 0:
+            return EnvStats.merged((self,))
+        return NotImplemented
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_exit_ns"] = None # Agent time does not continue in another process
+        return state
+
+    # --- Summaries --- #
+
+    def steps_per_s(self) -> float:
+        """Wall throughput: steps over the window from the first to the last step"""
+        if self.first_ns is None or self.last_ns == self.first_ns:
+            return 0.0
+        return self.steps * 1e9 / (self.last_ns - self.first_ns)
+
+    def env_steps_per_s(self) -> float:
+        """Engine throughput: steps over the time spent inside step calls"""
+        ns = sum(self.phase_ns)
+        return self.steps * 1e9 / ns if ns else 0.0
+
+    def phase_percentile_ns(self, phase: int, q: float) -> Optional[int]:
+        """Upper bucket bound (ns) below which a fraction q of the phase's steps finished"""
+        hist = self.phase_hist[phase]
+        target = q * sum(hist)
+        seen = 0
+        for b, count in enumerate(hist):
+            seen += count
+            if count and seen >= target:
+                return bucket_upper_ns(b)
+        return None
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-method calls/total/mean, per-phase step counts and latencies, throughput gauges"""
+        methods = {
+            name: {"calls": calls, "total_ms": self.time_ns[name] / 1e6, "mean_us": self.time_ns[name] / calls / 1e3}
+            for name, calls in sorted(self.calls.items(), key=lambda item: -self.time_ns[item[0]])
+        }
+        phases = {}
+        for phase in range(NUM_PHASES):
+            steps = self.phase_steps[phase]
+            if not steps:
+                continue
+            p50, p99 = (self.phase_percentile_ns(phase, q) for q in (0.5, 0.99))
+            phases[PHASE_LABELS[phase]] = {
+                "steps": steps,
+                "mean_us": self.phase_ns[phase] / steps / 1e3,
+                "p50_us_le": None if p50 is None else p50 / 1e3,
+                "p99_us_le": None if p99 is None else p99 / 1e3,
+            }
+        return {
+            "steps": self.steps,
+            "steps_per_s": self.steps_per_s(),
+            "env_steps_per_s": self.env_steps_per_s(),
+            "methods": methods,
+            "phases": phases,
+        }
+
+    # --- Export --- #
+
+    def to_text(self) -> str:
+        """Human readable table"""
+        s = self.summary()
+        lines = [f"steps {s['steps']}  steps/s {s['steps_per_s']:.0f}  env steps/s {s['env_steps_per_s']:.0f}", "",
+                 f"{'method':24s} {'calls':>10s} {'total ms':>10s} {'mean us':>9s}"]
+        for name, m in s["methods"].items():
+            lines.append(f"{name:24s} {m['calls']:10d} {m['total_ms']:10.1f} {m['mean_us']:9.2f}")
+        lines += ["", f"{'step phase':24s} {'steps':>10s} {'mean us':>10s} {'p50 us<=':>9s} {'p99 us<=':>9s}"]
+        for label, p in s["phases"].items():
+            p50 = f"{p['p50_us_le']:9.2f}" if p["p50_us_le"] is not None else f"{'inf':>9s}"
+            p99 = f"{p['p99_us_le']:9.2f}" if p["p99_us_le"] is not None else f"{'inf':>9s}"
+            lines.append(f"{label:24s} {p['steps']:10d} {p['mean_us']:10.2f} {p50} {p99}")
+        return "\n".join(lines)
+
+    def to_prometheus(self, prefix: str = "golf_env", labels: Optional[Dict[str, str]] = None) -> str:
+        """Prometheus text exposition format (counters, gauges and cumulative step latency histograms)"""
+        extra = "".join(f',{k}="{v}"' for k, v in (labels or {}).items())
+        base = "{" + extra[1:] + "}" if extra else ""
+        out = [
+            f"# HELP {prefix}_calls_total Calls per environment method",
+            f"# TYPE {prefix}_calls_total counter",
+        ]
+        out += [f'{prefix}_calls_total{{method="{name}"{extra}}} {calls}' for name, calls in sorted(self.calls.items())]
+        out += [
+            f"# HELP {prefix}_time_seconds_total Cumulative time per environment method (inclusive)",
+            f"# TYPE {prefix}_time_seconds_total counter",
+        ]
+        out += [f'{prefix}_time_seconds_total{{method="{name}"{extra}}} {ns / 1e9:.9f}' for name, ns in sorted(self.time_ns.items())]
+        out += [
+            f"# HELP {prefix}_steps_per_second Steps per second of wall time",
+            f"# TYPE {prefix}_steps_per_second gauge",
+            f"{prefix}_steps_per_second{base} {self.steps_per_s():.3f}",
+            f"# HELP {prefix}_env_steps_per_second Steps per second spent inside step",
+            f"# TYPE {prefix}_env_steps_per_second gauge",
+            f"{prefix}_env_steps_per_second{base} {self.env_steps_per_s():.3f}",
+            f"# HELP {prefix}_step_latency_seconds Step latency by the phase the step started in",
+            f"# TYPE {prefix}_step_latency_seconds histogram",
+        ]
+        for phase in range(NUM_PHASES):
+            label = f'phase="{PHASE_LABELS[phase]}"{extra}'
+            cumulative = 0
+            for b, count in enumerate(self.phase_hist[phase]):
+                cumulative += count
+                upper = bucket_upper_ns(b)
+                le = "+Inf" if upper is None else f"{upper / 1e9:.9g}"
+                out.append(f'{prefix}_step_latency_seconds_bucket{{{label},le="{le}"}} {cumulative}')
+            out.append(f"{prefix}_step_latency_seconds_sum{{{label}}} {self.phase_ns[phase] / 1e9:.9f}")
+            out.append(f"{prefix}_step_latency_seconds_count{{{label}}} {self.phase_steps[phase]}")
+        return "\n".join(out) + "\n"
+
+    def __repr__(self) -> str:
+        return f"EnvStats(steps={self.steps}, methods={len(self.calls)})"
+
+
+# --- Instrumentation --- #
+
+def _timed(stats: EnvStats, name: str, method: Callable) -> Callable:
+    add = stats.add
+    def timed(*args, **kwargs):
+        start = perf_counter_ns()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            add(name, perf_counter_ns() - start)
+    return timed
+
+def _timed_step(env, stats: EnvStats, name: str, method: Callable) -> Callable:
+    add = stats.add
+    record_step = stats.record_step
+    def timed_step(action_id):
+        # Steps that raise are not recorded
+        phase = env.current_phase
+        start = perf_counter_ns()
+        result = method(action_id)
+        end = perf_counter_ns()
+        add(name, end - start)
+        record_step(phase, start, end)
+        return result
+    return timed_step
+
+def _timed_reset(stats: EnvStats, method: Callable) -> Callable:
+    add = stats.add
+    def timed_reset(*args, **kwargs):
+        start = perf_counter_ns()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            end = perf_counter_ns()
+            add("reset", end - start)
+            stats._exit_ns = end
+    return timed_reset
+
+def instrument(env, stats: EnvStats):
+    """Shadows the profiled methods of env and its players with timing wrappers"""
+    cls = type(env)
+    for name in PROFILED_METHODS:
+        method = getattr(cls, name).__get__(env)
+        if name in STEP_METHODS:
+            wrapper = _timed_step(env, stats, name, method)
+        elif name == "reset":
+            wrapper = _timed_reset(stats, method)
+        else:
+            wrapper = _timed(stats, name, method)
+        setattr(env, name, wrapper)
+    for player in env.players:
+        for name in PROFILED_PLAYER_METHODS:
+            setattr(player, name, _timed(stats, "player." + name, getattr(type(player), name).__get__(player)))
+
+def uninstrument(env):
+    """Removes the wrappers installed by instrument"""
+    for name in PROFILED_METHODS:
+        env.__dict__.pop(name, None)
+    for player in env.players:
+        for name in PROFILED_PLAYER_METHODS:
+            player.__dict__.pop(name, None)
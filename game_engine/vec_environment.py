@@ -0,0 +1,492 @@
+import json
+import numpy as np
+from typing import Tuple, Dict, Any, Optional
+from .constants import *
+from .card import NUM_RANK_CODES, RANK_VALUES, CARD_RANK_CODE
+from .deck import deck_template, rank_composition
+from .encoding import *
+from .player import LINES, SLOT_LINES, SLOT_NEIGHBOURS
+from .checkpoint import VEC_ENV_FORMAT, write_checkpoint, read_checkpoint
+
+# Games are stored as rank codes (see card.py), suits never affect play
+NO_CARD = -1
+RANK_CODE_VALUES = np.array(RANK_VALUES, dtype=np.int16)
+# Arrays that hold the games (everything a checkpoint saves besides the generator)
+STATE_FIELDS = (
+    "grids", "face_up", "stock", "stock_top", "discard", "discard_size", "drawn_card", "current_phase",
+    "current_player", "initial_flips_count", "final_turn_player_idx", "turn_count", "scores", "unseen_counts",
+)
+
+
+# --- Replacement deltas --- #
+# Batched Player.replacement_deltas over the terms of the expected score (see player.py) that
+# involve the placed slot i: its row and column M(line), weighted -3, and the row-column crosses
+# M(cross_j) of the 5 slots j sharing a line with it. Per slot, the other slots of those 7 sets
+# are a lookup table padded with _ABSENT, so a set's term after the placement only depends on
+# the others' common known rank, their number of face down cards and the card placed.
+_ABSENT = GRID_SIZE # Padding slot index, its rank is never known and never hidden
+_ABSENT_RANK = NO_CARD - 1
+SLOT_SET_OTHERS = np.full((GRID_SIZE, 7, 4), _ABSENT, dtype=np.int64)
+for _i in range(GRID_SIZE):
+    for _k, _line in enumerate(SLOT_LINES[_i]):
+        _others = [j for j in LINES[_line] if j != _i]
+        SLOT_SET_OTHERS[_i, _k, :len(_others)] = _others
+    for _k, _j in enumerate(SLOT_NEIGHBOURS[_i]):
+        SLOT_SET_OTHERS[_i, 2 + _k] = [j for j in SLOT_NEIGHBOURS[_j] if j != _i]
+SLOT_SET_WEIGHTS = np.array([-3.0, -3.0, 1.0, 1.0, 1.0, 1.0, 1.0])
+_MAX_HIDDEN = 5
+_ANY_RANK = NUM_RANK_CODES # Column of the match table for a set of face down cards only
+_VALUES_F = RANK_CODE_VALUES.astype(np.float64)
+
+
+def all_rank_probabilities(counts: np.ndarray) -> np.ndarray:
+    """(B, 6, 14): probability that h cards drawn without replacement from counts[b] all have rank r"""
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum(axis=1, keepdims=True)
+    probs = np.ones((len(counts), _MAX_HIDDEN + 1, NUM_RANK_CODES))
+    for h in range(1, _MAX_HIDDEN + 1):
+        probs[:, h] = probs[:, h - 1] * np.maximum(counts - (h - 1), 0) / np.maximum(total - (h - 1), 1)
+    return probs
+
+def replacement_deltas(ranks: np.ndarray, cards: np.ndarray, unseen_counts: Optional[np.ndarray] = None) -> np.ndarray:
+    """Score change of placing cards face up in each slot of many grids (batched Player.replacement_deltas)
+
+    ranks: (B, 9) rank codes. Without unseen_counts every slot must hold its actual card and
+    the result is the exact change. With unseen_counts (B, 14), NO_CARD slots are face down
+    cards drawn from those counts and the result is the change of the expected score.
+    cards: (B,) or (B, K) candidate rank codes, returns (B, 9) or (B, K, 9).
+    """
+    ranks = np.asarray(ranks, dtype=np.int8)
+    cards = np.asarray(cards, dtype=np.intp)
+    single = cards.ndim == 1
+    cards = cards.reshape(len(cards), -1)
+    b = len(ranks)
+    if unseen_counts is None:
+        # Nothing is hidden, only the 0 hidden cards row is used
+        probs = np.ones((b, _MAX_HIDDEN + 1, NUM_RANK_CODES))
+        mean = np.zeros(b)
+    else:
+        counts = np.asarray(unseen_counts, dtype=np.float64)
+        probs = all_rank_probabilities(counts)
+        total = counts.sum(axis=1)
+        mean = np.where(total > 0, counts @ _VALUES_F / np.maximum(total, 1), 0.0)
+    # (B, H, 15) flattened: value of h hidden cards all matching rank r, last column an unknown rank
+    match = np.empty((b, _MAX_HIDDEN + 1, _ANY_RANK + 1))
+    np.multiply(probs, _VALUES_F, out=match[:, :, :_ANY_RANK])
+    match[:, :, _ANY_RANK] = match[:, :, :_ANY_RANK].sum(axis=2)
+    match = match.reshape(b, -1)
+
+    # The other slots of each set: common known rank (top), face down count, conflicting ranks
+    others = np.concatenate([ranks, np.full((b, 1), _ABSENT_RANK, dtype=np.int8)], axis=1)
+    others = others[:, SLOT_SET_OTHERS.reshape(-1)].reshape(b, GRID_SIZE, 7, 4)
+    hidden = (others == NO_CARD).sum(axis=3, dtype=np.intp)
+    top = others.max(axis=3).astype(np.intp)
+    conflict = ((others >= 0) & (others != top[..., None])).any(axis=3)
+
+    # Terms before: the slot's own rank joins the others, a face down one adds a hidden card
+    own = ranks[:, :, None].astype(np.intp)
+    rank = np.where(own >= 0, own, np.where(top >= 0, top, _ANY_RANK))
+    index = (hidden + (own < 0)) * (_ANY_RANK + 1) + rank
+    valid = ~conflict & ((own < 0) | (top < 0) | (top == own))
+    before = np.where(valid, np.take_along_axis(match, index.reshape(b, -1), axis=1).reshape(index.shape), 0.0)
+    before = before @ SLOT_SET_WEIGHTS # (B, 9)
+    old_values = np.where(ranks >= 0, _VALUES_F[np.maximum(ranks, 0)], mean[:, None])
+
+    # Terms after, per candidate: the card joins the others
+    c = cards[:, :, None, None]
+    valid = ~conflict[:, None] & ((top[:, None] < 0) | (top[:, None] == c))
+    index = hidden[:, None] * (_ANY_RANK + 1) + c
+    after = np.where(valid, np.take_along_axis(match, index.reshape(b, -1), axis=1).reshape(index.shape), 0.0)
+    after = after @ SLOT_SET_WEIGHTS # (B, K, 9)
+
+    deltas = _VALUES_F[cards][:, :, None] - (old_values + before)[:, None] + after
+    return deltas[:, 0] if single else deltas
+
+
+class VecGolfEnvironment:
+    """N two-player Golf games stepped together as structure-of-arrays NumPy state"""
+
+    def __init__(self, num_envs: int, num_decks: int = 2, num_jokers: int = 4,
+                 seed: Optional[int] = None, autoreset: bool = True, validate: bool = True):
+
+        # Handle args
+        self.num_envs = num_envs
+        self.num_players = 2
+        self.num_decks = num_decks
+        self.num_jokers = num_jokers
+        self.autoreset = autoreset
+        self.validate = validate
+        self.rng = np.random.default_rng(seed)
+
+        # --- Deck template --- #
+        # One rank code per physical card, same composition as Deck._build
+        self._deck_template = np.array(
+            [CARD_RANK_CODE[code] for code in deck_template(num_decks, num_jokers)], dtype=np.int8
+        )
+        self.total_cards = len(self._deck_template)
+
+        # --- Game state --- #
+        n = num_envs
+        self.grids = np.zeros((n, 2, GRID_SIZE), dtype=np.int8)
+        self.face_up = np.zeros((n, 2, GRID_SIZE), dtype=bool)
+        self.stock = np.zeros((n, self.total_cards), dtype=np.int8)
+        self.stock_top = np.zeros(n, dtype=np.int32) # Number of cards left in stock
+        self.discard = np.zeros((n, self.total_cards), dtype=np.int8)
+        self.discard_size = np.zeros(n, dtype=np.int32)
+        self.drawn_card = np.full(n, NO_CARD, dtype=np.int8)
+        self.current_phase = np.zeros(n, dtype=np.int8)
+        self.current_player = np.zeros(n, dtype=np.int8)
+        self.initial_flips_count = np.zeros((n, 2), dtype=np.int8)
+        self.final_turn_player_idx = np.full(n, -1, dtype=np.int8) # -1 means not triggered yet
+        self.turn_count = np.zeros(n, dtype=np.int32)
+        self.scores = np.zeros((n, 2), dtype=np.int16)
+
+        # Card counting, same rules as GolfEnvironment.unseen_counts
+        self.rank_composition = np.array(rank_composition(num_decks, num_jokers), dtype=np.int16)
+        self.unseen_counts = np.zeros((n, 2, NUM_RANK_CODES), dtype=np.int16)
+        self._inv_rank_composition = inverse_counts(self.rank_composition).astype(OBS_DTYPE)
+
+        self._env_idx = np.arange(n)
+        self.action_space_size = NUM_ACTIONS
+        self.observation_size = OBS_DIM
+
+    # --- Round setup --- #
+
+    def reset(self, env_ids: Optional[np.ndarray] = None, obs_out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Reset all (or selected) games for a new round, returns observations (written to obs_out if given) and legal masks"""
+        if env_ids is None:
+            env_ids = self._env_idx
+        self._reset_envs(np.asarray(env_ids))
+        return self.get_observations(out=obs_out), self.legal_action_masks()
+
+    def _reset_envs(self, env_ids: np.ndarray):
+        """Shuffle, deal and start the discard pile for the given games"""
+        k = len(env_ids)
+        if k == 0:
+            return
+
+        # Shuffle: one random permutation of the deck per game
+        order = self.rng.random((k, self.total_cards)).argsort(axis=1)
+        stock = self._deck_template[order]
+        self.stock[env_ids] = stock
+
+        # Deal like GolfEnvironment._deal_initial_hands: slot by slot, alternating players, from the top
+        dealt = stock[:, ::-1][:, :2 * GRID_SIZE].reshape(k, GRID_SIZE, 2)
+        self.grids[env_ids] = dealt.transpose(0, 2, 1)
+        self.face_up[env_ids] = False
+
+        # Next card starts the discard pile
+        top = self.total_cards - 2 * GRID_SIZE
+        self.discard[env_ids, 0] = stock[:, top - 1]
+        self.discard_size[env_ids] = 1
+        self.stock_top[env_ids] = top - 1
+        self.unseen_counts[env_ids] = self.rank_composition
+        self.unseen_counts[env_ids, :, stock[:, top - 1]] -= 1
+
+        # Round keeping
+        self.drawn_card[env_ids] = NO_CARD
+        self.current_phase[env_ids] = PHASE_INITIAL_FLIP
+        self.current_player[env_ids] = 0
+        self.initial_flips_count[env_ids] = 0
+        self.final_turn_player_idx[env_ids] = -1
+        self.turn_count[env_ids] = 0
+        self.scores[env_ids] = 0
+
+    def _reshuffle_discard_pile(self, env_ids: np.ndarray):
+        """Move all but the top discard card back into the stock and shuffle (per game)"""
+        for e in env_ids:
+            n = self.discard_size[e]
+            if n <= 1:
+                continue
+            cards = self.discard[e, :n - 1].copy()
+            self.unseen_counts[e] += np.bincount(cards, minlength=NUM_RANK_CODES).astype(np.int16)
+            self.rng.shuffle(cards)
+            self.stock[e, :n - 1] = cards
+            self.stock_top[e] = n - 1
+            self.discard[e, 0] = self.discard[e, n - 1]
+            self.discard_size[e] = 1
+
+    # --- Scoring --- #
+
+    def calculate_scores(self, env_ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Score both grids of each game, matched rows/columns count 0 (same rule as Player.calculate_score)"""
+        grids = self.grids if env_ids is None else self.grids[env_ids]
+        values = RANK_CODE_VALUES[grids]
+        g = grids.reshape(-1, 2, GRID_DIM, GRID_DIM)
+        row_match = (g[..., 0] == g[..., 1]) & (g[..., 1] == g[..., 2])
+        col_match = (g[..., 0, :] == g[..., 1, :]) & (g[..., 1, :] == g[..., 2, :])
+        matched = (row_match[..., :, None] | col_match[..., None, :]).reshape(-1, 2, GRID_SIZE)
+        return np.where(matched, 0, values).sum(axis=-1)
+
+    # --- Legal actions --- #
+
+    def legal_action_masks(self) -> np.ndarray:
+        """(N, 30) boolean mask of legal action ids for the current player of each game"""
+        phase = self.current_phase
+        masks = PHASE_ACTION_MASK_TABLE[phase]
+        face_down = ~self.face_up[self._env_idx, self.current_player]
+
+        # Flip phases: face down slots
+        masks[:, ACTION_INITIAL_FLIP:ACTION_INITIAL_FLIP + GRID_SIZE] |= face_down & (phase == PHASE_INITIAL_FLIP)[:, None]
+        masks[:, ACTION_FLIP:ACTION_FLIP + GRID_SIZE] |= face_down & (phase == PHASE_MUST_FLIP_CARD)[:, None]
+
+        # Start of turn: drawing needs cards in the piles
+        masks[:, ACTION_DRAW_STOCK] &= (self.stock_top > 0) | (self.discard_size > 1)
+        masks[:, ACTION_DRAW_DISCARD] &= self.discard_size >= 1
+
+        return masks
+
+    # --- Observations --- #
+
+    def get_observations(self, out: Optional[np.ndarray] = None, env_ids: Optional[np.ndarray] = None,
+                         seats: Optional[np.ndarray] = None) -> np.ndarray:
+        """(N, OBS_DIM) observations for the current player of each game, layout in encoding.py
+
+        env_ids selects games (one row each, in that order), seats observes them from other seats.
+        """
+        idx = self._env_idx if env_ids is None else np.asarray(env_ids)
+        n = len(idx)
+        if out is None:
+            out = observation_buffer(n)
+        else:
+            out.fill(0)
+        rows_all = np.arange(n)
+        me = self.current_player[idx] if seats is None else np.asarray(seats)
+        opp = 1 - me
+
+        # Grids: one-hot ranks for face up cards only
+        for offset_ranks, offset_up, seat in ((OBS_OWN_RANKS, OBS_OWN_UP, me), (OBS_OPP_RANKS, OBS_OPP_UP, opp)):
+            up = self.face_up[idx, seat]
+            ranks = self.grids[idx, seat].astype(np.intp)
+            rows, slots = np.nonzero(up)
+            out[rows, offset_ranks + slots * NUM_RANK_CODES + ranks[rows, slots]] = 1.0
+            out[:, offset_up:offset_up + GRID_SIZE] = up
+
+        # Discard top and drawn card
+        discard_size = self.discard_size[idx]
+        has_discard = discard_size > 0
+        top = self.discard[idx, np.maximum(discard_size - 1, 0)].astype(np.intp)
+        out[rows_all[has_discard], OBS_DISCARD + top[has_discard]] = 1.0
+        drawn = self.drawn_card[idx]
+        has_drawn = drawn != NO_CARD
+        out[rows_all[has_drawn], OBS_DRAWN + drawn[has_drawn].astype(np.intp)] = 1.0
+
+        # Phase, deck size and final turn flag
+        out[rows_all, OBS_PHASE + self.current_phase[idx].astype(np.intp)] = 1.0
+        out[:, OBS_DECK_SIZE] = self.stock_top[idx] / self.total_cards
+        out[:, OBS_FINAL_TURN] = self.final_turn_player_idx[idx] == me
+
+        # Unseen cards per rank and the expected value of one of them
+        out[:, OBS_UNSEEN:OBS_UNSEEN + NUM_RANK_CODES] = self.unseen_counts[idx, me] * self._inv_rank_composition
+        out[:, OBS_HIDDEN_VALUE] = self.expected_hidden_values(me, idx) / HIDDEN_VALUE_SCALE
+
+        return out
+
+    def expected_hidden_values(self, seats: np.ndarray, env_ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """(N,) expected point value of a card seats[i] has not seen in game i (or game env_ids[i])"""
+        idx = self._env_idx if env_ids is None else env_ids
+        counts = self.unseen_counts[idx, seats].astype(np.int64)
+        total = counts.sum(axis=1)
+        value = counts @ RANK_CODE_VALUES.astype(np.int64)
+        return np.where(total > 0, value / np.maximum(total, 1), 0.0)
+
+    def replacement_deltas(self, cards: np.ndarray, seats: Optional[np.ndarray] = None, exact: bool = False) -> np.ndarray:
+        """(N, 9) or (N, K, 9) score change of placing candidate rank codes in each slot of seats' grids
+
+        seats defaults to the current players. By default the change of the expected score from the
+        seat's view (face down cards drawn from its unseen counts), exact uses the actual cards.
+        """
+        seats = self.current_player if seats is None else np.asarray(seats)
+        seats = seats.astype(np.int64)
+        idx = self._env_idx
+        if exact:
+            return replacement_deltas(self.grids[idx, seats], cards)
+        ranks = np.where(self.face_up[idx, seats], self.grids[idx, seats], NO_CARD)
+        return replacement_deltas(ranks, cards, self.unseen_counts[idx, seats])
+
+    # --- Checkpoints --- #
+
+    def save_checkpoint(self, path):
+        """Writes the state arrays and the generator state to one .npz (see checkpoint.py)"""
+        arrays = {name: getattr(self, name) for name in STATE_FIELDS}
+        arrays["rng_state"] = np.array(json.dumps(self.rng.bit_generator.state))
+        arrays["num_decks"] = np.array(self.num_decks)
+        arrays["num_jokers"] = np.array(self.num_jokers)
+        write_checkpoint(path, VEC_ENV_FORMAT, arrays)
+
+    def load_checkpoint(self, path):
+        """Restores a save_checkpoint file in place (same number of games and deck configuration)"""
+        arrays = read_checkpoint(path, VEC_ENV_FORMAT, min_version=1) # Layout unchanged since version 1
+        for name in STATE_FIELDS:
+            target = getattr(self, name)
+            if arrays[name].shape != target.shape:
+                raise ValueError(f"Checkpoint {name} has shape {arrays[name].shape}, expected {target.shape}")
+        for name in STATE_FIELDS:
+            getattr(self, name)[...] = arrays[name]
+        self.rng.bit_generator.state = json.loads(str(arrays["rng_state"]))
+
+    @classmethod
+    def from_checkpoint(cls, path, autoreset: bool = True, validate: bool = True) -> "VecGolfEnvironment":
+        """New VecGolfEnvironment holding the games of a save_checkpoint file"""
+        arrays = read_checkpoint(path, VEC_ENV_FORMAT, min_version=1)
+        env = cls(len(arrays["grids"]), int(arrays["num_decks"]), int(arrays["num_jokers"]), autoreset=autoreset, validate=validate)
+        env.load_checkpoint(path)
+        return env
+
+    # --- Stepping --- #
+
+    def step(self, actions: np.ndarray, obs_out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        """Execute one action per game for its current player (observations written to obs_out if given)
+
+        When any round ends, info['final_scores'] and info['round_winner'] hold the finished rounds'
+        results in the rows where info['_final_scores'] (the dones) is set. With autoreset those games
+        are reset in this step, info['final_obs'] then holds their terminal observations from the acting
+        player's seat in the rows where info['_final_obs'] is set.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        idx = self._env_idx
+        phase = self.current_phase.copy()
+        player = self.current_player.astype(np.int64)
+
+        # Check actions are legal (ids out of range even without validate, they would index the tables)
+        out_of_range = (actions < 0) | (actions >= NUM_ACTIONS)
+        if out_of_range.any():
+            bad = np.nonzero(out_of_range)[0]
+            raise ValueError(f"Action IDs {actions[bad].tolist()} out of defined range for envs {bad.tolist()}")
+        if self.validate:
+            legal = self.legal_action_masks()[idx, actions]
+            if not legal.all():
+                bad = np.nonzero(~legal)[0]
+                raise ValueError(f"Illegal actions {actions[bad].tolist()} for envs {bad.tolist()}")
+
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        info: Dict[str, Any] = {}
+
+        # --- Process action based on phase --- #
+
+        # Initial flips: each player flips 3, player 0 first
+        m = phase == PHASE_INITIAL_FLIP
+        if m.any():
+            e, p = idx[m], player[m]
+            self.face_up[e, p, actions[m]] = True
+            self.unseen_counts[e, :, self.grids[e, p, actions[m]]] -= 1
+            self.initial_flips_count[e, p] += 1
+            finished = self.initial_flips_count[e, p] == 3
+            self.current_player[e[finished]] = 1 - p[finished]
+            self.current_phase[e[finished & (p == 1)]] = PHASE_START_TURN
+
+        # Draw from stock (reshuffling the discard pile if the stock ran out)
+        m = (phase == PHASE_START_TURN) & (actions == 9)
+        if m.any():
+            empty = idx[m & (self.stock_top == 0)]
+            if len(empty):
+                self._reshuffle_discard_pile(empty)
+            e = idx[m]
+            self.stock_top[e] -= 1
+            self.drawn_card[e] = self.stock[e, self.stock_top[e]]
+            self.unseen_counts[e, player[m], self.drawn_card[e]] -= 1
+            self.current_phase[e] = PHASE_DRAW_STOCK_DECISION
+
+        # Draw from discard pile
+        m = (phase == PHASE_START_TURN) & (actions == 10)
+        if m.any():
+            e = idx[m]
+            self.discard_size[e] -= 1
+            self.drawn_card[e] = self.discard[e, self.discard_size[e]]
+            self.current_phase[e] = PHASE_DRAW_DISCARD_DECISION
+
+        # Replace card in grid, replaced card goes to the discard pile
+        replace = ((phase == PHASE_DRAW_STOCK_DECISION) | (phase == PHASE_DRAW_DISCARD_DECISION)) \
+            & (actions >= 11) & (actions < 11 + GRID_SIZE)
+        if replace.any():
+            e, p, slot = idx[replace], player[replace], actions[replace] - 11
+            hidden = ~self.face_up[e, p, slot]
+            self.unseen_counts[e[hidden], :, self.grids[e[hidden], p[hidden], slot[hidden]]] -= 1
+            from_stock = phase[e] == PHASE_DRAW_STOCK_DECISION
+            self.unseen_counts[e[from_stock], 1 - p[from_stock], self.drawn_card[e[from_stock]]] -= 1
+            self._push_discard(e, self.grids[e, p, slot])
+            self.grids[e, p, slot] = self.drawn_card[e]
+            self.face_up[e, p, slot] = True
+            self.drawn_card[e] = NO_CARD
+
+        # Discard drawn card, must flip next
+        m = (phase == PHASE_DRAW_STOCK_DECISION) & (actions == 20)
+        if m.any():
+            e = idx[m]
+            self.unseen_counts[e, 1 - player[m], self.drawn_card[e]] -= 1
+            self._push_discard(e, self.drawn_card[e])
+            self.drawn_card[e] = NO_CARD
+            self.current_phase[e] = PHASE_MUST_FLIP_CARD
+
+        # Flip a face down card
+        flip = (phase == PHASE_MUST_FLIP_CARD) & (actions >= 21) & (actions < 21 + GRID_SIZE)
+        if flip.any():
+            e, p, slot = idx[flip], player[flip], actions[flip] - 21
+            self.face_up[e, p, slot] = True
+            self.unseen_counts[e, :, self.grids[e, p, slot]] -= 1
+
+        # --- End of turn --- #
+        turn_done = idx[replace | flip]
+        if len(turn_done):
+            round_over = self._check_round_end_and_advance_player(turn_done)
+            if len(round_over):
+                # Reveal the remaining face down cards to both players
+                e, seat, slot = np.nonzero(~self.face_up[round_over])
+                for counted in (0, 1):
+                    np.subtract.at(self.unseen_counts[:, counted], (round_over[e], self.grids[round_over[e], seat, slot]), 1)
+                self.face_up[round_over] = True
+                self.scores[round_over] = self.calculate_scores(round_over)
+                self.current_phase[round_over] = PHASE_GAME_OVER
+                dones[round_over] = True
+
+                # Reward for the acting player: opponent score minus own score
+                p = player[round_over]
+                s = self.scores[round_over]
+                rewards[round_over] = s[np.arange(len(p)), 1 - p] - s[np.arange(len(p)), p]
+
+        if dones.any():
+            # Valid only where info['_final_scores'] (= dones), other rows hold zeros
+            final_scores = np.where(dones[:, None], self.scores, 0).astype(self.scores.dtype)
+            info['final_scores'] = final_scores
+            info['round_winner'] = np.where(final_scores[:, 0] < final_scores[:, 1], 0,
+                                            np.where(final_scores[:, 1] < final_scores[:, 0], 1, -1))
+            info['_final_scores'] = dones.copy()
+            if self.autoreset:
+                # Terminal observations from the acting seat, before the reset overwrites them
+                finished = idx[dones]
+                final_obs = observation_buffer(self.num_envs)
+                final_obs[finished] = self.get_observations(env_ids=finished, seats=player[dones])
+                info['final_obs'] = final_obs
+                info['_final_obs'] = dones.copy()
+                self._reset_envs(finished)
+
+        return self.get_observations(out=obs_out), rewards, dones, self.legal_action_masks(), info
+
+    def _push_discard(self, env_ids: np.ndarray, cards: np.ndarray):
+        """Put one card on top of each given game's discard pile"""
+        self.discard[env_ids, self.discard_size[env_ids]] = cards
+        self.discard_size[env_ids] += 1
+
+    def _check_round_end_and_advance_player(self, env_ids: np.ndarray) -> np.ndarray:
+        """Same final-turn logic as GolfEnvironment, returns the games whose round ended"""
+        p = self.current_player[env_ids].astype(np.int64)
+        opp = 1 - p
+        all_up = self.face_up[env_ids, p].all(axis=-1)
+        final_idx = self.final_turn_player_idx[env_ids]
+
+        # Player triggered final turn for opponent
+        trigger = all_up & (final_idx == -1)
+        self.final_turn_player_idx[env_ids[trigger]] = opp[trigger]
+
+        # Opponent's final turn complete, or player finished their final turn
+        over = (all_up & (final_idx != -1)) | (~all_up & (final_idx == p))
+
+        # Everyone else passes the turn
+        advance = ~over
+        e = env_ids[advance]
+        self.current_player[e] = opp[advance]
+        self.turn_count[e] += 1
+        self.current_phase[e] = PHASE_START_TURN
+
+        return env_ids[over]
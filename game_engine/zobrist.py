@@ -0,0 +1,38 @@
+import random
+from typing import List
+from .constants import *
+from .card import NUM_RANK_CODES
+
+# Zobrist keys
+# ---------------------------
+# A state hash is the XOR of one random 64-bit key per feature. Suits never affect play, so
+# cards are keyed by rank code and positions that differ only in suits hash the same.
+# Full hash:   face up slots by rank, face down slots by their (hidden) rank
+# Public hash: face up slots by rank, face down slots by a per-slot key (what a player can see)
+# Both add: discard top, drawn card, phase, seat to act, final turn seat, and the number of
+# unseen cards per rank (which also tells apart equal boards with different discard histories)
+MAX_SEATS = 2
+MAX_RANK_COUNT = 256 # Unseen count keys per rank
+
+_rng = random.Random(0x601F)
+
+def _keys(n: int) -> List[int]:
+    return [_rng.getrandbits(64) for _ in range(n)]
+
+ZOBRIST_FACE_UP: List[List[List[int]]] = [[_keys(NUM_RANK_CODES) for _ in range(GRID_SIZE)] for _ in range(MAX_SEATS)]
+ZOBRIST_FACE_DOWN_RANK: List[List[List[int]]] = [[_keys(NUM_RANK_CODES) for _ in range(GRID_SIZE)] for _ in range(MAX_SEATS)]
+ZOBRIST_FACE_DOWN: List[List[int]] = [_keys(GRID_SIZE) for _ in range(MAX_SEATS)]
+ZOBRIST_DISCARD_TOP: List[int] = _keys(NUM_RANK_CODES)
+ZOBRIST_DRAWN: List[int] = _keys(NUM_RANK_CODES)
+ZOBRIST_PHASE: List[int] = _keys(PHASE_GAME_OVER + 1)
+ZOBRIST_SEAT: List[int] = _keys(MAX_SEATS)
+ZOBRIST_FINAL_TURN: List[int] = _keys(MAX_SEATS)
+ZOBRIST_UNSEEN: List[List[int]] = [_keys(MAX_RANK_COUNT) for _ in range(NUM_RANK_CODES)]
+
+
+def unseen_key(counts) -> int:
+    """XOR of the unseen count keys of a per-rank count list"""
+    key = 0
+    for rank, count in enumerate(counts):
+        key ^= ZOBRIST_UNSEEN[rank][count]
+    return key
@@ -0,0 +1,176 @@
+"""Exact expectimax for the last turn of a round
+
+Once final_turn_player_idx is set, the player to act has one turn left and the round ends
+with every card face up. Nobody knows any face down card, so from the mover's point of
+view the face down slots and the stock are a uniform draw without replacement from the
+unseen cards (GolfEnvironment.unseen_counts). The value of an action is then an exact
+expectation: chance over the stock card, max over the mover's placement, and a closed
+form expected score for the grids (line match probabilities from the unseen counts).
+
+Values are expected score differentials, opponent minus mover (the reward step returns),
+cached in a bounded LRU transposition table keyed by the engine's Zobrist hash.
+"""
+from collections import OrderedDict
+from typing import List, Dict, Optional
+
+from game_engine.constants import *
+from game_engine.card import NUM_RANK_CODES, CARD_RANK_CODE
+from game_engine.player import expected_grid_score
+from game_engine.zobrist import *
+from game_engine.environment import GolfEnvironment
+from rl_agents.random_agent import RandomAgent
+
+# Leaf (end of round) keys use the game over phase, chance nodes the stock decision phase
+_LEAF_KEY = ZOBRIST_PHASE[PHASE_GAME_OVER]
+
+
+class TranspositionTable:
+    """Bounded LRU map from Zobrist hash to value"""
+
+    def __init__(self, capacity: int = 1 << 16):
+        if capacity < 1:
+            raise ValueError("Transposition table capacity must be at least 1")
+        self.capacity = capacity
+        self._entries: "OrderedDict[int, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: int) -> Optional[float]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: int, value: float):
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# --- Solver --- #
+
+class EndgameSolver:
+    """Expected score differential of each legal action in the final turn of a round
+
+    Also an agent: act(legal_actions, env) plays the best action in the final turn and
+    defers to fallback (RandomAgent by default) before it.
+    """
+
+    def __init__(self, capacity: int = 1 << 16, fallback=None):
+        self.table = TranspositionTable(capacity)
+        self.fallback = fallback if fallback is not None else RandomAgent()
+
+    @staticmethod
+    def solvable(env: GolfEnvironment) -> bool:
+        """Whether env is in the final turn (the player to act is the last to play)"""
+        return not env.game_over and env.final_turn_player_idx is not None and env.final_turn_player_idx == env.current_player
+
+    def solve(self, env: GolfEnvironment) -> Dict[int, float]:
+        """Legal action id -> exact expected (opponent score - own score) for the player to act"""
+        if not self.solvable(env):
+            raise ValueError("The endgame solver needs a round in its final turn (final_turn_player_idx to act)")
+        me = env.current_player
+        ranks = [[CARD_RANK_CODE[p.grid[i]] if p.face_up[i] else None for i in range(GRID_SIZE)] for p in env.players]
+        counts = env.unseen_counts(me)
+        key = env.players[0].public_zobrist ^ env.players[1].public_zobrist ^ unseen_key(counts) ^ ZOBRIST_SEAT[me] ^ _LEAF_KEY
+        mask = env.legal_action_mask(me)
+        legal = [a for a in range(NUM_ACTIONS) if (mask >> a) & 1]
+        phase = env.current_phase
+
+        values: Dict[int, float] = {}
+        if phase == PHASE_START_TURN:
+            if ACTION_DRAW_STOCK in legal:
+                values[ACTION_DRAW_STOCK] = self._draw_stock_value(env, me, ranks, counts, key)
+            if ACTION_DRAW_DISCARD in legal:
+                top = CARD_RANK_CODE[env.discard_pile[-1]]
+                values[ACTION_DRAW_DISCARD] = max(self._replace_values(me, ranks, counts, key, top))
+        elif phase in (PHASE_DRAW_STOCK_DECISION, PHASE_DRAW_DISCARD_DECISION):
+            drawn = CARD_RANK_CODE[env.drawn_card]
+            for slot, value in enumerate(self._replace_values(me, ranks, counts, key, drawn)):
+                values[ACTION_REPLACE + slot] = value
+            if ACTION_DISCARD_DRAWN in legal:
+                values[ACTION_DISCARD_DRAWN] = self._leaf(me, ranks, counts, key)
+        else:
+            # Every card is revealed at the end of the turn, which slot gets flipped does not matter
+            value = self._leaf(me, ranks, counts, key)
+            values = {a: value for a in legal}
+        return {a: values[a] for a in legal}
+
+    def best_action(self, env: GolfEnvironment) -> int:
+        values = self.solve(env)
+        return max(values, key=values.get)
+
+    def act(self, legal_actions: List[int], env: GolfEnvironment) -> int:
+        if self.solvable(env):
+            return self.best_action(env)
+        return self.fallback.act(legal_actions)
+
+    # --- Search --- #
+
+    def _draw_stock_value(self, env: GolfEnvironment, me: int, ranks: List[List[int]], counts: List[int], key: int) -> float:
+        """Chance over the stock card, then the best of placing or discarding it"""
+        if env.deck.is_empty():
+            # Stock is the reshuffled discard pile below the top: a known draw, the face down
+            # slots are exactly the unseen cards (rare, not cached)
+            draws = [0] * NUM_RANK_CODES
+            for card in env.discard_pile[:-1]:
+                draws[CARD_RANK_CODE[card]] += 1
+            chance_key = None
+        else:
+            draws = counts
+            chance_key = key ^ _LEAF_KEY ^ ZOBRIST_PHASE[PHASE_DRAW_STOCK_DECISION]
+            value = self.table.get(chance_key)
+            if value is not None:
+                return value
+
+        total = sum(draws)
+        value = 0.0
+        for rank in range(NUM_RANK_CODES):
+            if not draws[rank]:
+                continue
+            if draws is counts:
+                # The drawn card leaves the unseen cards
+                leaf_counts = counts.copy()
+                leaf_counts[rank] -= 1
+                leaf_key = key ^ ZOBRIST_UNSEEN[rank][counts[rank]] ^ ZOBRIST_UNSEEN[rank][counts[rank] - 1]
+            else:
+                leaf_counts, leaf_key = counts, key
+            best = max(max(self._replace_values(me, ranks, leaf_counts, leaf_key, rank)),
+                       self._leaf(me, ranks, leaf_counts, leaf_key))
+            value += draws[rank] / total * best
+        if chance_key is not None:
+            self.table.put(chance_key, value)
+        return value
+
+    def _replace_values(self, me: int, ranks: List[List[int]], counts: List[int], key: int, rank: int) -> List[float]:
+        """Leaf value of placing a card of rank face up in each slot of the mover's grid"""
+        own = ranks[me]
+        up_keys = ZOBRIST_FACE_UP[me]
+        values = []
+        for slot in range(GRID_SIZE):
+            old = own[slot]
+            old_key = ZOBRIST_FACE_DOWN[me][slot] if old is None else up_keys[slot][old]
+            own[slot] = rank
+            values.append(self._leaf(me, ranks, counts, key ^ old_key ^ up_keys[slot][rank]))
+            own[slot] = old
+        return values
+
+    def _leaf(self, me: int, ranks: List[List[int]], counts: List[int], key: int) -> float:
+        """Expected (opponent - mover) score once every card is revealed"""
+        value = self.table.get(key)
+        if value is None:
+            value = expected_grid_score(ranks[1 - me], counts) - expected_grid_score(ranks[me], counts)
+            self.table.put(key, value)
+        return value
@@ -0,0 +1,162 @@
+"""Rule-based baseline that decides for a whole batch of games in NumPy
+
+Works on encoded observations and legal masks (GolfEnvironment.encode_observation,
+VecGolfEnvironment, SubprocGolfEnvPool), so it can act for thousands of games per call:
+
+    agent = GreedyAgent()
+    obs, masks = vec_env.reset()
+    actions = agent.act_batch(obs, masks)
+
+Cards are valued on the observer's own grid: face up cards at their points, face down
+cards at the expected value of an unseen card (OBS_HIDDEN_VALUE), and a row or column
+scores 0 once its three cards are face up and equal. A placement's delta is the change of
+that estimate, so a card completing a match has a large negative delta.
+"""
+import numpy as np
+from typing import List, Optional, Tuple
+
+from game_engine.constants import *
+from game_engine.card import NUM_RANK_CODES, RANK_VALUES
+from game_engine.encoding import *
+from game_engine.player import LINES, SLOT_LINES
+from game_engine.environment import GolfEnvironment
+
+RANK_CODE_VALUES = np.array(RANK_VALUES, dtype=np.float32)
+NO_CARD = -1
+
+# Lines as slot triples (rows then columns), each slot's row and column line, and the other
+# two slots of its row and of its column
+_LINE_SLOTS = np.array(LINES)
+_SLOT_ROW = np.array([r for r, _ in SLOT_LINES])
+_SLOT_COL = np.array([c for _, c in SLOT_LINES])
+_ROW_OTHERS = np.array([[j for j in LINES[r] if j != i] for i, (r, _) in enumerate(SLOT_LINES)])
+_COL_OTHERS = np.array([[j for j in LINES[c] if j != i] for i, (_, c) in enumerate(SLOT_LINES)])
+_FACE_DOWN_KEYS = NO_CARD - np.arange(GRID_SIZE) # Distinct per slot, so face down slots never match
+
+# Rank decoding: one-hot blocks times (rank code + 1) summed per block, 0 for an empty block
+def _decoder(count: int) -> np.ndarray:
+    w = np.zeros((count * NUM_RANK_CODES, count), dtype=OBS_DTYPE)
+    for k in range(count):
+        w[k * NUM_RANK_CODES:(k + 1) * NUM_RANK_CODES, k] = np.arange(1, NUM_RANK_CODES + 1)
+    return w
+
+_GRID_DECODER = _decoder(GRID_SIZE)
+_CARD_DECODER = _decoder(1)[:, 0]
+
+
+def decode_ranks(obs: np.ndarray, start: int, count: int) -> np.ndarray:
+    """(B, count) rank codes of count one-hot rank blocks from start, NO_CARD for empty blocks"""
+    decoder = _GRID_DECODER if count == GRID_SIZE else _decoder(count)
+    return (obs[:, start:start + count * NUM_RANK_CODES] @ decoder).astype(np.int64) - 1
+
+def decode_card(obs: np.ndarray, start: int) -> np.ndarray:
+    """(B,) rank code of one one-hot rank block, NO_CARD if empty"""
+    return (obs[:, start:start + NUM_RANK_CODES] @ _CARD_DECODER).astype(np.int64) - 1
+
+def placement_deltas(ranks: np.ndarray, face_up: np.ndarray, hidden_value: np.ndarray,
+                     cards: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Estimated score change of placing cards[b] face up in each slot of grid b, and whether
+    that placement completes a row or column, both (B, 9)
+
+    Face down slots count hidden_value[b], a line scores 0 once its three cards are face up and
+    equal. Only the placed slot and the other slots of its row and column can change.
+    """
+    values = np.where(face_up, RANK_CODE_VALUES[ranks], hidden_value[:, None].astype(np.float32))
+    known = np.where(face_up, ranks, _FACE_DOWN_KEYS)
+    k = known[:, _LINE_SLOTS]
+    line_match = (k[..., 0] == k[..., 1]) & (k[..., 1] == k[..., 2]) # (B, 6)
+    row_match = line_match[:, _SLOT_ROW]
+    col_match = line_match[:, _SLOT_COL]
+    slot_match = row_match | col_match
+
+    # Lines through each slot after the placement
+    c = cards[:, None, None]
+    new_row = (known[:, _ROW_OTHERS] == c).all(axis=2)
+    new_col = (known[:, _COL_OTHERS] == c).all(axis=2)
+    completes = (new_row & ~row_match) | (new_col & ~col_match)
+
+    # Placed slot, then the other two slots of its row (column line unchanged) and of its column
+    deltas = np.where(new_row | new_col, 0.0, RANK_CODE_VALUES[cards][:, None]) - np.where(slot_match, 0.0, values)
+    deltas += (values[:, _ROW_OTHERS] * (slot_match[:, _ROW_OTHERS].astype(np.float32)
+                                         - (new_row[:, :, None] | col_match[:, _ROW_OTHERS]))).sum(axis=2)
+    deltas += (values[:, _COL_OTHERS] * (slot_match[:, _COL_OTHERS].astype(np.float32)
+                                         - (new_col[:, :, None] | row_match[:, _COL_OTHERS]))).sum(axis=2)
+    return deltas, completes
+
+
+class GreedyAgent:
+    """Vectorized one-step greedy baseline
+
+    - Start of turn: take the discard if placing it lowers the estimate by more than
+      take_discard_margin (or completes a match), otherwise draw from the stock
+    - Card drawn from the stock: replace the slot with the lowest delta if that delta is
+      below -replace_margin, otherwise discard it and flip
+    - Card taken from the discard: replace the slot with the lowest delta
+    - Flips (initial and after a discard): the first face down slot
+
+    match_bonus is subtracted from the delta of placements that complete a row or column.
+    """
+
+    def __init__(self, take_discard_margin: float = 1.0, replace_margin: float = 0.0, match_bonus: float = 2.0):
+        self.take_discard_margin = take_discard_margin
+        self.replace_margin = replace_margin
+        self.match_bonus = match_bonus
+
+    def placement_deltas(self, obs: np.ndarray, cards: np.ndarray) -> np.ndarray:
+        """(B, 9) greedy delta (estimate change minus match_bonus for completed matches) per slot"""
+        ranks = decode_ranks(obs, OBS_OWN_RANKS, GRID_SIZE)
+        face_up = obs[:, OBS_OWN_UP:OBS_OWN_UP + GRID_SIZE] > 0
+        hidden_value = obs[:, OBS_HIDDEN_VALUE] * HIDDEN_VALUE_SCALE
+        deltas, completes = placement_deltas(ranks, face_up, hidden_value, cards)
+        if self.match_bonus:
+            deltas -= self.match_bonus * completes
+        return deltas
+
+    def act_batch(self, obs: np.ndarray, masks: np.ndarray) -> np.ndarray:
+        """(B,) action ids for (B, OBS_DIM) encoded observations and (B, 30) bool legal masks"""
+        obs = np.asarray(obs)
+        masks = np.asarray(masks, dtype=bool)
+        b = len(obs)
+        phase = obs[:, OBS_PHASE:OBS_PHASE + NUM_PHASES].argmax(axis=1)
+
+        # Candidate card: the discard top at the start of a turn, else the drawn card (computed for
+        # every row, cheaper than gathering the rows that need it)
+        start = phase == PHASE_START_TURN
+        cards = np.where(start, decode_card(obs, OBS_DISCARD), decode_card(obs, OBS_DRAWN))
+        has_card = cards != NO_CARD
+        deltas = self.placement_deltas(obs, np.where(has_card, cards, 0))
+        best_slot = deltas.argmin(axis=1)
+        best_delta = deltas[np.arange(b), best_slot]
+
+        # Flip phases: first legal action
+        actions = masks.argmax(axis=1)
+        # Start of turn
+        take = has_card & (best_delta < -self.take_discard_margin) & masks[:, ACTION_DRAW_DISCARD]
+        actions[start] = np.where(take | ~masks[:, ACTION_DRAW_STOCK], ACTION_DRAW_DISCARD, ACTION_DRAW_STOCK)[start]
+        # Drawn from the stock: keep or discard
+        stock = phase == PHASE_DRAW_STOCK_DECISION
+        keep = best_delta < -self.replace_margin
+        actions[stock] = np.where(keep, ACTION_REPLACE + best_slot, ACTION_DISCARD_DRAWN)[stock]
+        # Drawn from the discard: must place it
+        taken = phase == PHASE_DRAW_DISCARD_DECISION
+        actions[taken] = ACTION_REPLACE + best_slot[taken]
+
+        # Anything the rules above picked that is illegal falls back to the first legal action
+        illegal = ~masks[np.arange(b), actions]
+        if illegal.any():
+            actions[illegal] = masks[illegal].argmax(axis=1)
+        return actions
+
+    __call__ = act_batch # BatchPolicy for rl_agents.inference_broker
+
+    def act(self, legal_actions: List[int], env: Optional[GolfEnvironment] = None) -> int:
+        """Single decision for env's current player"""
+        if not legal_actions:
+            raise ValueError("No legal actions available for GreedyAgent to choose")
+        if env is None:
+            raise ValueError("GreedyAgent needs the environment, pass env to act()")
+        obs = env.encode_observation(env.current_player)[None]
+        mask = np.zeros((1, NUM_ACTIONS), dtype=bool)
+        mask[0, legal_actions] = True
+        return int(self.act_batch(obs, mask)[0])
+
@@ -0,0 +1,257 @@
+"""Asyncio broker batching act requests from many environment loops into one policy call
+
+Each environment loop awaits broker.act(obs, mask) per decision. The broker collects
+pending requests until max_batch are waiting or max_wait seconds passed since the first
+one, calls the policy once on the stacked batch and resolves every request. Latency and
+throughput metrics show whether a larger batch starves the environments.
+
+    python -m rl_agents.inference_broker --envs 256 --max-batch 1 16 64 256 --overhead-ms 1
+"""
+import argparse
+import asyncio
+import math
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import List, Dict, Any, Optional, Callable, Deque, Tuple
+
+import numpy as np
+
+from game_engine.constants import *
+from game_engine.encoding import *
+from game_engine.environment import GolfEnvironment
+
+# Batched policy: (B, OBS_DIM) observations, (B, NUM_ACTIONS) bool legal masks -> (B,) action ids
+BatchPolicy = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+class LocalPolicy:
+    """In-process stand-in for a served model: random one hidden layer MLP, masked softmax sampling
+
+    Samples (Gumbel-max) from small logits, so play is close to uniform random: an untrained
+    argmax policy can keep swapping the same discard forever.
+
+    call_overhead (seconds) is slept once per call, like the fixed cost of a device
+    launch or an RPC, so batching pays off the way it would against a real server.
+    """
+
+    def __init__(self, hidden: int = 64, call_overhead: float = 0.0, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.w1 = (rng.standard_normal((OBS_DIM, hidden)) / math.sqrt(OBS_DIM)).astype(np.float32)
+        self.w2 = (rng.standard_normal((hidden, NUM_ACTIONS)) * 0.1 / math.sqrt(hidden)).astype(np.float32)
+        self.call_overhead = call_overhead
+        self.rng = rng
+
+    def __call__(self, obs: np.ndarray, masks: np.ndarray) -> np.ndarray:
+        if self.call_overhead > 0:
+            time.sleep(self.call_overhead)
+        logits = np.maximum(obs @ self.w1, 0.0) @ self.w2
+        logits += self.rng.gumbel(size=logits.shape)
+        return np.where(masks, logits, -np.inf).argmax(axis=1)
+
+
+# --- Metrics --- #
+
+class BrokerStats:
+    """Request latencies (submit to result) and batch sizes, latencies kept for the last `window` requests"""
+
+    def __init__(self, max_batch: int, window: int = 100_000):
+        self.requests = 0
+        self.batches = 0
+        self.batch_sizes = np.zeros(max_batch + 1, dtype=np.int64) # Histogram
+        self.latencies_ns: Deque[int] = deque(maxlen=window)
+        self.policy_ns = 0
+        self._start_ns: Optional[int] = None
+        self._last_ns = 0
+
+    def record_batch(self, submit_ns: List[int], start_ns: int, end_ns: int):
+        if self._start_ns is None:
+            self._start_ns = min(submit_ns)
+        self._last_ns = end_ns
+        self.requests += len(submit_ns)
+        self.batches += 1
+        self.batch_sizes[len(submit_ns)] += 1
+        self.policy_ns += end_ns - start_ns
+        self.latencies_ns.extend(end_ns - t for t in submit_ns)
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals, mean batch size, latency percentiles (us) and requests per second"""
+        elapsed = (self._last_ns - self._start_ns) / 1e9 if self._start_ns is not None else 0.0
+        latencies = np.fromiter(self.latencies_ns, dtype=np.int64, count=len(self.latencies_ns)) / 1e3
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch": self.requests / self.batches if self.batches else 0.0,
+            "latency_p50_us": float(p50),
+            "latency_p95_us": float(p95),
+            "latency_p99_us": float(p99),
+            "requests_per_s": self.requests / elapsed if elapsed > 0 else 0.0,
+            "policy_share": self.policy_ns / 1e9 / elapsed if elapsed > 0 else 0.0, # Fraction of wall time in the policy
+        }
+
+
+# --- Broker --- #
+
+class InferenceBroker:
+    """Coalesces concurrent act requests into batched policy calls
+
+    Use inside a running event loop, as an async context manager or with start()/close().
+    With an executor the policy runs there, so the event loop (and the environments)
+    keep running during inference; otherwise it is called on the loop thread.
+    """
+
+    def __init__(self, policy: BatchPolicy, max_batch: int = 64, max_wait: float = 0.001,
+                 executor: Optional[Executor] = None):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        if max_wait < 0:
+            raise ValueError("max_wait must be non-negative")
+        self.policy = policy
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.executor = executor
+        self.stats = BrokerStats(max_batch)
+
+        # Requests waiting for a batch: (obs, mask, future, submit time)
+        self._pending: List[Tuple[np.ndarray, np.ndarray, asyncio.Future, int]] = []
+        self._obs = observation_buffer(max_batch)
+        self._masks = np.zeros((max_batch, NUM_ACTIONS), dtype=bool)
+        self._arrived: Optional[asyncio.Event] = None # Set when the first request of a batch arrives
+        self._full: Optional[asyncio.Event] = None # Set when max_batch requests are waiting
+        self._task: Optional[asyncio.Task] = None
+
+    async def act(self, obs: np.ndarray, mask: np.ndarray) -> int:
+        """Action id for one observation and its legal mask (both must stay unchanged until this returns)"""
+        if self._task is None:
+            raise RuntimeError("InferenceBroker is not started")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((obs, mask, future, time.perf_counter_ns()))
+        if len(self._pending) == 1:
+            self._arrived.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return await future
+
+    def start(self):
+        self._arrived = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        """Stops the batching task, pending requests are cancelled"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        for _, _, future, _ in self._pending:
+            future.cancel()
+        self._pending.clear()
+
+    async def __aenter__(self) -> "InferenceBroker":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._arrived.wait()
+            # Fill window: until max_batch are waiting or max_wait has passed
+            if len(self._pending) < self.max_batch:
+                if self.max_wait > 0:
+                    try:
+                        await asyncio.wait_for(self._full.wait(), self.max_wait)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await asyncio.sleep(0) # Let already runnable loops submit
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            if len(self._pending) < self.max_batch:
+                self._full.clear()
+            if not self._pending:
+                self._arrived.clear()
+
+            n = len(batch)
+            for i, (obs, mask, _, _) in enumerate(batch):
+                self._obs[i] = obs
+                self._masks[i] = mask
+            start = time.perf_counter_ns()
+            try:
+                if self.executor is None:
+                    actions = self.policy(self._obs[:n], self._masks[:n])
+                else:
+                    actions = await loop.run_in_executor(self.executor, self.policy, self._obs[:n], self._masks[:n])
+            except Exception as exc:
+                for _, _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            end = time.perf_counter_ns()
+            self.stats.record_batch([t for _, _, _, t in batch], start, end)
+            for i, (_, _, future, _) in enumerate(batch):
+                if not future.done(): # Caller may have been cancelled
+                    future.set_result(int(actions[i]))
+
+
+# --- Environment loops --- #
+
+async def play_env(broker: InferenceBroker, env: GolfEnvironment, num_games: int) -> List[List[int]]:
+    """Self-play with every decision served by the broker, returns the final scores per game"""
+    obs = observation_buffer()
+    mask = np.zeros(NUM_ACTIONS, dtype=bool)
+    results = []
+    for _ in range(num_games):
+        env.reset()
+        done = False
+        while not done:
+            p = env.current_player
+            env.encode_observation(p, out=obs)
+            env.legal_action_mask_array(p, out=mask)
+            action = await broker.act(obs, mask)
+            _, _, _, done, info = env.step(action)
+        results.append(info['final_scores'])
+    return results
+
+async def run_selfplay(policy: BatchPolicy, num_envs: int, games_per_env: int, max_batch: int = 64,
+                       max_wait: float = 0.001, seed: int = 0,
+                       executor: Optional[Executor] = None) -> Dict[str, Any]:
+    """Runs num_envs concurrent environment loops against one broker, returns its stats summary"""
+    seeds = np.random.SeedSequence(seed).generate_state(num_envs, dtype=np.uint64).tolist()
+    envs = [GolfEnvironment(obs_type="none", seed=s) for s in seeds]
+    start = time.perf_counter()
+    async with InferenceBroker(policy, max_batch, max_wait, executor) as broker:
+        await asyncio.gather(*(play_env(broker, env, games_per_env) for env in envs))
+    summary = broker.stats.summary()
+    summary["games_per_s"] = num_envs * games_per_env / (time.perf_counter() - start)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Batched inference broker throughput/latency sweep")
+    parser.add_argument("--envs", type=int, default=256, help="concurrent environment loops")
+    parser.add_argument("--games", type=int, default=2, help="games per environment")
+    parser.add_argument("--max-batch", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--max-wait-ms", type=float, default=1.0)
+    parser.add_argument("--overhead-ms", type=float, default=0.0, help="simulated fixed cost per policy call")
+    parser.add_argument("--hidden", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    policy = LocalPolicy(args.hidden, args.overhead_ms / 1e3, args.seed)
+    print(f"{'max_batch':>9s} {'mean_batch':>10s} {'req/s':>10s} {'games/s':>9s} {'p50 us':>9s} {'p99 us':>9s} {'policy':>7s}")
+    for max_batch in args.max_batch:
+        s = asyncio.run(run_selfplay(policy, args.envs, args.games, max_batch, args.max_wait_ms / 1e3, args.seed))
+        print(f"{max_batch:9d} {s['mean_batch']:10.1f} {s['requests_per_s']:10.0f} {s['games_per_s']:9.1f} "
+              f"{s['latency_p50_us']:9.0f} {s['latency_p99_us']:9.0f} {s['policy_share']:7.0%}")
+
+
+if __name__ == "__main__":
+    main()
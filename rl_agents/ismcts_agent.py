@@ -0,0 +1,238 @@
+import math
+import random
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Dict, Tuple, Optional, Any
+
+from game_engine.constants import *
+from game_engine.card import NUM_CARD_CODES
+from game_engine.deck import deck_template
+from game_engine.environment import GolfEnvironment
+from game_engine.snapshot import EnvSnapshot
+
+# Root action -> (visits, total value) from one search
+SearchStats = Dict[int, Tuple[int, float]]
+
+# Legal action ids per legal mask, filled lazily
+_MASK_ACTIONS: Dict[int, List[int]] = {}
+
+def _mask_actions(mask: int) -> List[int]:
+    actions = _MASK_ACTIONS.get(mask)
+    if actions is None:
+        actions = [a for a in range(NUM_ACTIONS) if (mask >> a) & 1]
+        _MASK_ACTIONS[mask] = actions
+    return actions
+
+
+# --- Information sets --- #
+
+class InformationSet:
+    """What player_id can see (as in get_observation) and where the unseen cards can be"""
+    __slots__ = ("player_id", "unseen", "hidden_slots", "stock_size")
+
+    def __init__(self, env: GolfEnvironment, player_id: int):
+        self.player_id = player_id
+
+        # Every card not visible to the player: deck composition minus face up grid cards, the
+        # whole discard pile (each discard was public when played) and the drawn card, the same
+        # cards as env.unseen_counts(player_id)
+        counts = [0] * NUM_CARD_CODES
+        for code in deck_template(env.num_decks, env.num_jokers):
+            counts[code] += 1
+        for player in env.players:
+            for i in range(GRID_SIZE):
+                if player.face_up[i]:
+                    counts[player.grid[i]] -= 1
+        for code in env.discard_pile:
+            counts[code] -= 1
+        if env.drawn_card is not None:
+            counts[env.drawn_card] -= 1
+        self.unseen: List[int] = [code for code in range(NUM_CARD_CODES) for _ in range(counts[code])]
+
+        # Locations of those cards: face down slots of both grids and the stock
+        self.hidden_slots: List[List[int]] = [player.get_face_down_cards() for player in env.players]
+        self.stock_size = len(env.deck.cards)
+
+    def determinize(self, env: GolfEnvironment, rng: random.Random):
+        """Deals the unseen cards into the hidden locations of env at random (the discard pile is kept)"""
+        cards = self.unseen[:]
+        rng.shuffle(cards)
+        pos = 0
+        for player, slots in zip(env.players, self.hidden_slots):
+            for i in slots:
+                player.set_card(i, cards[pos], face_up = False)
+                pos += 1
+        env.deck.cards[:] = cards[pos:pos + self.stock_size]
+
+
+# --- Search --- #
+
+class _Node:
+    """Tree node reached by an action of player (the mover)"""
+    __slots__ = ("player", "children", "visits", "value", "avail")
+
+    def __init__(self, player: int):
+        self.player = player
+        self.children: Dict[int, "_Node"] = {}
+        self.visits = 0
+        self.value = 0.0
+        self.avail = 1
+
+
+def _run_search(env: GolfEnvironment, root_state: EnvSnapshot, info_set: InformationSet, root_actions: List[int],
+                iterations: int, time_limit: Optional[float], exploration: float, score_scale: float,
+                max_rollout_steps: Optional[int], seed: Optional[int]) -> SearchStats:
+    """Single-observer ISMCTS from root_state, returns visit and value totals per root action"""
+    rng = random.Random(seed)
+    env.round_seed = rng.getrandbits(63) # Reshuffles during the search follow the search seed too
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    root = _Node(info_set.player_id)
+
+    for iteration in range(iterations):
+        if deadline is not None and iteration % 8 == 0 and time.perf_counter() >= deadline:
+            break
+
+        # New determinization of the hidden cards
+        env.restore(root_state)
+        info_set.determinize(env, rng)
+
+        # Selection and expansion
+        node = root
+        path = [root]
+        while not env.game_over:
+            player_id = env.current_player
+            legal = root_actions if node is root else _mask_actions(env.legal_action_mask(player_id))
+            untried = []
+            best, best_score = None, -math.inf
+            for a in legal:
+                child = node.children.get(a)
+                if child is None:
+                    untried.append(a)
+                    continue
+                child.avail += 1
+                ucb = child.value / child.visits + exploration * math.sqrt(math.log(child.avail) / child.visits)
+                if ucb > best_score:
+                    best, best_score = a, ucb
+            if untried:
+                a = rng.choice(untried)
+                node.children[a] = node = _Node(player_id)
+                env.step_unchecked(a)
+                path.append(node)
+                break
+            node = node.children[best]
+            env.step_unchecked(best)
+            path.append(node)
+
+        # Rollout with uniformly random legal actions
+        steps = 0
+        while not env.game_over and (max_rollout_steps is None or steps < max_rollout_steps):
+            env.step_unchecked(rng.choice(_mask_actions(env.legal_action_mask(env.current_player))))
+            steps += 1
+
+        # Score differential (truncated rollouts use the determinized grids)
+        if env.game_over:
+            scores = env.scores
+        else:
+            scores = [player.score for player in env.players]
+
+        # Backpropagate, each node valued for the player who moved into it
+        for node in path:
+            p = node.player
+            node.visits += 1
+            node.value += max(-1.0, min(1.0, (scores[1 - p] - scores[p]) / score_scale))
+
+    return {a: (child.visits, child.value) for a, child in root.children.items()}
+
+
+# One search environment per worker (process or thread) and deck composition
+_SEARCH_ENVS: Dict[Tuple[Any, ...], GolfEnvironment] = {}
+
+def _search_worker(num_decks: int, num_jokers: int, *args) -> SearchStats:
+    key = (threading.get_ident(), num_decks, num_jokers)
+    env = _SEARCH_ENVS.get(key)
+    if env is None:
+        env = _SEARCH_ENVS[key] = GolfEnvironment(num_decks=num_decks, num_jokers=num_jokers, obs_type="none")
+    return _run_search(env, *args)
+
+
+class ISMCTSAgent:
+    """Information-set MCTS agent: UCT over action ids on random determinizations of the hidden cards
+
+    Hidden cards (face down slots and stock order) are resampled every iteration from the cards
+    the acting player has not seen, the discard pile is public and kept as it is. With
+    num_workers > 1 the iteration budget is split across a process (or thread) pool and root
+    statistics are merged.
+
+    One process runs 1000 iterations in roughly 150-300 ms depending on the machine, so a
+    1000-iteration move within 50 ms needs num_workers processes (about 4-6) on as many cores;
+    executor="thread" does not help there, the search holds the GIL.
+    """
+
+    def __init__(self, iterations: int = 1000, time_limit: Optional[float] = None, exploration: float = 0.7,
+                 score_scale: float = 20.0, max_rollout_steps: Optional[int] = 20, num_workers: int = 1,
+                 executor: str = "process", seed: Optional[int] = None, env: Optional[GolfEnvironment] = None):
+        if executor not in ("process", "thread"):
+            raise ValueError(f"Unknown executor {executor}, expected 'process' or 'thread'")
+        self.iterations = iterations
+        self.time_limit = time_limit # Seconds per move, None for iterations only
+        self.exploration = exploration
+        self.score_scale = score_scale # Score differential mapped to [-1, 1]
+        self.max_rollout_steps = max_rollout_steps # None plays rollouts to the end of the round
+        self.num_workers = num_workers
+        self.executor = executor
+        self.env = env
+        self._rng = random.Random(seed)
+        self._pool: Optional[Executor] = None
+
+    def search(self, env: GolfEnvironment, legal_actions: Optional[List[int]] = None) -> SearchStats:
+        """Runs the search for env's current player, returns merged root statistics"""
+        player_id = env.current_player
+        if legal_actions is None:
+            legal_actions = env.get_legal_actions(player_id)
+        args = (env.snapshot(), InformationSet(env, player_id), list(legal_actions))
+        options = (self.time_limit, self.exploration, self.score_scale, self.max_rollout_steps)
+
+        if self.num_workers <= 1:
+            return _search_worker(env.num_decks, env.num_jokers, *args, self.iterations, *options,
+                                  self._rng.randrange(1 << 30))
+
+        # Root parallelization: independent trees, summed statistics
+        if self._pool is None:
+            pool_type = ProcessPoolExecutor if self.executor == "process" else ThreadPoolExecutor
+            self._pool = pool_type(max_workers=self.num_workers)
+        share = -(-self.iterations // self.num_workers)
+        futures = [
+            self._pool.submit(_search_worker, env.num_decks, env.num_jokers, *args, share, *options,
+                              self._rng.randrange(1 << 30))
+            for _ in range(self.num_workers)
+        ]
+        stats: SearchStats = {}
+        for future in futures:
+            for a, (visits, value) in future.result().items():
+                old_visits, old_value = stats.get(a, (0, 0.0))
+                stats[a] = (old_visits + visits, old_value + value)
+        return stats
+
+    def select_action(self, env: GolfEnvironment, legal_actions: Optional[List[int]] = None) -> int:
+        """Most visited root action"""
+        stats = self.search(env, legal_actions)
+        if not stats:
+            raise ValueError("No legal actions available for ISMCTSAgent to choose")
+        return max(stats, key=lambda a: (stats[a][0], stats[a][1]))
+
+    def act(self, legal_actions: List[int], env: Optional[GolfEnvironment] = None) -> int:
+        env = env if env is not None else self.env
+        if env is None:
+            raise ValueError("ISMCTSAgent needs the environment, pass env to act() or the constructor")
+        if not legal_actions:
+            raise ValueError("No legal actions available for ISMCTSAgent to choose")
+        if len(legal_actions) == 1:
+            return legal_actions[0]
+        return self.select_action(env, legal_actions)
+
+    def close(self):
+        """Shuts down the worker pool"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,141 @@
+"""Framework-free MLP policy for CPU actors: NumPy forward pass over encoded observations
+
+Weights are an .npz with w0, b0, w1, b1, ... (w_k of shape (in, out), ReLU between layers),
+from OBS_DIM inputs to NUM_ACTIONS logits. Illegal actions are masked before sampling, so
+every returned action is legal:
+
+    agent = MLPPolicyAgent("policy.npz")
+    actions = agent.act_batch(obs, masks) # (B, OBS_DIM), (B, 30) bool
+"""
+import math
+import numpy as np
+from typing import List, Dict, Optional, Sequence, Union
+
+from game_engine.constants import *
+from game_engine.encoding import *
+from game_engine.environment import GolfEnvironment
+
+Weights = Dict[str, np.ndarray]
+
+
+def init_weights(hidden: Sequence[int] = (128, 128), seed: Optional[int] = None) -> Weights:
+    """Randomly initialized weights (He init, zero biases) for OBS_DIM -> hidden -> NUM_ACTIONS"""
+    rng = np.random.default_rng(seed)
+    sizes = [OBS_DIM, *hidden, NUM_ACTIONS]
+    weights = {}
+    for k, (n_in, n_out) in enumerate(zip(sizes[:-1], sizes[1:])):
+        weights[f"w{k}"] = (rng.standard_normal((n_in, n_out)) * math.sqrt(2.0 / n_in)).astype(np.float32)
+        weights[f"b{k}"] = np.zeros(n_out, dtype=np.float32)
+    return weights
+
+def save_weights(path: str, weights: Weights):
+    np.savez(path, **weights)
+
+def load_weights(path: str) -> Weights:
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+class MLPPolicyAgent:
+    """Masked MLP policy, batched in act_batch and single-decision in act
+
+    Activations live in buffers allocated once for max_batch rows, bigger batches run in
+    chunks. temperature 0 takes the argmax, otherwise actions are sampled (Gumbel-max) from
+    softmax(logits / temperature) over the legal actions.
+    """
+
+    def __init__(self, weights: Union[str, Weights], max_batch: int = 4096, temperature: float = 1.0,
+                 seed: Optional[int] = None, env: Optional[GolfEnvironment] = None):
+        if isinstance(weights, str):
+            weights = load_weights(weights)
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        if temperature < 0:
+            raise ValueError("temperature must be non-negative")
+
+        # Layers w0, b0, w1, b1, ... as float32, checked to chain OBS_DIM -> ... -> NUM_ACTIONS
+        self.layers = []
+        k = 0
+        while f"w{k}" in weights:
+            w = np.ascontiguousarray(weights[f"w{k}"], dtype=np.float32)
+            b = np.ascontiguousarray(weights.get(f"b{k}", np.zeros(w.shape[1])), dtype=np.float32)
+            if w.ndim != 2 or b.shape != (w.shape[1],):
+                raise ValueError(f"Layer {k}: expected w{k} (in, out) and b{k} (out,), got {w.shape} and {b.shape}")
+            self.layers.append((w, b))
+            k += 1
+        if not self.layers:
+            raise ValueError("No layers found, expected arrays w0, b0, w1, b1, ...")
+        sizes = [w.shape[0] for w, _ in self.layers] + [self.layers[-1][0].shape[1]]
+        if sizes[0] != OBS_DIM or sizes[-1] != NUM_ACTIONS:
+            raise ValueError(f"Layers map {sizes[0]} -> {sizes[-1]}, expected {OBS_DIM} -> {NUM_ACTIONS}")
+        if any(a != b for a, b in zip(sizes[1:-1], (w.shape[1] for w, _ in self.layers[:-1]))):
+            raise ValueError(f"Layer sizes do not chain: {[w.shape for w, _ in self.layers]}")
+
+        self.max_batch = max_batch
+        self.temperature = temperature
+        self.env = env
+        self.rng = np.random.default_rng(seed)
+
+        # --- Buffers --- #
+        self._activations = [np.empty((max_batch, w.shape[1]), dtype=np.float32) for w, _ in self.layers]
+        self._noise = np.empty((max_batch, NUM_ACTIONS), dtype=np.float32)
+        self._obs = observation_buffer(1) # Single decision path
+        self._mask = np.zeros((1, NUM_ACTIONS), dtype=bool)
+
+    # --- Batched --- #
+
+    def logits(self, obs: np.ndarray) -> np.ndarray:
+        """(B, NUM_ACTIONS) logits for at most max_batch observations (a view of an internal buffer)"""
+        n = len(obs)
+        x = obs
+        last = len(self.layers) - 1
+        for k, (w, b) in enumerate(self.layers):
+            out = self._activations[k][:n]
+            np.matmul(x, w, out=out)
+            out += b
+            if k < last:
+                np.maximum(out, 0.0, out=out)
+            x = out
+        return x
+
+    def act_batch(self, obs: np.ndarray, masks: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """(B,) legal action ids for (B, OBS_DIM) observations and (B, NUM_ACTIONS) bool legal masks"""
+        n = len(obs)
+        if out is None:
+            out = np.empty(n, dtype=np.int64)
+        for lo in range(0, n, self.max_batch):
+            hi = min(lo + self.max_batch, n)
+            out[lo:hi] = self._act_chunk(obs[lo:hi], masks[lo:hi])
+        return out
+
+    def _act_chunk(self, obs: np.ndarray, masks: np.ndarray) -> np.ndarray:
+        n = len(obs)
+        logits = self.logits(obs)
+        if self.temperature > 0:
+            # Gumbel-max: argmax(logits / T + G) samples from softmax(logits / T)
+            noise = self._noise[:n]
+            self.rng.random(out=noise, dtype=np.float32)
+            np.maximum(noise, np.finfo(np.float32).tiny, out=noise)
+            np.log(noise, out=noise)
+            np.negative(noise, out=noise)
+            np.log(noise, out=noise)
+            logits /= self.temperature
+            logits -= noise
+        logits[~masks] = -np.inf
+        return logits.argmax(axis=1)
+
+    __call__ = act_batch # BatchPolicy for rl_agents.inference_broker
+
+    # --- Single decision --- #
+
+    def act(self, legal_actions: List[int], env: Optional[GolfEnvironment] = None) -> int:
+        """Action for env's current player (env here or in the constructor) among legal_actions"""
+        env = env if env is not None else self.env
+        if env is None:
+            raise ValueError("MLPPolicyAgent needs the environment, pass env to act() or the constructor")
+        if not legal_actions:
+            raise ValueError("No legal actions available for MLPPolicyAgent to choose")
+        env.encode_observation(env.current_player, out=self._obs[0])
+        self._mask[0] = False
+        self._mask[0, legal_actions] = True
+        return int(self._act_chunk(self._obs, self._mask)[0])
@@ -8,7 +8,7 @@ class RandomAgent:
 
         # Debugging
         if not legal_actions: 
-            raise ValueError("No legal actions available for RandomAgent to choose???)
+            raise ValueError("No legal actions available for RandomAgent to choose???")
         
         choose_action = random.choice(legal_actions)
         return choose_action
\ No newline at end of file
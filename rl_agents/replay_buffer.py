@@ -0,0 +1,261 @@
+import os
+import numpy as np
+from typing import Tuple, Dict, Any, Optional
+
+from game_engine.constants import *
+from game_engine.encoding import *
+from game_engine.environment import GolfEnvironment
+
+# Stored fields: name -> (shape after capacity, dtype), one .npy file each
+_FIELDS: Dict[str, Tuple[Tuple[int, ...], Any]] = {
+    "obs": ((OBS_DIM,), OBS_DTYPE),
+    "masks": ((NUM_ACTIONS,), bool),
+    "actions": ((), np.int16),
+    "rewards": ((), np.float32),
+    "next_obs": ((OBS_DIM,), OBS_DTYPE), # Zeros for terminal transitions
+    "next_masks": ((NUM_ACTIONS,), bool),
+    "dones": ((), bool),
+    "players": ((), np.int8), # Seat that acted
+    "priorities": ((), np.float32),
+}
+
+# Cursor file: next write position, number of stored transitions, max priority seen
+_STATE_FILE = "state.npy"
+_POS, _SIZE, _MAX_PRIORITY = range(3)
+
+
+class MemmapReplayBuffer:
+    """Ring buffer of transitions stored in numpy.memmap files under path
+
+    Opening an existing directory maps its files as they are, no reload pass. Only pages
+    that are touched get read, so buffers larger than RAM work. The cursor is written
+    after the data, so a crashed writer loses at most the append in progress (when the
+    ring is full, the slots that append was overwriting may be torn). Call flush() to
+    push the pages to disk.
+    """
+
+    def __init__(self, path: str, capacity: Optional[int] = None, readonly: bool = False):
+        self.path = path
+        state_path = os.path.join(path, _STATE_FILE)
+        mode = "r" if readonly else "r+"
+
+        if os.path.exists(state_path):
+            self._state = np.load(state_path, mmap_mode=mode)
+            self._arrays = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mode) for name in _FIELDS}
+            self.capacity = len(self._arrays["actions"])
+            if capacity is not None and capacity != self.capacity:
+                raise ValueError(f"Buffer at {path} has capacity {self.capacity}, not {capacity}")
+            for name, (shape, dtype) in _FIELDS.items():
+                if self._arrays[name].shape[1:] != shape or self._arrays[name].dtype != np.dtype(dtype):
+                    raise ValueError(f"Buffer field {name} at {path} does not match the current layout")
+        else:
+            if readonly:
+                raise FileNotFoundError(f"No replay buffer at {path}")
+            if not capacity or capacity < 1:
+                raise ValueError("capacity is required to create a new replay buffer")
+            os.makedirs(path, exist_ok=True)
+            self.capacity = capacity
+            self._arrays = {
+                name: np.lib.format.open_memmap(os.path.join(path, name + ".npy"), mode="w+", dtype=dtype,
+                                                shape=(capacity,) + shape)
+                for name, (shape, dtype) in _FIELDS.items()
+            }
+            # Cursor file last: its presence marks a complete buffer
+            self._state = np.lib.format.open_memmap(state_path, mode="w+", dtype=np.float64, shape=(3,))
+            self._state[_MAX_PRIORITY] = 1.0
+            self.flush()
+
+    def __len__(self) -> int:
+        return int(self._state[_SIZE])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Stored field (memmap over the whole capacity, valid up to len(self))"""
+        return self._arrays[name]
+
+    # --- Writing --- #
+
+    def add(self, obs: np.ndarray, mask: np.ndarray, action: int, reward: float, next_obs: np.ndarray,
+            next_mask: np.ndarray, done: bool, player: int, priority: Optional[float] = None):
+        """Appends one transition, O(1)"""
+        i = int(self._state[_POS])
+        a = self._arrays
+        a["obs"][i] = obs
+        a["masks"][i] = mask
+        a["actions"][i] = action
+        a["rewards"][i] = reward
+        a["next_obs"][i] = next_obs
+        a["next_masks"][i] = next_mask
+        a["dones"][i] = done
+        a["players"][i] = player
+        a["priorities"][i] = self._state[_MAX_PRIORITY] if priority is None else priority
+        self._advance(1)
+
+    def add_batch(self, obs: np.ndarray, masks: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+                  next_obs: np.ndarray, next_masks: np.ndarray, dones: np.ndarray, players: np.ndarray,
+                  priorities: Optional[np.ndarray] = None):
+        """Appends k transitions (leading axis), wrapping around the ring"""
+        k = len(actions)
+        if k == 0:
+            return
+        batch = {"obs": obs, "masks": masks, "actions": actions, "rewards": rewards, "next_obs": next_obs,
+                 "next_masks": next_masks, "dones": dones, "players": players,
+                 "priorities": self._state[_MAX_PRIORITY] if priorities is None else priorities}
+        # More than a full ring: only the newest capacity transitions survive
+        skip = max(0, k - self.capacity)
+        if skip:
+            batch = {name: value if np.ndim(value) == 0 else value[skip:] for name, value in batch.items()}
+            self._advance(skip)
+            k -= skip
+
+        start = int(self._state[_POS])
+        first = min(k, self.capacity - start)
+        for name, value in batch.items():
+            if np.ndim(value) == 0:
+                self._arrays[name][start:start + first] = value
+                self._arrays[name][:k - first] = value
+            else:
+                self._arrays[name][start:start + first] = value[:first]
+                self._arrays[name][:k - first] = value[first:]
+        self._advance(k)
+
+    def _advance(self, k: int):
+        self._state[_SIZE] = min(self._state[_SIZE] + k, self.capacity)
+        self._state[_POS] = (self._state[_POS] + k) % self.capacity
+
+    # --- Sampling --- #
+
+    def _gather(self, indices: np.ndarray) -> Dict[str, np.ndarray]:
+        batch = {name: self._arrays[name][indices] for name in _FIELDS if name != "priorities"}
+        batch["indices"] = indices
+        return batch
+
+    def sample(self, batch_size: int, rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+        """Uniform sample with replacement, returns field arrays plus 'indices'"""
+        size = len(self)
+        if size == 0:
+            raise ValueError("Cannot sample from an empty replay buffer")
+        rng = rng if rng is not None else np.random.default_rng()
+        # Sorted indices read the memmap pages in file order
+        return self._gather(np.sort(rng.integers(0, size, batch_size)))
+
+    def sample_prioritized(self, batch_size: int, alpha: float = 0.6, beta: float = 0.4,
+                           rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+        """Sample proportional to priority**alpha, with importance 'weights' (beta) normalized to max 1"""
+        size = len(self)
+        if size == 0:
+            raise ValueError("Cannot sample from an empty replay buffer")
+        rng = rng if rng is not None else np.random.default_rng()
+        p = np.power(self._arrays["priorities"][:size], alpha, dtype=np.float64)
+        cdf = np.cumsum(p)
+        total = cdf[-1]
+        indices = np.minimum(np.searchsorted(cdf, rng.random(batch_size) * total, side="right"), size - 1)
+        indices.sort()
+        weights = (size * p[indices] / total) ** -beta
+        batch = self._gather(indices)
+        batch["weights"] = (weights / weights.max()).astype(np.float32)
+        return batch
+
+    def update_priorities(self, indices: np.ndarray, priorities: np.ndarray):
+        """Sets priorities (e.g. |TD error| + eps) of sampled transitions"""
+        priorities = np.asarray(priorities, dtype=np.float32)
+        if (priorities <= 0).any():
+            raise ValueError("Priorities must be positive")
+        self._arrays["priorities"][indices] = priorities
+        self._state[_MAX_PRIORITY] = max(self._state[_MAX_PRIORITY], float(priorities.max()))
+
+    # --- Files --- #
+
+    def flush(self):
+        """Writes dirty pages to disk"""
+        for array in self._arrays.values():
+            if array.flags.writeable:
+                array.flush()
+        if self._state.flags.writeable:
+            self._state.flush()
+
+    def close(self):
+        self.flush()
+        self._arrays = {}
+        self._state = None
+
+    def __enter__(self) -> "MemmapReplayBuffer":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TransitionRecorder:
+    """Turns per-step results of N two-player games into per-seat transitions
+
+    A seat's transition runs from one of its decisions to its next decision; when a round
+    ends both seats get a terminal transition (acting seat reward r, the other -r). Works
+    with VecGolfEnvironment, SubprocGolfEnvPool (autoreset) or single GolfEnvironments.
+    """
+
+    def __init__(self, buffer: MemmapReplayBuffer, num_envs: int = 1):
+        self.buffer = buffer
+        self.num_envs = num_envs
+        # Last decision of each seat not yet written
+        self._obs = np.zeros((num_envs, 2, OBS_DIM), dtype=OBS_DTYPE)
+        self._masks = np.zeros((num_envs, 2, NUM_ACTIONS), dtype=bool)
+        self._actions = np.zeros((num_envs, 2), dtype=np.int16)
+        self._pending = np.zeros((num_envs, 2), dtype=bool)
+        self._zero_obs = np.zeros((num_envs, OBS_DIM), dtype=OBS_DTYPE)
+        self._zero_masks = np.zeros((num_envs, NUM_ACTIONS), dtype=bool)
+        self._env_idx = np.arange(num_envs)
+
+    def clear(self):
+        """Drops unfinished transitions (call when resetting without finishing the rounds)"""
+        self._pending[:] = False
+
+    def record(self, players: np.ndarray, obs: np.ndarray, masks: np.ndarray, actions: np.ndarray,
+               rewards: np.ndarray, dones: np.ndarray):
+        """Records one step of every game
+
+        players/obs/masks are the acting seats and what they saw before the step, actions what
+        they did, rewards/dones what step returned.
+        """
+        idx = self._env_idx
+        players = np.asarray(players, dtype=np.intp)
+        dones = np.asarray(dones, dtype=bool)
+
+        # The acting seat's previous decision ends here
+        e = idx[self._pending[idx, players]]
+        if len(e):
+            p = players[e]
+            self.buffer.add_batch(self._obs[e, p], self._masks[e, p], self._actions[e, p],
+                                  np.zeros(len(e), dtype=np.float32), obs[e], masks[e],
+                                  np.zeros(len(e), dtype=bool), p.astype(np.int8))
+        self._obs[idx, players] = obs
+        self._masks[idx, players] = masks
+        self._actions[idx, players] = actions
+        self._pending[idx, players] = True
+
+        # Finished rounds: terminal transitions for both seats
+        e = idx[dones]
+        if len(e):
+            rewards = np.asarray(rewards, dtype=np.float32)
+            for seat in (0, 1):
+                pending = e[self._pending[e, seat]]
+                if not len(pending):
+                    continue
+                r = np.where(players[pending] == seat, rewards[pending], -rewards[pending])
+                self.buffer.add_batch(self._obs[pending, seat], self._masks[pending, seat],
+                                      self._actions[pending, seat], r, self._zero_obs[:len(pending)],
+                                      self._zero_masks[:len(pending)], np.ones(len(pending), dtype=bool),
+                                      np.full(len(pending), seat, dtype=np.int8))
+            self._pending[e] = False
+
+    def step_env(self, env: GolfEnvironment, action_id: int):
+        """Steps a single GolfEnvironment (recorder with num_envs=1) and records the transition"""
+        if self.num_envs != 1:
+            raise ValueError("step_env needs a recorder with num_envs=1")
+        player_id = env.current_player
+        obs = env.encode_observation(player_id)
+        mask = env.legal_action_mask_array(player_id)
+        result = env.step(action_id)
+        _, _, reward, done, _ = result
+        self.record(np.array([player_id]), obs[None], mask[None], np.array([action_id]),
+                    np.array([reward], dtype=np.float32), np.array([done]))
+        return result
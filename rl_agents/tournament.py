@@ -0,0 +1,347 @@
+"""Self-play tournaments between agents that expose act(legal_actions)
+
+Every deal is played twice with the seats swapped. Per-game results stream to a CSV or
+JSONL file as games finish, and a matchup stops early once the confidence sequence of its
+mean score differential excludes zero. A confidence sequence holds at every deal count at
+once, so checking it after every chunk keeps the error rate at 1 - confidence.
+
+    python -m rl_agents.tournament --agents random ismcts:iterations=200 --max-deals 400 --out games.jsonl
+"""
+import argparse
+import ast
+import csv
+import inspect
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from itertools import combinations
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+from game_engine.environment import GolfEnvironment
+from rl_agents.random_agent import RandomAgent
+from rl_agents.ismcts_agent import ISMCTSAgent
+from rl_agents.endgame_solver import EndgameSolver
+from rl_agents.greedy_agent import GreedyAgent
+from rl_agents.mlp_policy_agent import MLPPolicyAgent
+
+# Agent spec name -> class, specs look like "ismcts:iterations=200,exploration=0.5"
+AGENTS: Dict[str, Callable[..., Any]] = {
+    "random": RandomAgent,
+    "ismcts": ISMCTSAgent,
+    "endgame": EndgameSolver, # Random until the final turn, then exact
+    "greedy": GreedyAgent,
+    "mlp": MLPPolicyAgent, # mlp:weights=policy.npz
+}
+
+RESULT_FIELDS = ["matchup", "deal_seed", "seat0", "seat1", "score0", "score1", "winner", "steps", "seconds"]
+
+
+# --- Agents --- #
+
+def make_agent(spec: str):
+    """Builds an agent from a spec string"""
+    name, _, options = spec.partition(":")
+    if name not in AGENTS:
+        raise ValueError(f"Unknown agent {name}, expected one of {sorted(AGENTS)}")
+    kwargs = {}
+    for option in filter(None, options.split(",")):
+        key, _, value = option.partition("=")
+        try:
+            kwargs[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            kwargs[key] = value
+    return AGENTS[name](**kwargs)
+
+def _wants_env(agent) -> bool:
+    """Whether agent.act also takes the environment (search agents)"""
+    return "env" in inspect.signature(agent.act).parameters
+
+
+# --- Games --- #
+
+def play_game(env: GolfEnvironment, agents: List[Any], deal_seed: int) -> Tuple[List[int], int]:
+    """Plays one round with agents[seat], returns final scores and number of steps
+
+    The deal seed is the round seed, so both seatings of a deal get the same deck and reshuffles.
+    """
+    wants_env = [_wants_env(agent) for agent in agents]
+    env.reset(seed = deal_seed)
+    done = False
+    steps = 0
+    info: Dict[str, Any] = {}
+    while not done:
+        p = env.current_player
+        legal = env.get_legal_actions(p)
+        action = agents[p].act(legal, env) if wants_env[p] else agents[p].act(legal)
+        _, _, _, done, info = env.step(action)
+        steps += 1
+    return info['final_scores'], steps
+
+
+# Agents built once per worker process
+_WORKER_AGENTS: Dict[str, Any] = {}
+
+def play_deals(spec_a: str, spec_b: str, deal_seeds: List[int], num_decks: int = 2, num_jokers: int = 4) -> List[Dict[str, Any]]:
+    """Plays each deal twice (A in seat 0, then B in seat 0), returns one result per game"""
+    for spec in (spec_a, spec_b):
+        if spec not in _WORKER_AGENTS:
+            _WORKER_AGENTS[spec] = make_agent(spec)
+    env = GolfEnvironment(num_decks=num_decks, num_jokers=num_jokers, obs_type="none")
+
+    results = []
+    for deal_seed in deal_seeds:
+        for swap, seats in enumerate(((spec_a, spec_b), (spec_b, spec_a))):
+            # Agent randomness is seeded per game too
+            random.seed(deal_seed * 2 + swap)
+            start = time.perf_counter()
+            scores, steps = play_game(env, [_WORKER_AGENTS[s] for s in seats], deal_seed)
+            winner = -1
+            if scores[0] < scores[1]: winner = 0
+            elif scores[1] < scores[0]: winner = 1
+            results.append({
+                "matchup": f"{spec_a} vs {spec_b}", "deal_seed": deal_seed,
+                "seat0": seats[0], "seat1": seats[1], "score0": scores[0], "score1": scores[1],
+                "winner": winner, "steps": steps, "seconds": round(time.perf_counter() - start, 6),
+            })
+    return results
+
+
+# --- Results --- #
+
+class ResultWriter:
+    """Streams game results to .csv or .jsonl (by extension), flushed per game"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "w", newline="")
+        self._csv = None
+        if path.endswith(".csv"):
+            self._csv = csv.DictWriter(self._file, fieldnames=RESULT_FIELDS)
+            self._csv.writeheader()
+
+    def write(self, result: Dict[str, Any]):
+        if self._csv is not None:
+            self._csv.writerow(result)
+        else:
+            self._file.write(json.dumps(result) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def mixture_rho2(alpha: float, horizon: int) -> float:
+    """Normal mixture width rho^2 giving the tightest confidence sequence around horizon samples"""
+    log_alpha = -2 * math.log(alpha)
+    return (log_alpha + math.log(log_alpha + 1)) / max(horizon, 1)
+
+def confidence_sequence_half_width(n: int, variance: float, alpha: float, rho2: float) -> float:
+    """Half width of the asymptotic normal-mixture confidence sequence (Waudby-Smith et al. 2021)
+
+    With probability 1 - alpha the running means of all n stay within it simultaneously, so it can
+    be checked after every sample, unlike a fixed-z interval whose error grows with each look.
+    """
+    v = n * variance * rho2 + 1
+    return math.sqrt(2 * v / (n * n * rho2) * math.log(math.sqrt(v) / alpha))
+
+
+class Matchup:
+    """Running statistics of A vs B, one paired sample per deal (A's mean score advantage over both seatings)
+
+    The interval is a confidence sequence at confidence, tuned to be tightest around horizon deals.
+    """
+
+    def __init__(self, spec_a: str, spec_b: str, confidence: float = 0.99, horizon: int = 1000):
+        self.spec_a = spec_a
+        self.spec_b = spec_b
+        self.alpha = 1 - confidence
+        self._rho2 = mixture_rho2(self.alpha, horizon)
+        self.games = 0
+        self.wins_a = 0
+        self.wins_b = 0
+        self._pending: Dict[int, List[float]] = {} # deal seed -> A's score advantage per seating
+        self.n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.stopped = False
+        self.next_deal = 0
+        self.in_flight = 0
+
+    def add(self, result: Dict[str, Any]):
+        a_seat = 0 if result["seat0"] == self.spec_a else 1
+        scores = (result["score0"], result["score1"])
+        advantage = scores[1 - a_seat] - scores[a_seat] # Lower score wins
+        self.games += 1
+        if result["winner"] == a_seat: self.wins_a += 1
+        elif result["winner"] == 1 - a_seat: self.wins_b += 1
+
+        # Welford update once both seatings of a deal are in
+        pair = self._pending.setdefault(result["deal_seed"], [])
+        pair.append(advantage)
+        if len(pair) == 2:
+            del self._pending[result["deal_seed"]]
+            x = (pair[0] + pair[1]) / 2
+            self.n += 1
+            delta = x - self._mean
+            self._mean += delta / self.n
+            self._m2 += delta * (x - self._mean)
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    def half_width(self) -> float:
+        """Confidence sequence half width of the mean paired advantage (valid at any deal count)"""
+        if self.n < 2:
+            return math.inf
+        return confidence_sequence_half_width(self.n, self._m2 / (self.n - 1), self.alpha, self._rho2)
+
+    def decided(self, min_deals: int) -> bool:
+        """Confidence sequence excludes zero, safe to check after every deal (min_deals guards the variance estimate)"""
+        return self.n >= min_deals and abs(self._mean) > self.half_width()
+
+
+class EloTable:
+    """Online Elo ratings updated per game"""
+
+    def __init__(self, k: float = 16.0, initial: float = 1500.0):
+        self.k = k
+        self.initial = initial
+        self.ratings: Dict[str, float] = {}
+
+    def update(self, result: Dict[str, Any]):
+        a, b = result["seat0"], result["seat1"]
+        ra = self.ratings.setdefault(a, self.initial)
+        rb = self.ratings.setdefault(b, self.initial)
+        expected_a = 1.0 / (1.0 + 10 ** ((rb - ra) / 400))
+        score_a = {0: 1.0, 1: 0.0, -1: 0.5}[result["winner"]]
+        self.ratings[a] = ra + self.k * (score_a - expected_a)
+        self.ratings[b] = rb - self.k * (score_a - expected_a)
+
+
+# --- Tournament --- #
+
+def run_tournament(agent_specs: List[str], mode: str = "round-robin", max_deals: int = 1000, min_deals: int = 20,
+                   confidence: float = 0.99, num_workers: int = 1, chunk: int = 10, seed: int = 0,
+                   out: Optional[str] = None, num_decks: int = 2, num_jokers: int = 4,
+                   on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> Tuple[List[Matchup], EloTable]:
+    """Plays all matchups, returns their statistics and the Elo table
+
+    mode is "round-robin" (every pair) or "head-to-head" (first agent against each other agent).
+    num_workers=0 plays everything in this process. A matchup stops once its confidence sequence
+    (coverage confidence, see Matchup) excludes zero, checked after every chunk; a matchup between
+    equal agents is wrongly decided with probability at most 1 - confidence.
+    """
+    if len(agent_specs) < 2:
+        raise ValueError("need at least two agents")
+    if len(set(agent_specs)) != len(agent_specs):
+        raise ValueError("Agent specs must be unique, results are attributed by spec")
+    if mode == "round-robin":
+        pairs = list(combinations(agent_specs, 2))
+    elif mode == "head-to-head":
+        pairs = [(agent_specs[0], other) for other in agent_specs[1:]]
+    else:
+        raise ValueError(f"Unknown mode {mode}, expected 'round-robin' or 'head-to-head'")
+
+    matchups = [Matchup(a, b, confidence, max_deals) for a, b in pairs]
+    elo = EloTable()
+    writer = ResultWriter(out) if out else None
+
+    def record(matchup: Matchup, results: List[Dict[str, Any]]):
+        for result in results:
+            matchup.add(result)
+            elo.update(result)
+            if writer: writer.write(result)
+            if on_result: on_result(result)
+        if matchup.decided(min_deals):
+            matchup.stopped = True
+
+    def next_seeds(matchup: Matchup) -> List[int]:
+        # Deal seeds are shared by all matchups so every pair sees the same deals
+        seeds = [seed * 1_000_003 + d for d in range(matchup.next_deal, min(matchup.next_deal + chunk, max_deals))]
+        matchup.next_deal += len(seeds)
+        return seeds
+
+    try:
+        if num_workers <= 0:
+            for matchup in matchups:
+                while not matchup.stopped and matchup.next_deal < max_deals:
+                    record(matchup, play_deals(matchup.spec_a, matchup.spec_b, next_seeds(matchup), num_decks, num_jokers))
+            return matchups, elo
+
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            futures: Dict[Future, Matchup] = {}
+
+            def submit(matchup: Matchup):
+                seeds = next_seeds(matchup)
+                if seeds:
+                    future = pool.submit(play_deals, matchup.spec_a, matchup.spec_b, seeds, num_decks, num_jokers)
+                    futures[future] = matchup
+                    matchup.in_flight += 1
+
+            # Keep about two chunks per worker in flight, spread over the matchups
+            for _ in range(max(1, 2 * num_workers // len(matchups))):
+                for matchup in matchups:
+                    submit(matchup)
+
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    matchup = futures.pop(future)
+                    matchup.in_flight -= 1
+                    if future.cancelled():
+                        continue
+                    record(matchup, future.result())
+                    if matchup.stopped:
+                        # Drop this matchup's queued work
+                        for other, m in list(futures.items()):
+                            if m is matchup and other.cancel():
+                                futures.pop(other)
+                                m.in_flight -= 1
+                    elif matchup.next_deal < max_deals:
+                        submit(matchup)
+        return matchups, elo
+    finally:
+        if writer: writer.close()
+
+
+def format_tables(matchups: List[Matchup], elo: EloTable) -> str:
+    """Text tables: mean score differential per matchup (+/- its confidence sequence) and Elo ratings"""
+    lines = [f"{'Matchup':40s} {'Deals':>6s} {'Games':>6s} {'A wins':>7s} {'B wins':>7s} {'A adv':>8s} {'+/-':>7s}  Status"]
+    for m in matchups:
+        status = "decided" if m.stopped else "undecided"
+        lines.append(f"{m.spec_a + ' vs ' + m.spec_b:40s} {m.n:6d} {m.games:6d} {m.wins_a:7d} {m.wins_b:7d} "
+                     f"{m.mean:8.2f} {m.half_width():7.2f}  {status}")
+    lines.append("")
+    lines.append(f"{'Agent':40s} {'Elo':>8s}")
+    for spec, rating in sorted(elo.ratings.items(), key=lambda kv: -kv[1]):
+        lines.append(f"{spec:40s} {rating:8.1f}")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Golf self-play tournament")
+    parser.add_argument("--agents", nargs="+", required=True, help="agent specs, e.g. random ismcts:iterations=200")
+    parser.add_argument("--mode", choices=["round-robin", "head-to-head"], default="round-robin")
+    parser.add_argument("--max-deals", type=int, default=1000, help="deals per matchup (each played in both seatings)")
+    parser.add_argument("--min-deals", type=int, default=20, help="deals before early stopping is considered")
+    parser.add_argument("--confidence", type=float, default=0.99)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes, 0 plays in-process")
+    parser.add_argument("--chunk", type=int, default=10, help="deals per task")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="stream per-game results to .csv or .jsonl")
+    args = parser.parse_args(argv)
+    if len(args.agents) < 2:
+        parser.error("need at least two agents")
+
+    matchups, elo = run_tournament(args.agents, args.mode, args.max_deals, args.min_deals, args.confidence,
+                                   args.workers, args.chunk, args.seed, args.out)
+    print(format_tables(matchups, elo))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
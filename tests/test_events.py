@@ -0,0 +1,29 @@
+import random
+
+import pytest
+
+from game_engine.environment import GolfEnvironment
+from game_engine.events import BinaryGameLog, ResetEvent, read_game_log, replay_events
+
+
+@pytest.mark.parametrize("num_decks", [2, 6])
+def test_binary_log_round_trips_and_replays(tmp_path, num_decks):
+    path = str(tmp_path / "games.log")
+    env = GolfEnvironment(num_decks = num_decks, seed = 3)
+    rng = random.Random(0)
+    with BinaryGameLog(path) as log:
+        env.subscribe(log)
+        for _ in range(3):
+            env.reset()
+            while not env.game_over:
+                env.step(rng.choice(env.get_legal_actions(env.current_player)))
+    final_scores = list(env.scores)
+
+    events = list(read_game_log(path))
+    resets = [event for event in events if isinstance(event, ResetEvent)]
+    assert len(resets) == 3 and all(len(event.deck_order) == env.total_cards for event in resets)
+
+    replay = GolfEnvironment(num_decks = num_decks)
+    for _ in replay_events(events, replay):
+        pass
+    assert replay.game_over and list(replay.scores) == final_scores
@@ -0,0 +1,71 @@
+import numpy as np
+
+from game_engine.constants import *
+from game_engine.encoding import observation_buffer
+from game_engine.environment import GolfEnvironment
+from game_engine.env_pool import env_seeds
+from game_engine.vec_environment import VecGolfEnvironment
+from game_engine.gym_env import SyncGolfVectorEnv, AsyncGolfVectorEnv
+
+
+def _check_final_entries(info, dones, expected_obs):
+    for key in ("_final_obs", "_final_info", "_final_scores"):
+        assert np.array_equal(info[key], dones), key
+    assert np.array_equal(info["final_obs"][dones], expected_obs[dones])
+    assert not info["final_obs"][~dones].any()
+    assert np.array_equal(info["final_info"]["final_scores"], info["final_scores"])
+
+
+def test_sync_vector_env_final_obs_are_terminal_rows():
+    env = SyncGolfVectorEnv(32, seed = 3)
+    # Same games without autoreset, observed from the acting seat after each step
+    reference = VecGolfEnvironment(32, seed = 3, autoreset = False)
+    _, info = env.reset()
+    reference.reset()
+    rng = np.random.default_rng(0)
+    checked = 0
+    for _ in range(300):
+        masks = info["action_mask"]
+        actions = (masks * rng.random(masks.shape)).argmax(axis = 1)
+        acting = reference.current_player.copy()
+        _, _, ref_dones, _, _ = reference.step(actions)
+        _, _, dones, _, info = env.step(actions)
+        assert np.array_equal(dones, ref_dones)
+        if not dones.any():
+            assert "final_obs" not in info
+            continue
+        _check_final_entries(info, dones, reference.get_observations(seats = acting))
+        reference.reset(np.nonzero(dones)[0])
+        checked += 1
+    assert checked
+
+
+def test_async_vector_env_final_obs_are_terminal_rows():
+    num_envs = 6
+    env = AsyncGolfVectorEnv(num_envs, num_workers = 2, seed = 5)
+    # Same games stepped in this process
+    reference = [GolfEnvironment(seed = s, obs_type = "none") for s in env_seeds(5, num_envs)]
+    try:
+        _, info = env.reset()
+        for game in reference:
+            game.reset()
+        rng = np.random.default_rng(0)
+        expected = observation_buffer(num_envs)
+        checked = 0
+        while checked < 10:
+            masks = info["action_mask"]
+            actions = (masks * rng.random(masks.shape)).argmax(axis = 1)
+            ref_dones = np.zeros(num_envs, dtype = bool)
+            for i, game in enumerate(reference):
+                acting = game.current_player
+                ref_dones[i] = game.step(int(actions[i]))[3]
+                if ref_dones[i]:
+                    game.encode_observation(acting, out = expected[i])
+                    game.reset()
+            _, _, dones, _, info = env.step(actions)
+            assert np.array_equal(dones, ref_dones)
+            if dones.any():
+                _check_final_entries(info, dones, expected)
+                checked += 1
+    finally:
+        env.close()
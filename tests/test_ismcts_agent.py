@@ -0,0 +1,64 @@
+import random
+from collections import Counter
+
+from game_engine.constants import *
+from game_engine.card import CARD_RANK_CODE, NUM_RANK_CODES
+from game_engine.deck import deck_template
+from game_engine.environment import GolfEnvironment
+from rl_agents.ismcts_agent import InformationSet
+
+
+def _random_positions(games: int = 20, seed: int = 0):
+    """Environments stopped after a random number of random legal actions"""
+    rng = random.Random(seed)
+    for game in range(games):
+        env = GolfEnvironment(seed = game)
+        env.reset()
+        for _ in range(rng.randrange(4, 80)):
+            if env.game_over:
+                break
+            env.step(rng.choice(env.get_legal_actions(env.current_player)))
+        if not env.game_over:
+            yield env
+
+
+def _visible_cards(env: GolfEnvironment) -> Counter:
+    visible = Counter(env.discard_pile)
+    for player in env.players:
+        visible.update(player.grid[i] for i in range(GRID_SIZE) if player.face_up[i])
+    if env.drawn_card is not None:
+        visible[env.drawn_card] += 1
+    return visible
+
+
+def test_determinized_cards_never_come_from_the_discard_pile():
+    rng = random.Random(1)
+    checked = 0
+    for env in _random_positions():
+        player_id = env.current_player
+        info_set = InformationSet(env, player_id)
+        state = env.snapshot()
+        discards = list(env.discard_pile)
+        allowed = Counter(deck_template(env.num_decks, env.num_jokers))
+        allowed.subtract(_visible_cards(env))
+
+        for _ in range(10):
+            env.restore(state)
+            info_set.determinize(env, rng)
+            assert env.discard_pile == discards
+            hidden = Counter(env.deck.cards)
+            for player in env.players:
+                hidden.update(player.grid[i] for i in range(GRID_SIZE) if not player.face_up[i])
+            assert all(hidden[code] <= allowed[code] for code in hidden)
+            assert sum(hidden.values()) == sum(allowed.values())
+            checked += 1
+    assert checked
+
+
+def test_unseen_cards_match_env_unseen_counts():
+    for env in _random_positions():
+        player_id = env.current_player
+        counts = [0] * NUM_RANK_CODES
+        for code in InformationSet(env, player_id).unseen:
+            counts[CARD_RANK_CODE[code]] += 1
+        assert counts == env.unseen_counts(player_id)
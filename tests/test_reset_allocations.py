@@ -0,0 +1,58 @@
+import os
+import tracemalloc
+
+from game_engine.card import Card
+from game_engine.environment import GolfEnvironment
+
+RESETS = 2000
+# Memory allocated in the engine's own files (not tracemalloc's or the test's)
+_ENGINE = [tracemalloc.Filter(True, os.path.join("*", "game_engine", "*"))]
+
+
+def _steady_env(obs_type: str) -> GolfEnvironment:
+    env = GolfEnvironment(seed = 0, obs_type = obs_type)
+    for _ in range(10):
+        env.reset()
+    return env
+
+
+def _retained_bytes(env: GolfEnvironment, resets: int) -> int:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        for _ in range(resets):
+            env.reset()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    return sum(stat.size_diff for stat in after.filter_traces(_ENGINE).compare_to(before.filter_traces(_ENGINE), "filename"))
+
+
+def test_reset_retains_no_memory():
+    for obs_type in ("none", "array"):
+        env = _steady_env(obs_type)
+        reused = (env.deck, env.deck.cards, env.discard_pile, *env.players, *(p.grid for p in env.players))
+        retained = _retained_bytes(env, RESETS)
+        # The live state is replaced, not grown (new hash ints, the returned observations), so what
+        # is left is a few hundred bytes at most whatever the number of resets: 0 whole bytes per reset
+        assert retained // RESETS == 0, f"{obs_type}: {retained} bytes retained over {RESETS} resets"
+        assert all(a is b for a, b in zip(reused, (env.deck, env.deck.cards, env.discard_pile, *env.players,
+                                                   *(p.grid for p in env.players))))
+
+
+def test_reset_creates_no_cards(monkeypatch):
+    env = _steady_env("array")
+    created = []
+    init = Card.__init__
+
+    def counting_init(self, *args, **kwargs):
+        created.append(self)
+        init(self, *args, **kwargs)
+
+    monkeypatch.setattr(Card, "__init__", counting_init)
+    for _ in range(100):
+        env.reset()
+    assert not created
+    # Piles and grids hold integer card codes, not Card objects
+    cards = [*env.deck.cards, *env.discard_pile, *(code for p in env.players for code in p.grid)]
+    assert all(type(code) is int for code in cards)
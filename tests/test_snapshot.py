@@ -0,0 +1,114 @@
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from game_engine.checkpoint import load_envs, pack_envs, save_envs, unpack_envs
+from game_engine.constants import *
+from game_engine.environment import GolfEnvironment
+
+
+def _played(num_decks: int, seed: int, steps: int) -> GolfEnvironment:
+    env = GolfEnvironment(num_decks = num_decks, seed = seed)
+    env.reset()
+    rng = random.Random(seed)
+    for _ in range(steps):
+        if env.game_over:
+            env.reset()
+        env.step(rng.choice(env.get_legal_actions(env.current_player)))
+    return env
+
+
+def _assert_continues_alike(a: GolfEnvironment, b: GolfEnvironment, steps: int = 200):
+    rng = random.Random(7)
+    for _ in range(steps):
+        if a.game_over:
+            a.reset()
+            b.reset()
+        action_id = rng.choice(a.get_legal_actions(a.current_player))
+        assert a.step(action_id)[2:4] == b.step(action_id)[2:4]
+        assert a.snapshot() == b.snapshot()
+        assert np.array_equal(a.encode_observation(a.current_player), b.encode_observation(b.current_player))
+
+
+@pytest.mark.parametrize("num_decks", [2, 6])
+def test_snapshot_and_clone_support_large_decks(num_decks):
+    env = _played(num_decks, 0, 40)
+    assert env.total_cards > 255 or num_decks == 2
+    clone = env.clone()
+    assert clone.snapshot() == env.snapshot()
+    _assert_continues_alike(env, clone)
+
+
+@pytest.mark.parametrize("num_decks", [2, 6])
+def test_checkpoint_supports_large_decks(tmp_path, num_decks):
+    envs = [_played(num_decks, seed, 30 + seed) for seed in range(4)]
+    path = str(tmp_path / "envs.npz")
+    save_envs(path, envs)
+    loaded = load_envs(path)
+    for env, copy in zip(envs, loaded):
+        assert copy.snapshot() == env.snapshot()
+        _assert_continues_alike(env, copy, 100)
+
+
+def test_pickle_keeps_stats():
+    env = _played(2, 3, 20)
+    env.enable_stats()
+    env.step(env.get_legal_actions(env.current_player)[0])
+    copy = pickle.loads(pickle.dumps(env))
+    assert copy.stats().steps == env.stats().steps == 1
+    _assert_continues_alike(env, copy, 50)
+    # The copy times into its own stats, players included
+    assert copy.stats() is not env.stats() and copy.stats().steps == env.stats().steps
+    assert all("calculate_score" in player.__dict__ for player in copy.players)
+    copy.disable_stats()
+    assert "step" not in copy.__dict__
+
+
+def _reshuffling(num_decks: int, seed: int, reshuffles: int) -> GolfEnvironment:
+    """Round that never ends: draw from the stock and replace a face up card until the stock ran out reshuffles times"""
+    env = GolfEnvironment(num_decks = num_decks, seed = seed)
+    env.reset()
+    while env.current_phase == PHASE_INITIAL_FLIP:
+        env.step(env.get_legal_actions(env.current_player)[0])
+    while env._reshuffles < reshuffles:
+        _draw_and_replace(env)
+    return env
+
+def _draw_and_replace(env: GolfEnvironment):
+    env.step(ACTION_DRAW_STOCK)
+    env.step(ACTION_REPLACE + env.players[env.current_player].face_up.index(True))
+
+
+def _derived_state(env: GolfEnvironment):
+    players = [{name: value for name, value in vars(player).items() if not name.startswith("_z")} for player in env.players]
+    return (players, env._unseen_counts, env._unseen_total, env._unseen_value, env._unseen_key,
+            env._unseen_features.tolist(), env.round_seed, env.dealt_from_seed)
+
+
+@pytest.mark.parametrize("num_decks", [2, 6])
+def test_unpack_matches_restore(num_decks):
+    envs = [_played(num_decks, seed, seed * 7) for seed in range(12)] + [_reshuffling(num_decks, 1, 1)]
+    copies = [GolfEnvironment(num_decks = num_decks) for _ in envs]
+    unpack_envs(pack_envs(envs), copies)
+    for env, copy in zip(envs, copies):
+        assert copy.snapshot() == env.snapshot()
+        assert _derived_state(copy) == _derived_state(env)
+        for player in copy.players:
+            player.check_scores()
+
+
+@pytest.mark.parametrize("num_decks", [2, 6])
+def test_checkpoint_continues_reshuffles(tmp_path, num_decks):
+    envs = [_reshuffling(num_decks, seed, 1 + seed % 2) for seed in range(3)]
+    path = str(tmp_path / "envs.npz")
+    save_envs(path, envs)
+    loaded = load_envs(path)
+    for env, copy in zip(envs, loaded):
+        clone = env.clone()
+        for _ in range(2 * env.total_cards):
+            for game in (env, copy, clone):
+                _draw_and_replace(game)
+            assert copy.snapshot() == clone.snapshot() == env.snapshot()
+        assert env._reshuffles > 2
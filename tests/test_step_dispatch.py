@@ -0,0 +1,159 @@
+import random
+
+import numpy as np
+import pytest
+
+from game_engine.constants import *
+from game_engine.environment import GolfEnvironment
+
+# Action types each phase accepts, as in the if/elif step the transition table replaced
+_PHASE_ACTION_TYPES = {
+    PHASE_INITIAL_FLIP: ("Initial_Flip",),
+    PHASE_START_TURN: ("DRAW_STOCK", "DRAW_DISCARD"),
+    PHASE_DRAW_STOCK_DECISION: ("REPLACE", "DISCARD_DRAWN"),
+    PHASE_DRAW_DISCARD_DECISION: ("REPLACE",),
+    PHASE_MUST_FLIP_CARD: ("FLIP",),
+    PHASE_GAME_OVER: (),
+}
+
+
+def reference_step(env: GolfEnvironment, action_id: int):
+    """The step logic before table dispatch (if/elif per phase and action type), returns reward, done, info"""
+    player_id = env.current_player
+    player = env.players[player_id]
+    opponent_id = 1 - player_id
+
+    if env.validate_actions and 0 <= action_id < NUM_ACTIONS and not (env.legal_action_mask(player_id) >> action_id) & 1:
+        raise ValueError(f"Illegal action {action_id} for player {player_id} in phase {env.current_phase}")
+    action_type, action_index = env._get_action_from_id(action_id)
+    if action_type not in _PHASE_ACTION_TYPES[env.current_phase]:
+        raise ValueError(f"Invalid action type {action_type} during phase {env.current_phase}")
+    reward = 0
+    info = {}
+
+    if env.current_phase == PHASE_INITIAL_FLIP:
+        player.flip_card_up(action_index)
+        env._reveal(player.grid[action_index])
+        env.initial_flips_count[player_id] += 1
+        if env.initial_flips_count[player_id] == 3:
+            if player_id == 0:
+                env.current_player = 1
+            else:
+                env.current_player = 0
+                env.current_phase = PHASE_START_TURN
+
+    elif env.current_phase == PHASE_START_TURN:
+        if action_type == "DRAW_STOCK":
+            if env.deck.is_empty():
+                env._reshuffle_discard_pile()
+            env.drawn_card = env.deck.deal()
+            env.current_phase = PHASE_DRAW_STOCK_DECISION
+        elif action_type == "DRAW_DISCARD":
+            env.drawn_card = env.discard_pile.pop()
+            env.current_phase = PHASE_DRAW_DISCARD_DECISION
+
+    elif env.current_phase == PHASE_DRAW_STOCK_DECISION:
+        if action_type == "REPLACE":
+            replaced_card = player.get_card(action_index)
+            if not player.is_face_up(action_index):
+                env._reveal(replaced_card)
+            env._reveal(env.drawn_card)
+            player.set_card(action_index, env.drawn_card, face_up = True)
+            env.discard_pile.append(replaced_card)
+            env.drawn_card = None
+            env._check_round_end_and_advance_player()
+        elif action_type == "DISCARD_DRAWN":
+            env._reveal(env.drawn_card)
+            env.discard_pile.append(env.drawn_card)
+            env.drawn_card = None
+            env.current_phase = PHASE_MUST_FLIP_CARD
+
+    elif env.current_phase == PHASE_DRAW_DISCARD_DECISION:
+        replaced_card = player.get_card(action_index)
+        if not player.is_face_up(action_index):
+            env._reveal(replaced_card)
+        player.set_card(action_index, env.drawn_card, face_up = True)
+        env.discard_pile.append(replaced_card)
+        env.drawn_card = None
+        env._check_round_end_and_advance_player()
+
+    elif env.current_phase == PHASE_MUST_FLIP_CARD:
+        player.flip_card_up(action_index)
+        env._reveal(player.grid[action_index])
+        env._check_round_end_and_advance_player()
+
+    done = env.round_over or env.game_over
+    if done:
+        env._reveal_all_cards(0)
+        env._reveal_all_cards(1)
+        env.scores[0] = env.players[0].score
+        env.scores[1] = env.players[1].score
+        winner = -1
+        if env.scores[0] < env.scores[1]: winner = 0
+        elif env.scores[1] < env.scores[0]: winner = 1
+        info['round_winner'] = winner
+        info['final_scores'] = env.scores.copy()
+        reward = env.scores[opponent_id] - env.scores[player_id]
+        env.game_over = True
+        env.current_phase = PHASE_GAME_OVER
+    return reward, done, info
+
+
+def _assert_same_state(env: GolfEnvironment, ref: GolfEnvironment):
+    state, ref_state = env.snapshot(include_rng = True), ref.snapshot(include_rng = True)
+    assert state == ref_state and state.rng_state == ref_state.rng_state
+    assert env.zobrist_hash() == ref.zobrist_hash()
+    for player_id in range(2):
+        assert env.legal_action_mask(player_id) == ref.legal_action_mask(player_id)
+        assert env.unseen_counts(player_id) == ref.unseen_counts(player_id)
+        assert np.array_equal(env.encode_observation(player_id), ref.encode_observation(player_id))
+    assert [p.score for p in env.players] == [p.score for p in ref.players]
+
+
+def _outcome(step, action_id: int):
+    try:
+        _, _, reward, done, info = step(action_id)
+    except ValueError:
+        return "ValueError"
+    return reward, done, info
+
+def _reference_outcome(env: GolfEnvironment, action_id: int):
+    try:
+        return reference_step(env, action_id)
+    except ValueError:
+        return "ValueError"
+
+
+@pytest.mark.parametrize("validate_actions", [False, True])
+def test_step_matches_reference_with_illegal_actions(validate_actions):
+    rng = random.Random(0)
+    for game in range(30):
+        env = GolfEnvironment(seed = game, validate_actions = validate_actions)
+        ref = GolfEnvironment(seed = game, validate_actions = validate_actions)
+        env.reset()
+        ref.reset()
+        while not env.game_over:
+            # Any action id (out of range ones too) a third of the time, else a legal one
+            if rng.random() < 1 / 3:
+                action_id = rng.randrange(-1, NUM_ACTIONS + 1)
+            else:
+                action_id = rng.choice(env.get_legal_actions(env.current_player))
+            outcome = _outcome(env.step, action_id)
+            assert outcome == _reference_outcome(ref, action_id)
+            if outcome == "ValueError" and not validate_actions and action_id in env.get_legal_actions(env.current_player):
+                pytest.fail(f"Legal action {action_id} raised")
+            _assert_same_state(env, ref)
+
+
+def test_step_unchecked_matches_reference():
+    rng = random.Random(1)
+    for game in range(30):
+        env = GolfEnvironment(seed = game, obs_type = "none")
+        ref = GolfEnvironment(seed = game)
+        env.reset()
+        ref.reset()
+        while not env.game_over:
+            action_id = rng.choice(env.get_legal_actions(env.current_player))
+            _, _, reward, done, info = env.step_unchecked(action_id)
+            assert (reward, done, info) == reference_step(ref, action_id)
+            _assert_same_state(env, ref)
@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from rl_agents.tournament import Matchup, run_tournament
+
+
+def _feed_deal(matchup: Matchup, deal: int, advantage: float):
+    """Both seatings of a deal with A ahead by advantage points"""
+    for a_seat in (0, 1):
+        scores = [0.0, 0.0]
+        scores[1 - a_seat] = advantage
+        matchup.add({"seat0": "a" if a_seat == 0 else "b", "seat1": "b" if a_seat == 0 else "a",
+                     "deal_seed": deal, "score0": scores[0], "score1": scores[1], "winner": -1})
+
+
+def _decided_rate(effect: float, matchups: int, max_deals: int = 1000, chunk: int = 10, seed: int = 0) -> float:
+    rng = random.Random(seed)
+    decided = 0
+    for _ in range(matchups):
+        matchup = Matchup("a", "b", confidence = 0.99, horizon = max_deals)
+        for deal in range(max_deals):
+            _feed_deal(matchup, deal, rng.gauss(effect, 12.0))
+            if (deal + 1) % chunk == 0 and matchup.decided(min_deals = 20):
+                decided += 1
+                break
+    return decided / matchups
+
+
+def test_repeated_looks_keep_false_decisions_at_nominal_rate():
+    # A fixed-z 99% interval checked every 10 deals decides about 11% of equal matchups
+    assert _decided_rate(0.0, 300) <= 0.02
+
+
+def test_real_differences_are_still_decided():
+    assert _decided_rate(4.0, 20, max_deals = 400) == 1.0
+
+
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_needs_two_agents(num_workers):
+    with pytest.raises(ValueError, match = "need at least two agents"):
+        run_tournament(["random"], num_workers = num_workers)
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from game_engine.constants import *
+from game_engine.vec_environment import VecGolfEnvironment, STATE_FIELDS
+
+
+@pytest.mark.parametrize("validate", [True, False])
+@pytest.mark.parametrize("bad_action", [-1, NUM_ACTIONS])
+def test_out_of_range_actions_raise_value_error(validate, bad_action):
+    env = VecGolfEnvironment(4, seed = 0, validate = validate)
+    _, masks = env.reset()
+    before = {name: getattr(env, name).copy() for name in STATE_FIELDS}
+    actions = masks.argmax(axis = 1)
+    actions[2] = bad_action
+    with pytest.raises(ValueError):
+        env.step(actions)
+    for name in STATE_FIELDS:
+        assert np.array_equal(getattr(env, name), before[name]), name
+
+
+def test_final_scores_only_in_finished_rows():
+    env = VecGolfEnvironment(64, seed = 1)
+    _, masks = env.reset()
+    rng = np.random.default_rng(0)
+    checked = 0
+    for _ in range(400):
+        _, rewards, dones, masks, info = env.step((masks * rng.random(masks.shape)).argmax(axis = 1))
+        if "final_scores" not in info:
+            continue
+        mask = info["_final_scores"]
+        assert np.array_equal(mask, dones)
+        assert not info["final_scores"][~mask].any()
+        # The acting player's reward is the score differential of the finished round
+        scores = info["final_scores"][mask]
+        assert np.array_equal(np.abs(rewards[mask]), np.abs(scores[:, 0] - scores[:, 1]))
+        checked += (~mask).any()
+    assert checked